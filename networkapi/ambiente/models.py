@@ -52,6 +52,7 @@ from networkapi.util.geral import destroy_lock
 from networkapi.util.geral import get_app
 from networkapi.util.appcache import delete_cached_searches_list
 from networkapi.util.appcache import ENVIRONMENT_CACHE_ENTRY
+from networkapi.util.appcache import environment_cache_tag
 from networkapi.vlan.models import TipoRede
 
 from netaddr import IPNetwork as NETADDR
@@ -1180,7 +1181,8 @@ class Ambiente(BaseModel):
             self.default_vrf = vrf_model.get_by_pk(self.default_vrf.id)
 
             saved = self.save()
-            delete_cached_searches_list(ENVIRONMENT_CACHE_ENTRY)
+            delete_cached_searches_list(
+                ENVIRONMENT_CACHE_ENTRY, [environment_cache_tag(self.id)])
             return saved
 
         except FilterNotFoundError, e:
@@ -1274,7 +1276,8 @@ class Ambiente(BaseModel):
 
             environment.__dict__.update(kwargs)
             environment.save(authenticated_user)
-            delete_cached_searches_list(ENVIRONMENT_CACHE_ENTRY)
+            delete_cached_searches_list(
+                ENVIRONMENT_CACHE_ENTRY, [environment_cache_tag(pk)])
 
         except AmbienteDuplicatedError, e:
             raise e
@@ -1345,7 +1348,8 @@ class Ambiente(BaseModel):
         # Remove the environment
         try:
             environment.delete()
-            delete_cached_searches_list(ENVIRONMENT_CACHE_ENTRY)
+            delete_cached_searches_list(
+                ENVIRONMENT_CACHE_ENTRY, [environment_cache_tag(pk)])
         except Exception, e:
             cls.log.error(u'Falha ao remover o Ambiente.')
             raise AmbienteError(e, u'Falha ao remover o Ambiente.')
@@ -1432,7 +1436,8 @@ class Ambiente(BaseModel):
             # save network on CIDR tables
             self.create_cidr(configs=configs, env_id=self.id)
 
-            delete_cached_searches_list(ENVIRONMENT_CACHE_ENTRY)
+            delete_cached_searches_list(
+                ENVIRONMENT_CACHE_ENTRY, [environment_cache_tag(self.id)])
 
         except Exception, e:
             raise EnvironmentErrorV3(e)
@@ -1508,7 +1513,8 @@ class Ambiente(BaseModel):
             raise EnvironmentErrorV3(e)
 
         finally:
-            delete_cached_searches_list(ENVIRONMENT_CACHE_ENTRY)
+            delete_cached_searches_list(
+                ENVIRONMENT_CACHE_ENTRY, [environment_cache_tag(self.id)])
             destroy_lock(locks_list)
 
     # def check_config(self, env_id=None, configs=[]):
@@ -1604,7 +1610,8 @@ class Ambiente(BaseModel):
         # Remove the environment
         try:
             self.delete()
-            delete_cached_searches_list(ENVIRONMENT_CACHE_ENTRY)
+            delete_cached_searches_list(
+                ENVIRONMENT_CACHE_ENTRY, [environment_cache_tag(self.id)])
         except Exception, e:
             self.log.error(u'Falha ao remover o Ambiente.')
             raise AmbienteError(e, u'Falha ao remover o Ambiente.')
@@ -20,14 +20,17 @@ from networkapi.api_deploy import exceptions
 from networkapi.api_equipment.exceptions import AllEquipmentsAreInMaintenanceException
 from networkapi.api_rest import exceptions as api_exceptions
 from networkapi.distributedlock import distributedlock
+from networkapi.distributedlock import LOCK_EQUIPMENT_DEPLOY_CONFIG_USERSCRIPT
 from networkapi.equipamento.models import Equipamento
 from networkapi.extra_logging import local
 from networkapi.extra_logging import NO_REQUEST_ID
+from networkapi.plugins import fanout
 from networkapi.plugins.factory import PluginFactory
 from networkapi.settings import CONFIG_FILES_PATH
 from networkapi.settings import CONFIG_FILES_REL_PATH
 from networkapi.settings import TFTP_SERVER_ADDR
 from networkapi.settings import TFTPBOOT_FILES_PATH
+from networkapi.system.facade import get_value as get_variable
 # import pkgutil
 # import re
 # import sys
@@ -40,6 +43,11 @@ from networkapi.settings import TFTPBOOT_FILES_PATH
 
 log = logging.getLogger(__name__)
 
+# Equipments receiving a script at the same time
+DEPLOY_SCRIPT_MAX_WORKERS = 32
+# Equipments of the same brand receiving a script at the same time
+DEPLOY_SCRIPT_MAX_WORKERS_BY_BRAND = 16
+
 
 def _applyconfig(equipment, filename, equipment_access=None, source_server=None, port=22):
     """Apply configuration file on equipment
@@ -68,10 +76,15 @@ def _applyconfig(equipment, filename, equipment_access=None, source_server=None,
 
     equip_plugin = PluginFactory.factory(equipment)
     equip_plugin.connect()
-    equip_plugin.ensure_privilege_level()
-    vrf = equip_plugin.equipment_access.vrf.internal_name if equip_plugin.equipment_access.vrf else None
-    equip_output = equip_plugin.copyScriptFileToConfig(filename, use_vrf=vrf)
-    equip_plugin.close()
+    try:
+        equip_plugin.ensure_privilege_level()
+        vrf = equip_plugin.equipment_access.vrf.internal_name if equip_plugin.equipment_access.vrf else None
+        equip_output = equip_plugin.copyScriptFileToConfig(filename, use_vrf=vrf)
+    except BaseException:
+        equip_plugin.discard_session()
+        raise
+    finally:
+        equip_plugin.close()
 
     return equip_output
 
@@ -192,3 +205,51 @@ def deploy_config_in_equipment(rel_filename, equipment, tftpserver=None,
 
     return _applyconfig(
         equipment, rel_filename, equipment_access, tftpserver)
+
+
+def deploy_script_in_equipments(rel_filename, equipment_ids):
+    """Apply configuration file on many equipments at the same time
+
+    Args:
+            rel_filename: relative file path from TFTPBOOT_FILES_PATH to apply
+                          in equipments
+            equipment_ids: list of Equipamento().id
+
+    Returns:
+            iterator of (equipment id, {'output', 'status'}), each one
+            yielded as soon as its equipment finishes or times out. All
+            equipments start receiving the script before it is returned.
+
+    Concurrency is limited by the variables deploy_script_max_workers and
+    deploy_script_max_workers_by_brand, and each equipment has the timeout
+    of plugin calls (plugin_call_timeout).
+    """
+
+    brands = dict(Equipamento.objects.filter(id__in=equipment_ids)
+                  .values_list('id', 'modelo__marca__nome'))
+    max_workers = int(get_variable(
+        'deploy_script_max_workers', DEPLOY_SCRIPT_MAX_WORKERS))
+    max_workers_by_brand = int(get_variable(
+        'deploy_script_max_workers_by_brand',
+        DEPLOY_SCRIPT_MAX_WORKERS_BY_BRAND))
+
+    calls = [fanout.PluginCall(
+        equipment_id,
+        deploy_config_in_equipment_synchronous,
+        (rel_filename, equipment_id,
+         LOCK_EQUIPMENT_DEPLOY_CONFIG_USERSCRIPT % equipment_id),
+        group=brands.get(equipment_id)
+    ) for equipment_id in equipment_ids]
+
+    return _deploy_results(fanout.run_each(
+        calls, max_workers, group_limit=max_workers_by_brand))
+
+
+def _deploy_results(calls):
+    for call in calls:
+        if call.error is None:
+            yield call.name, {'output': call.result, 'status': 'OK'}
+        else:
+            log.error('Error applying script file to equipment_id %s: %s' %
+                      (call.name, call.error))
+            yield call.name, {'output': str(call.error), 'status': 'ERROR'}
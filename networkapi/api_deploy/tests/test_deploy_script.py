@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+import json
+import threading
+import unittest
+
+from mock import patch
+from rest_framework.test import APIClient
+
+from networkapi.api_deploy import facade
+from networkapi.api_deploy.permissions import DeployConfig
+from networkapi.test.test_case import NetworkApiTestCase
+from networkapi.usuario.models import Usuario
+
+
+class DeployScriptInEquipmentsTestCase(unittest.TestCase):
+
+    def setUp(self):
+        for target in ('networkapi.api_deploy.facade.get_variable',
+                       'networkapi.plugins.fanout.get_variable'):
+            patch(target, side_effect=lambda name, default: default).start()
+        equipment = patch('networkapi.api_deploy.facade.Equipamento').start()
+        equipment.objects.filter.return_value.values_list.return_value = \
+            [(1, 'Cisco'), (2, 'Cisco')]
+        self.addCleanup(patch.stopall)
+        self.started = dict((i, threading.Event()) for i in (1, 2))
+
+    def deploy(self, rel_filename, equipment_id, lockvar):
+        self.started[equipment_id].set()
+        if equipment_id == 2:
+            raise Exception('Invalid input')
+        return 'output of %s' % equipment_id
+
+    def test_results_by_equipment(self):
+        with patch.object(facade, 'deploy_config_in_equipment_synchronous',
+                          side_effect=self.deploy):
+            results = dict(facade.deploy_script_in_equipments(
+                'script', [1, 2]))
+
+        self.assertEqual(results, {
+            1: {'output': 'output of 1', 'status': 'OK'},
+            2: {'output': 'Invalid input', 'status': 'ERROR'}})
+
+    def test_equipments_start_before_results_are_read(self):
+        with patch.object(facade, 'deploy_config_in_equipment_synchronous',
+                          side_effect=self.deploy):
+            results = facade.deploy_script_in_equipments('script', [1, 2])
+
+            self.assertTrue(self.started[1].wait(5))
+            self.assertTrue(self.started[2].wait(5))
+            self.assertEqual(len(list(results)), 2)
+
+
+class DeployScriptViewTestCase(NetworkApiTestCase):
+
+    fixtures = [
+        'networkapi/system/fixtures/initial_variables.json',
+        'networkapi/usuario/fixtures/initial_usuario.json',
+        'networkapi/grupo/fixtures/initial_ugrupo.json',
+        'networkapi/usuario/fixtures/initial_usuariogrupo.json',
+    ]
+    url = '/api/deploy/sync/copy_script_to_equipments/'
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(
+            user=Usuario.objects.get(user='test'))
+        patch.object(DeployConfig, 'has_permission',
+                     return_value=True).start()
+        patch('networkapi.api_deploy.views.facade.create_file_from_script',
+              return_value='script').start()
+        self.deploy = patch(
+            'networkapi.api_deploy.views.facade.deploy_script_in_equipments',
+            return_value=iter([
+                (2, {'output': 'Invalid input', 'status': 'ERROR'}),
+                (1, {'output': 'ok', 'status': 'OK'})])).start()
+        self.addCleanup(patch.stopall)
+
+    def put(self, url):
+        return self.client.put(
+            url, {'script_data': 'show run', 'id_equips': ['1', '2']},
+            format='json')
+
+    def test_results_of_all_equipments(self):
+        response = self.put(self.url)
+
+        self.compare_status(200, response.status_code)
+        self.assertEqual(json.loads(response.content), {
+            '1': {'output': 'ok', 'status': 'OK'},
+            '2': {'output': 'Invalid input', 'status': 'ERROR'}})
+        self.deploy.assert_called_once_with('script', [1, 2])
+
+    def test_results_streamed_as_equipments_finish(self):
+        response = self.put(self.url + '?stream=1')
+
+        self.compare_status(200, response.status_code)
+        self.assertEqual('application/x-ndjson', response['Content-Type'])
+        self.deploy.assert_called_once_with('script', [1, 2])
+        lines = ''.join(response.streaming_content).splitlines()
+        self.assertEqual([json.loads(line) for line in lines], [
+            {'2': {'output': 'Invalid input', 'status': 'ERROR'}},
+            {'1': {'output': 'ok', 'status': 'OK'}}])
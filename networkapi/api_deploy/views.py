@@ -13,9 +13,12 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import json
 import logging
 import time
 
+from django.http import StreamingHttpResponse
+
 from rest_framework.decorators import api_view
 from rest_framework.decorators import permission_classes
 from rest_framework.permissions import IsAuthenticated
@@ -91,36 +94,30 @@ def deploy_sync_copy_script_to_multiple_equipments(request):
     Default destination: apply config (running-config)
     Default protocol: tftp
     Receives script
+    All equipments receive script at the same time. With stream=1, result
+    of each equipment is sent as a line of JSON as soon as it finishes.
     """
 
     try:
         script = request.DATA['script_data']
-        id_equips = request.DATA['id_equips']
+        id_equips = [int(id_equip) for id_equip in request.DATA['id_equips']]
 
         # Check equipment permissions
         for id_equip in id_equips:
             # TODO
             pass
 
-        output_data = dict()
-
         script_file = facade.create_file_from_script(
             script, USER_SCRIPTS_REL_PATH)
-        for id_equip in id_equips:
-            equipment_id = int(id_equip)
-            lockvar = LOCK_EQUIPMENT_DEPLOY_CONFIG_USERSCRIPT % (equipment_id)
-            output_data[equipment_id] = dict()
-            try:
-                output_data[equipment_id]['output'] = facade.deploy_config_in_equipment_synchronous(
-                    script_file, equipment_id, lockvar)
-                output_data[equipment_id]['status'] = 'OK'
-            except Exception, e:
-                log.error('Error applying script file to equipment_id %s: %s' % (
-                    equipment_id, e))
-                output_data[equipment_id]['output'] = str(e)
-                output_data[equipment_id]['status'] = 'ERROR'
+        results = facade.deploy_script_in_equipments(script_file, id_equips)
+
+        if request.QUERY_PARAMS.get('stream') == '1':
+            return StreamingHttpResponse(
+                (json.dumps({equipment_id: result}) + '\n'
+                 for equipment_id, result in results),
+                content_type='application/x-ndjson')
 
-        return Response(output_data)
+        return Response(dict(results))
     except KeyError, key:
         log.error(key)
         raise exceptions.InvalidKeyException(key)
@@ -24,7 +24,9 @@ from networkapi.api_equipment import facade
 from networkapi.api_equipment.permissions import Read
 from networkapi.api_equipment.permissions import Write
 from networkapi.settings import SPECS
+from networkapi.util.appcache import EQUIPMENT_CACHE_ENTRY
 from networkapi.util.classes import CustomAPIView
+from networkapi.util.decorators import cached_search
 from networkapi.util.decorators import logs_method_apiview
 from networkapi.util.decorators import permission_classes_apiview
 from networkapi.util.decorators import prepare_search
@@ -45,6 +47,7 @@ class EquipmentView(CustomAPIView):
     @raise_json_validate('')
     @permission_classes_apiview((IsAuthenticated, Read))
     @prepare_search
+    @cached_search(EQUIPMENT_CACHE_ENTRY)
     def get(self, request, *args, **kwargs):
         """
         Return list of equipments
@@ -20,7 +20,6 @@ import re
 from django.core.exceptions import FieldError
 from django.core.exceptions import ObjectDoesNotExist
 from django.template import Context
-from django.template import Template
 
 from networkapi.api_deploy.facade import deploy_config_in_equipment_synchronous
 from networkapi.api_interface import exceptions
@@ -43,6 +42,7 @@ from networkapi.interface import models
 from networkapi.system import exceptions as var_exceptions
 from networkapi.system.facade import get_value as get_variable
 from networkapi.util import is_valid_int_greater_zero_param
+from networkapi.util.templatecache import get_template
 
 
 log = logging.getLogger(__name__)
@@ -313,16 +313,18 @@ def generate_delete_file(user, equip_id, interface_list, channel):
 
     key_dict['PORTCHANNEL_NAME'] = channel.nome
 
+    try:
+        interface_template_file = _load_template_file(
+            int(equip_id), TEMPLATE_REMOVE_INTERFACE)
+    except exceptions.InterfaceTemplateException, e:
+        log.error(e)
+        raise exceptions.InterfaceTemplateException()
+
     for i in interface_list:
         key_dict['INTERFACE_NAME'] = i.interface
         try:
-            interface_template_file = _load_template_file(
-                int(equip_id), TEMPLATE_REMOVE_INTERFACE)
             config_to_be_saved += interface_template_file.render(
                 Context(key_dict))
-        except exceptions.InterfaceTemplateException, e:
-            log.error(e)
-            raise exceptions.InterfaceTemplateException()
         except KeyError, exception:
             log.error('Erro: %s ' % exception)
             raise exceptions.InvalidKeyException(exception)
@@ -454,6 +456,7 @@ def _generate_config_file(interfaces_list):
     rel_file_to_deploy = INTERFACE_CONFIG_TOAPPLY_REL_PATH + filename_out
 
     int_template_file = _load_template_file(equipment_id, TEMPLATE_TYPE_INT)
+    channel_template_file = None
     channels_configured = {}
 
     for interface in interfaces_list:
@@ -465,8 +468,9 @@ def _generate_config_file(interfaces_list):
             if interface.channel is not None:
                 if interface.channel.id is not None and \
                         interface.channel.id not in channels_configured.keys():
-                    channel_template_file = _load_template_file(
-                        equipment_id, TEMPLATE_TYPE_CHANNEL)
+                    if channel_template_file is None:
+                        channel_template_file = _load_template_file(
+                            equipment_id, TEMPLATE_TYPE_CHANNEL)
                     config_to_be_saved += channel_template_file.render(
                         Context(key_dict))
                     channels_configured[interface.channel.id] = 1
@@ -511,11 +515,9 @@ def _load_template_file(equipment_id, template_type):
     filename_in = INTERFACE_CONFIG_TEMPLATE_PATH + \
         equipment_template.roteiro.roteiro
 
-    # Read contents from file
+    # Compiled template, read again only when file changes
     try:
-        file_handle = open(filename_in, 'r')
-        template_file = Template(file_handle.read())
-        file_handle.close()
+        template_file = get_template(filename_in)
     except IOError, e:
         log.error('Error opening template file for read: %s. Equip: %s' %
                   (filename_in, equipment_id))
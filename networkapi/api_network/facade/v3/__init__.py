@@ -14,6 +14,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 from .networkv4 import create_networkipv4
+from .networkv4 import create_networkipv4_batch
 from .networkv4 import delete_networkipv4
 from .networkv4 import deploy_networkipv4
 from .networkv4 import get_networkipv4_by_id
@@ -22,6 +23,7 @@ from .networkv4 import get_networkipv4_by_search
 from .networkv4 import undeploy_networkipv4
 from .networkv4 import update_networkipv4
 from .networkv6 import create_networkipv6
+from .networkv6 import create_networkipv6_batch
 from .networkv6 import delete_networkipv6
 from .networkv6 import deploy_networkipv6
 from .networkv6 import get_networkipv6_by_id
@@ -33,7 +35,8 @@ from .networkv6 import update_networkipv6
 __all__ = (
     'get_networkipv4_by_id', 'get_networkipv4_by_ids',
     'get_networkipv4_by_search', 'create_networkipv4',
-    'update_networkipv4', 'delete_networkipv4', 'undeploy_networkipv4',
-    'deploy_networkipv4', 'get_networkipv6_by_id', 'get_networkipv6_by_ids',
-    'get_networkipv6_by_search', 'create_networkipv6', 'update_networkipv6',
+    'create_networkipv4_batch', 'update_networkipv4', 'delete_networkipv4',
+    'undeploy_networkipv4', 'deploy_networkipv4', 'get_networkipv6_by_id',
+    'get_networkipv6_by_ids', 'get_networkipv6_by_search',
+    'create_networkipv6', 'create_networkipv6_batch', 'update_networkipv6',
     'delete_networkipv6', 'undeploy_networkipv6', 'deploy_networkipv6')
@@ -4,7 +4,6 @@ import logging
 from django.core.exceptions import FieldError
 from django.core.exceptions import ObjectDoesNotExist
 
-from networkapi.api_deploy.facade import deploy_config_in_equipment
 from networkapi.api_equipment import exceptions as exceptions_eqpt
 from networkapi.api_equipment import facade as facade_eqpt
 from networkapi.api_network import exceptions
@@ -104,6 +103,29 @@ def create_networkipv6(networkv6, user=None, force=False):
         return netv6_obj
 
 
+def create_networkipv6_batch(networks, user=None, force=False):
+    """Creates a list of NetworkIPv6 computing free space once."""
+
+    try:
+        netv6_objs = ip_models.NetworkIPv6.create_many_v3(networks,
+                                                          force=force)
+
+    except ip_models.NetworkIPv6ErrorV3, e:
+        raise ValidationAPIException(e.message)
+
+    except exceptions.InvalidInputException, e:
+        raise ValidationAPIException(e.detail)
+
+    except ValidationAPIException, e:
+        raise ValidationAPIException(e.detail)
+
+    except Exception, e:
+        raise NetworkAPIException(str(e))
+
+    else:
+        return netv6_objs
+
+
 def update_networkipv6(networkv6, user, force=False):
     """Updates a NetworkIPv6."""
 
@@ -217,17 +239,10 @@ def undeploy_networkipv6(network_id, user):
         dict_ips = get_dict_v6_to_use_in_configuration_deploy(
             user, netv6_obj, routers)
 
-        status_deploy = dict()
-
-        # TODO implement threads
-        for equipment in routers:
-            # generate config file
-            file_to_deploy = utils.generate_config_file(
-                dict_ips, equipment, TEMPLATE_NETWORKv6_DEACTIVATE)
-
-            # deploy config file in equipments
-            status_deploy[equipment.id] = \
-                deploy_config_in_equipment(file_to_deploy, equipment)
+        # apply config in all routers, rolling back when any fails
+        status_deploy = utils.deploy_config_in_routers(
+            dict_ips, routers, TEMPLATE_NETWORKv6_DEACTIVATE,
+            TEMPLATE_NETWORKv6_ACTIVATE)
 
         netv6_obj.deactivate_v3()
 
@@ -238,11 +253,10 @@ def undeploy_networkipv6(network_id, user):
             if not utils.has_active_network_in_vlan(netv6_obj.vlan):
 
                 # remove int vlan
-                for equipment in routers:
-                    if equipment.maintenance is not True:
-                        status_deploy[
-                            equipment.id] += utils.remove_svi(
-                                equipment, netv6_obj.vlan.num_vlan)
+                svi_outputs = utils.remove_svi_in_routers(
+                    routers, netv6_obj.vlan.num_vlan)
+                for equipment_id, output in svi_outputs.items():
+                    status_deploy[equipment_id] += output
 
                 netv6_obj.vlan.deactivate_v3(locks_name)
 
@@ -341,17 +355,10 @@ def deploy_networkipv6(network_id, user):
         dict_ips = get_dict_v6_to_use_in_configuration_deploy(
             user, netv6_obj, routers)
 
-        status_deploy = dict()
-
-        # TODO implement threads
-        for equipment in routers:
-
-            # generate config file
-            file_to_deploy = utils.generate_config_file(
-                dict_ips, equipment, TEMPLATE_NETWORKv6_ACTIVATE)
-
-            status_deploy[equipment.id] = \
-                deploy_config_in_equipment(file_to_deploy, equipment)
+        # apply config in all routers, rolling back when any fails
+        status_deploy = utils.deploy_config_in_routers(
+            dict_ips, routers, TEMPLATE_NETWORKv6_ACTIVATE,
+            TEMPLATE_NETWORKv6_DEACTIVATE)
 
         netv6_obj.activate_v3()
 
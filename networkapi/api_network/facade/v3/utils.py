@@ -3,20 +3,22 @@ import logging
 
 from django.core.exceptions import ObjectDoesNotExist
 from django.template import Context
-from django.template import Template
 
+from networkapi.api_deploy.facade import deploy_config_in_equipment
 from networkapi.api_network import exceptions
 from networkapi.ip.models import Ip
 from networkapi.ip.models import IpEquipamento
 from networkapi.equipamento import models as eqpt_models
 from networkapi.extra_logging import local
 from networkapi.extra_logging import NO_REQUEST_ID
+from networkapi.plugins import fanout
 from networkapi.plugins.factory import PluginFactory
 from networkapi.settings import NETWORK_CONFIG_FILES_PATH
 from networkapi.settings import NETWORK_CONFIG_TEMPLATE_PATH
 from networkapi.settings import NETWORK_CONFIG_TOAPPLY_REL_PATH
 from networkapi.system.facade import get_value as get_variable
 from networkapi.system import exceptions as var_exceptions
+from networkapi.util.templatecache import get_template
 
 log = logging.getLogger(__name__)
 
@@ -38,7 +40,9 @@ def generate_config_file(dict_ips, equipment, template_type):
     config_to_be_saved = ''
     request_id = getattr(local, 'request_id', NO_REQUEST_ID)
 
-    filename_out = 'network_equip%s_config_%s' % (equipment.id, request_id)
+    # Activate and rollback files of a router are written in the same request
+    filename_out = 'network_equip%s_%s_config_%s' % (
+        equipment.id, template_type, request_id)
 
     filename_to_save = NETWORK_CONFIG_FILES_PATH + filename_out
     rel_file_to_deploy = NETWORK_CONFIG_TOAPPLY_REL_PATH + filename_out
@@ -63,6 +67,37 @@ def generate_config_file(dict_ips, equipment, template_type):
     return rel_file_to_deploy
 
 
+def deploy_config_in_routers(dict_ips, routers, template_type,
+                             rollback_template_type):
+    """Renders template of all routers and applies them at the same time.
+
+    When any router fails or times out, the rollback template is applied in
+    routers that succeeded and the error is raised, so network is only
+    activated (or deactivated) when all routers were configured.
+
+    Returns: dict with output of each router by equipment id
+    """
+
+    # Rendering queries templates and tunnel ips, so it is done before
+    # fanout and workers only apply the files
+    files = [(equipment,
+              generate_config_file(dict_ips, equipment, template_type),
+              generate_config_file(dict_ips, equipment,
+                                   rollback_template_type))
+             for equipment in routers]
+
+    outputs = fanout.run([fanout.PluginCall(
+        equipment.nome,
+        deploy_config_in_equipment,
+        (file_to_deploy, equipment),
+        rollback=deploy_config_in_equipment,
+        rollback_args=(rollback_file, equipment)
+    ) for equipment, file_to_deploy, rollback_file in files])
+
+    return dict((equipment.id, output)
+                for equipment, output in zip(routers, outputs))
+
+
 def load_template_file(equipment, template_type):
     """Load template file with specific type related to equipment.
 
@@ -82,11 +117,9 @@ def load_template_file(equipment, template_type):
     filename_in = NETWORK_CONFIG_TEMPLATE_PATH + \
         '/' + equipment_template.roteiro.roteiro
 
-    # Read contents from file
+    # Compiled template, read again only when file changes
     try:
-        file_handle = open(filename_in, 'r')
-        template_file = Template(file_handle.read())
-        file_handle.close()
+        template_file = get_template(filename_in)
     except IOError, e:
         log.error('Error opening template file for read: %s' % filename_in)
         raise Exception(e)
@@ -162,12 +195,33 @@ def remove_svi(equipment, vlan_num):
 
     equip_plugin = PluginFactory.factory(equipment)
     equip_plugin.connect()
-    output = equip_plugin.remove_svi(vlan_num)
-    equip_plugin.close()
+    try:
+        output = equip_plugin.remove_svi(vlan_num)
+    except BaseException:
+        equip_plugin.discard_session()
+        raise
+    finally:
+        equip_plugin.close()
 
     return output
 
 
+def remove_svi_in_routers(routers, vlan_num):
+    """Removes SVI of vlan in all routers not in maintenance at the same time.
+
+    Returns: dict with output of each router by equipment id
+    """
+
+    routers = [equipment for equipment in routers
+               if equipment.maintenance is not True]
+    outputs = fanout.run([fanout.PluginCall(
+        equipment.nome, remove_svi, (equipment, vlan_num)
+    ) for equipment in routers])
+
+    return dict((equipment.id, output)
+                for equipment, output in zip(routers, outputs))
+
+
 def get_local_tunnel_ip(equipment):
 
     try:
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import unittest
+
+from mock import MagicMock
+from mock import patch
+
+from networkapi.api_network.facade.v3 import create_networkipv4_batch
+from networkapi.api_network.facade.v3 import create_networkipv6_batch
+from networkapi.api_rest.exceptions import NetworkAPIException
+from networkapi.api_rest.exceptions import ValidationAPIException
+from networkapi.infrastructure.ipaddr import IPNetwork
+from networkapi.ip.models import NetworkIPv4
+from networkapi.ip.models import NetworkIPv4AddressNotAvailableError
+from networkapi.ip.models import NetworkIPv4ErrorV3
+from networkapi.ip.models import NetworkIPv6
+from networkapi.util.freespace import FreeSpace
+
+
+def fake_vlan(vlan_id, key, used_nets, version=4):
+    vlan = MagicMock()
+    vlan.id = vlan_id
+    vlan.get_environment_related.return_value.values_list.return_value = \
+        [vlan_id]
+    vlan.get_free_space_key.return_value = key
+    vlan.get_free_space.side_effect = lambda ip_version: FreeSpace(
+        [IPNetwork(net) for net in used_nets], version)
+    return vlan
+
+
+def create_networkv4(self, networkv4, locks_used=[], force=False,
+                     free_space=None):
+    subnet = free_space.first_free_subnet(IPNetwork('10.0.0.0/24'), 26)
+    if subnet is None:
+        raise NetworkIPv4AddressNotAvailableError(
+            None, u'Unavailable address to create a NetworkIPv4.')
+    free_space.allocate(subnet)
+    self.oct1, self.oct2, self.oct3, self.oct4 = \
+        str(subnet.network).split('.')
+    self.block = subnet.prefixlen
+
+
+def create_networkv6(self, networkv6, locks_used=[], force=False,
+                     free_space=None):
+    subnet = free_space.first_free_subnet(IPNetwork('fdbe::/56'), 64)
+    free_space.allocate(subnet)
+    self.block1, self.block2, self.block3, self.block4, self.block5, \
+        self.block6, self.block7, self.block8 = \
+        str(subnet.network.exploded).split(':')
+    self.block = subnet.prefixlen
+
+
+class NetworkCreateManyTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.vlans = dict()
+        vlan_app = MagicMock()
+        vlan_app.Vlan.return_value.get_by_pk.side_effect = \
+            lambda vlan_id: self.vlans[vlan_id]
+        patch('networkapi.ip.models.get_app', return_value=vlan_app).start()
+        self.create_lock = patch(
+            'networkapi.ip.models.create_lock_with_blocking',
+            return_value=['lock']).start()
+        self.destroy_lock = patch(
+            'networkapi.ip.models.destroy_lock').start()
+        patch.object(NetworkIPv4, 'create_v3', autospec=True,
+                     side_effect=create_networkv4).start()
+        patch.object(NetworkIPv6, 'create_v3', autospec=True,
+                     side_effect=create_networkv6).start()
+
+    def tearDown(self):
+        patch.stopall()
+
+    def test_create_many_v4_computes_free_space_once_by_key(self):
+        self.vlans[1] = fake_vlan(1, ((), (1,)), ['10.0.0.0/26'])
+        self.vlans[2] = fake_vlan(2, ((), (1,)), ['10.0.0.0/26'])
+
+        netv4_objs = NetworkIPv4.create_many_v3(
+            [{'vlan': 1}, {'vlan': 2}, {'vlan': 1}])
+
+        self.assertEqual(
+            [net.networkv4 for net in netv4_objs],
+            ['10.0.0.64/26', '10.0.0.128/26', '10.0.0.192/26'])
+        self.assertEqual(self.vlans[1].get_free_space.call_count +
+                         self.vlans[2].get_free_space.call_count, 1)
+
+    def test_create_many_v4_shares_allocated_networks_between_keys(self):
+        self.vlans[1] = fake_vlan(1, ((), (1,)), [])
+        self.vlans[2] = fake_vlan(2, ((), (2,)), [])
+
+        netv4_objs = NetworkIPv4.create_many_v3([{'vlan': 1}, {'vlan': 2}])
+
+        self.assertEqual([net.networkv4 for net in netv4_objs],
+                         ['10.0.0.0/26', '10.0.0.64/26'])
+
+    def test_create_many_v4_takes_locks_once_and_releases_them(self):
+        self.vlans[1] = fake_vlan(1, ((), (1,)), [])
+        self.vlans[2] = fake_vlan(2, ((), (2,)), [])
+
+        NetworkIPv4.create_many_v3([{'vlan': 1}, {'vlan': 2}, {'vlan': 2}])
+
+        self.assertEqual(self.create_lock.call_count, 1)
+        self.assertEqual(sorted(self.create_lock.call_args[0][0]),
+                         ['environment_allocates:1',
+                          'environment_allocates:2'])
+        self.destroy_lock.assert_called_once_with(['lock'])
+
+    def test_create_many_v4_releases_locks_when_allocation_fails(self):
+        self.vlans[1] = fake_vlan(1, ((), (1,)), ['10.0.0.0/24'])
+
+        self.assertRaises(NetworkIPv4AddressNotAvailableError,
+                          NetworkIPv4.create_many_v3,
+                          [{'vlan': 1}])
+        self.destroy_lock.assert_called_once_with(['lock'])
+
+    def test_create_many_v6_computes_free_space_once_by_key(self):
+        self.vlans[1] = fake_vlan(1, ((), (1,)), ['fdbe::/64'], 6)
+        self.vlans[2] = fake_vlan(2, ((), (1,)), ['fdbe::/64'], 6)
+
+        netv6_objs = NetworkIPv6.create_many_v3([{'vlan': 1}, {'vlan': 2}])
+
+        self.assertEqual(
+            [net.networkv6 for net in netv6_objs],
+            ['fdbe:0000:0000:0001:0000:0000:0000:0000/64',
+             'fdbe:0000:0000:0002:0000:0000:0000:0000/64'])
+        self.assertEqual(self.vlans[1].get_free_space.call_count +
+                         self.vlans[2].get_free_space.call_count, 1)
+
+
+class NetworkCreateBatchFacadeTestCase(unittest.TestCase):
+
+    def tearDown(self):
+        patch.stopall()
+
+    def test_create_networkipv4_batch_returns_networks(self):
+        networks = [NetworkIPv4(), NetworkIPv4()]
+        create_many = patch.object(NetworkIPv4, 'create_many_v3',
+                                   return_value=networks).start()
+
+        self.assertEqual(create_networkipv4_batch([{'vlan': 1}], force=True),
+                         networks)
+        create_many.assert_called_once_with([{'vlan': 1}], force=True)
+
+    def test_create_networkipv4_batch_given_invalid_network(self):
+        patch.object(NetworkIPv4, 'create_many_v3',
+                     side_effect=NetworkIPv4ErrorV3('Invalid')).start()
+
+        self.assertRaises(ValidationAPIException, create_networkipv4_batch,
+                          [{'vlan': 1}])
+
+    def test_create_networkipv6_batch_returns_networks(self):
+        networks = [NetworkIPv6()]
+        patch.object(NetworkIPv6, 'create_many_v3',
+                     return_value=networks).start()
+
+        self.assertEqual(create_networkipv6_batch([{'vlan': 1}]), networks)
+
+    def test_create_networkipv6_batch_given_unexpected_error(self):
+        patch.object(NetworkIPv6, 'create_many_v3',
+                     side_effect=Exception('Error')).start()
+
+        self.assertRaises(NetworkAPIException, create_networkipv6_batch,
+                          [{'vlan': 1}])
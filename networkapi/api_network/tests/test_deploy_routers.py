@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+import unittest
+
+from mock import Mock
+from mock import patch
+
+from networkapi.api_network.facade.v3 import utils
+from networkapi.plugins import exceptions
+from networkapi.equipamento.models import Equipamento
+
+
+class DeployConfigInRoutersTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.get_variable = patch(
+            'networkapi.plugins.fanout.get_variable',
+            side_effect=lambda name, default: default).start()
+        self.addCleanup(patch.stopall)
+        self.routers = [Equipamento(id=1, nome='router-1'),
+                        Equipamento(id=2, nome='router-2')]
+
+    def patch_deploy(self, deploy):
+        patch('networkapi.api_network.facade.v3.utils.generate_config_file',
+              side_effect=lambda dict_ips, equipment, template:
+              (equipment.id, template)).start()
+        return patch.object(utils, 'deploy_config_in_equipment',
+                            side_effect=deploy).start()
+
+    def test_returns_output_by_router(self):
+        self.patch_deploy(lambda file_to_deploy, equipment:
+                          '%s %s' % (equipment.nome, file_to_deploy[1]))
+
+        status_deploy = utils.deploy_config_in_routers(
+            {}, self.routers, 'activate', 'deactivate')
+
+        self.assertEqual(status_deploy, {1: 'router-1 activate',
+                                         2: 'router-2 activate'})
+
+    def test_nothing_is_applied_when_render_fails(self):
+        deploy = self.patch_deploy(None)
+        utils.generate_config_file.side_effect = \
+            Exception('Template not found')
+
+        self.assertRaises(Exception, utils.deploy_config_in_routers,
+                          {}, self.routers, 'activate', 'deactivate')
+        self.assertFalse(deploy.called)
+
+    def test_rolls_back_routers_when_one_fails(self):
+        applied = list()
+
+        def deploy(file_to_deploy, equipment):
+            if file_to_deploy == (2, 'activate'):
+                raise Exception('Error applying config')
+            applied.append(file_to_deploy)
+
+        self.patch_deploy(deploy)
+
+        self.assertRaises(Exception, utils.deploy_config_in_routers,
+                          {}, self.routers, 'activate', 'deactivate')
+        self.assertEqual(sorted(applied),
+                         [(1, 'activate'), (1, 'deactivate')])
+
+    def test_rolls_back_router_that_times_out(self):
+        self.get_variable.side_effect = lambda name, default: \
+            1 if name == 'plugin_call_timeout' else default
+        event = threading.Event()
+        applied = list()
+
+        def deploy(file_to_deploy, equipment):
+            if file_to_deploy == (2, 'activate'):
+                event.wait(5)
+            applied.append(file_to_deploy)
+
+        self.patch_deploy(deploy)
+
+        self.assertRaises(exceptions.CommandErrorException,
+                          utils.deploy_config_in_routers,
+                          {}, self.routers, 'activate', 'deactivate')
+        self.assertEqual(sorted(applied),
+                         [(1, 'activate'), (1, 'deactivate')])
+
+        # Router that timed out is rolled back once it finishes
+        event.set()
+        deadline = time.time() + 5
+        while len(applied) < 4 and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(sorted(applied),
+                         [(1, 'activate'), (1, 'deactivate'),
+                          (2, 'activate'), (2, 'deactivate')])
+
+
+class RemoveSviTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.plugin = Mock()
+        patch('networkapi.api_network.facade.v3.utils.PluginFactory.factory',
+              return_value=self.plugin).start()
+        self.addCleanup(patch.stopall)
+        self.router = Equipamento(id=1, nome='router-1')
+
+    def test_session_is_released_after_remove(self):
+        self.plugin.remove_svi.return_value = 'ok'
+
+        self.assertEqual('ok', utils.remove_svi(self.router, 10))
+        self.plugin.close.assert_called_once_with()
+        self.assertFalse(self.plugin.discard_session.called)
+
+    def test_session_is_discarded_when_remove_fails(self):
+        self.plugin.remove_svi.side_effect = Exception('Invalid input')
+
+        self.assertRaises(Exception, utils.remove_svi, self.router, 10)
+        self.plugin.discard_session.assert_called_once_with()
+        self.plugin.close.assert_called_once_with()
@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
 from django.test.client import Client
 
+from networkapi.api_network.serializers.v3 import NetworkIPv4V3Serializer
+from networkapi.ip.models import NetworkIPv4
 from networkapi.test.test_case import NetworkApiTestCase
 from networkapi.util.geral import prepare_url
 
@@ -222,6 +224,29 @@ class NetworkIPv4GetSuccessTestCase(NetworkApiTestCase):
         self.compare_status(200, response.status_code)
         self.compare_json_lists(name_file, response.data['networks'])
 
+    def test_serialize_netipv4_with_constant_queries(self):
+        """Test that serializing Network IPv4 with nested vlan does not
+        make queries by row."""
+
+        def serialize(ids):
+            networks = NetworkIPv4.objects.filter(id__in=ids)
+            serializer = NetworkIPv4V3Serializer(
+                networks,
+                many=True,
+                fields=('id', 'vlan__basic', 'network_type__details')
+            )
+            return serializer.data
+
+        ids = list(NetworkIPv4.objects.values_list('id', flat=True))
+
+        one_queries, data = self.count_queries(serialize, ids[:1])
+        self.compare_values(1, len(data))
+
+        all_queries, data = self.count_queries(serialize, ids)
+        self.compare_values(len(ids), len(data))
+
+        self.compare_values(one_queries, all_queries)
+
 
 class NetworkIPv4GetErrorTestCase(NetworkApiTestCase):
 
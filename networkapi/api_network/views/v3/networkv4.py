@@ -12,7 +12,9 @@ from networkapi.api_network import tasks
 from networkapi.api_network.facade import v3 as facade
 from networkapi.api_network.serializers import v3 as serializers
 from networkapi.settings import SPECS
+from networkapi.util.appcache import NETWORKV4_CACHE_ENTRY
 from networkapi.util.classes import CustomAPIView
+from networkapi.util.decorators import cached_search
 from networkapi.util.decorators import logs_method_apiview
 from networkapi.util.decorators import permission_classes_apiview
 from networkapi.util.decorators import permission_obj_apiview
@@ -30,6 +32,7 @@ class NetworkIPv4View(CustomAPIView):
     @raise_json_validate()
     @permission_classes_apiview((IsAuthenticated, permissions.Read))
     @prepare_search
+    @cached_search(NETWORKV4_CACHE_ENTRY)
     def get(self, request, *args, **kwargs):
         """Returns a list of networkv4 by ids ou dict."""
 
@@ -76,10 +79,9 @@ class NetworkIPv4View(CustomAPIView):
 
         json_validate(SPECS.get('networkv4_post')).validate(data)
 
-        response = list()
-        for networkv4 in data['networks']:
-            vl = facade.create_networkipv4(networkv4, request.user)
-            response.append({'id': vl.id})
+        networks = facade.create_networkipv4_batch(data['networks'],
+                                                   request.user)
+        response = [{'id': vl.id} for vl in networks]
 
         return Response(response, status=status.HTTP_201_CREATED)
 
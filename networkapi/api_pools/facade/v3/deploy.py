@@ -3,7 +3,6 @@ import copy
 import logging
 
 import json_delta
-from django.db.models import Q
 from django.db.transaction import commit_on_success
 
 from networkapi.api_equipment import exceptions as exceptions_eqpt
@@ -14,9 +13,12 @@ from networkapi.api_pools.serializers import v3 as serializers
 from networkapi.api_vip_request.serializers import v3 as serializers_vip
 from networkapi.equipamento.models import Equipamento
 from networkapi.equipamento.models import EquipamentoAcesso
+from networkapi.models.models_signal_receiver import invalidate_searches
+from networkapi.plugins import fanout
 from networkapi.plugins.factory import PluginFactory
 from networkapi.requisicaovips.models import ServerPool
 from networkapi.requisicaovips.models import ServerPoolMember
+from networkapi.util.geral import get_app
 
 log = logging.getLogger(__name__)
 
@@ -29,9 +31,13 @@ def _prepare_apply(pools, created=False, user=None):
     load_balance = dict()
     keys = list()
 
+    equips_by_pool = _validate_pools_to_apply(pools, user=user)
+    vips_by_pool = _get_vips_related_by_pools(
+        [pool['id'] for pool in pools])
+
     for pool in pools:
 
-        equips = _validate_pool_members_to_apply(pool, user)
+        equips = equips_by_pool[pool['id']]
 
         keys.append(sorted([str(eqpt.id) for eqpt in equips]))
 
@@ -43,41 +49,22 @@ def _prepare_apply(pools, created=False, user=None):
         for e in equips:
 
             eqpt_id = str(e.id)
-            equipment_access = EquipamentoAcesso.search(
-                equipamento=e.id
-            )
-
-            plugin = PluginFactory.factory(e)
 
             if not load_balance.get(eqpt_id):
 
                 load_balance[eqpt_id] = {
-                    'plugin': plugin,
-                    'access': equipment_access,
+                    'plugin': PluginFactory.factory(e),
+                    'access': EquipamentoAcesso.search(equipamento=e.id),
                     'pools': [],
                 }
 
-            vips_requests = ServerPool().get_vips_related(pool['id'])
-
-            serializer_vips = serializers_vip.VipRequestV3Serializer(
-                vips_requests,
-                many=True,
-                include=(
-                    'ipv4__details',
-                    'ipv6__details',
-                    'ports__identifier',
-                    'ports__pools__server_pool__basic__lb_method',
-                )
-            )
-            vips = serializer_vips.data
-
             load_balance[eqpt_id]['pools'].append({
                 'id': pool['id'],
                 'nome': pool['identifier'],
                 'lb_method': pool['lb_method'],
                 'healthcheck': healthcheck,
                 'action': pool['servicedownaction']['name'],
-                'vips': vips,
+                'vips': vips_by_pool[pool['id']],
                 'pools_members': [{
                     'id': pool_member['id'],
                     'identifier': pool_member['identifier'],
@@ -100,17 +87,64 @@ def _prepare_apply(pools, created=False, user=None):
     return load_balance
 
 
+def _get_vips_related_by_pools(pool_ids):
+    """Returns serialized vips related to each pool.
+
+    Each vip is serialized once, even when it is related to many pools.
+    """
+
+    vip_models = get_app('api_vip_request', 'models')
+
+    relations = vip_models.VipRequestPortPool.objects.filter(
+        server_pool__id__in=pool_ids
+    ).values_list('server_pool', 'vip_request_port__vip_request')
+
+    vip_ids_by_pool = dict((pool_id, list()) for pool_id in pool_ids)
+    for pool_id, vip_id in relations:
+        if vip_id not in vip_ids_by_pool[pool_id]:
+            vip_ids_by_pool[pool_id].append(vip_id)
+
+    vip_ids = set(vip_id for vip_ids in vip_ids_by_pool.values()
+                  for vip_id in vip_ids)
+    vips = dict()
+    if vip_ids:
+        vips_requests = vip_models.VipRequest.objects.filter(
+            id__in=vip_ids)
+
+        serializer_vips = serializers_vip.VipRequestV3Serializer(
+            vips_requests,
+            many=True,
+            include=(
+                'ipv4__details',
+                'ipv6__details',
+                'ports__identifier',
+                'ports__pools__server_pool__basic__lb_method',
+            )
+        )
+        vips = dict((vip['id'], vip) for vip in serializer_vips.data)
+
+    return dict((pool_id, [vips[vip_id] for vip_id in sorted(vip_ids)])
+                for pool_id, vip_ids in vip_ids_by_pool.items())
+
+
 @commit_on_success
 def create_real_pool(pools, user):
     """Create real pool in eqpt."""
 
     load_balance = _prepare_apply(pools=pools, created=False, user=user)
 
-    for lb in load_balance:
-        load_balance[lb]['plugin'].create_pool(load_balance[lb])
+    fanout.run([fanout.PluginCall(
+        lb,
+        load_balance[lb]['plugin'].create_pool,
+        (load_balance[lb],),
+        rollback=load_balance[lb]['plugin'].delete_pool,
+        rollback_args=(copy.deepcopy(load_balance[lb]), False)
+    ) for lb in load_balance])
 
     ids = [pool['id'] for pool in pools]
     ServerPool.objects.filter(id__in=ids).update(pool_created=True)
+    # QuerySet.update sends no signals
+    invalidate_searches()
 
     return {}
 
@@ -122,13 +156,15 @@ def delete_real_pool(pools, user, cleanup='0'):
     cleanup = True if cleanup == '1' else False
     load_balance = _prepare_apply(pools=pools, created=True, user=user)
 
-    id_lists = list()
-    if cleanup:
-        for lb_id in load_balance:
-            ids_aux = load_balance[lb_id]['plugin'].delete_pool(
-                load_balance[lb_id], cleanup)
-            id_lists.append(ids_aux)
+    id_lists = fanout.run([fanout.PluginCall(
+        lb_id,
+        load_balance[lb_id]['plugin'].delete_pool,
+        (load_balance[lb_id], cleanup),
+        rollback=load_balance[lb_id]['plugin'].create_pool,
+        rollback_args=(copy.deepcopy(load_balance[lb_id]),)
+    ) for lb_id in load_balance])
 
+    if cleanup:
         num_list = len(id_lists)
         exists = True
         # ids from first list
@@ -140,12 +176,11 @@ def delete_real_pool(pools, user, cleanup='0'):
             if exists:
                 ids.append(id)
     else:
-        for lb_id in load_balance:
-            load_balance[lb_id]['plugin'].delete_pool(
-                load_balance[lb_id], cleanup)
         ids = [pool['id'] for pool in pools]
 
     ServerPool.objects.filter(id__in=ids).update(pool_created=False)
+    # QuerySet.update sends no signals
+    invalidate_searches()
 
     return {}
 
@@ -256,36 +291,19 @@ def update_real_pool(pools, user):
                 pool['identifier'])
             healthcheck['new'] = True
 
+        vips = _get_vips_related_by_pools([pool['id']])[pool['id']]
+
         for e in equips:
             eqpt_id = str(e.id)
-            equipment_access = EquipamentoAcesso.search(
-                equipamento=e.id
-            )
-
-            plugin = PluginFactory.factory(e)
 
             if not load_balance.get(eqpt_id):
 
                 load_balance[eqpt_id] = {
-                    'plugin': plugin,
-                    'access': equipment_access,
+                    'plugin': PluginFactory.factory(e),
+                    'access': EquipamentoAcesso.search(equipamento=e.id),
                     'pools': [],
                 }
 
-            vips_requests = ServerPool().get_vips_related(pool['id'])
-
-            serializer_vips = serializers_vip.VipRequestV3Serializer(
-                vips_requests,
-                many=True,
-                include=(
-                    'ipv4__details',
-                    'ipv6__details',
-                    'ports__identifier',
-                    'ports__pools__server_pool__basic__lb_method',
-                )
-            )
-            vips = serializer_vips.data
-
             load_balance[eqpt_id]['pools'].append({
                 'id': pool['id'],
                 'nome': pool['identifier'],
@@ -311,29 +329,33 @@ def _prepare_apply_state(pools, user=None):
     load_balance = dict()
     keys = list()
 
-    for pool in pools:
-        server_pool = ServerPool.objects.get(id=pool['id'])
+    pools_to_apply = [pool for pool in pools if pool['server_pool_members']]
+    equips_by_pool = _validate_pools_to_apply(pools_to_apply, user=user)
 
-        server_pool_members = server_pool.serverpoolmember_set.all()
+    pool_ids = [pool['id'] for pool in pools_to_apply]
+    server_pools = ServerPool.objects.in_bulk(pool_ids)
+    members_by_pool = dict((pool_id, list()) for pool_id in pool_ids)
+    for member in ServerPoolMember.objects.filter(
+            server_pool__id__in=pool_ids).select_related('ip', 'ipv6'):
+        members_by_pool[member.server_pool_id].append(member)
+
+    for pool in pools:
 
         if pool['server_pool_members']:
-            equips = _validate_pool_members_to_apply(pool, user)
+            server_pool = server_pools[pool['id']]
+            server_pool_members = members_by_pool[pool['id']]
+            equips = equips_by_pool[pool['id']]
 
             keys.append(sorted([str(eqpt.id) for eqpt in equips]))
 
             for e in equips:
                 eqpt_id = str(e.id)
-                equipment_access = EquipamentoAcesso.search(
-                    equipamento=e.id
-                )
-
-                plugin = PluginFactory.factory(e)
 
                 if not load_balance.get(eqpt_id):
 
                     load_balance[eqpt_id] = {
-                        'plugin': plugin,
-                        'access': equipment_access,
+                        'plugin': PluginFactory.factory(e),
+                        'access': EquipamentoAcesso.search(equipamento=e.id),
                         'pools': [],
                     }
 
@@ -366,8 +388,11 @@ def set_poolmember_state(pools, user):
 
     load_balance = _prepare_apply_state(pools['server_pools'], user)
 
-    for lb in load_balance:
-        load_balance[lb]['plugin'].set_state_member(load_balance[lb])
+    fanout.run([fanout.PluginCall(
+        lb,
+        load_balance[lb]['plugin'].set_state_member,
+        (load_balance[lb],)
+    ) for lb in load_balance])
 
     for pool in pools['server_pools']:
         for pool_member in pool['server_pool_members']:
@@ -376,6 +401,8 @@ def set_poolmember_state(pools, user):
             ).update(
                 member_status=pool_member['member_status']
             )
+    # QuerySet.update sends no signals
+    invalidate_searches()
 
     return {}
 
@@ -385,12 +412,17 @@ def get_poolmember_state(pools):
 
     load_balance = _prepare_apply_state(pools)
 
+    # call plugin to get state member
+    lbs = load_balance.keys()
+    lbs_states = fanout.run([fanout.PluginCall(
+        lb,
+        load_balance[lb]['plugin'].get_state_member,
+        (load_balance[lb],)
+    ) for lb in lbs])
+
     ps = dict()
     status = dict()
-    for lb in load_balance:
-        # call plugin to get state member
-        states = load_balance[lb]['plugin'].\
-            get_state_member(load_balance[lb])
+    for lb, states in zip(lbs, lbs_states):
 
         for idx, state in enumerate(states):
             pool_id = load_balance[lb]['pools'][idx]['id']
@@ -419,23 +451,63 @@ def get_poolmember_state(pools):
     return status
 
 
-def _validate_pool_members_to_apply(pool, user=None):
+def _validate_pools_to_apply(pools, user=None):
+    """Validates pools, their members and load balancers, and returns load
+    balancers by pool, querying each environment once."""
 
-    if pool['server_pool_members']:
-        q_filters = [{
-            'id': pool_member['id']
-        } for pool_member in pool['server_pool_members']]
+    pool_ids = [pool['id'] for pool in pools]
 
-        server_pool_members = ServerPoolMember.objects.filter(
-            reduce(lambda x, y: x | y, [
-                Q(**q_filter) for q_filter in q_filters]),
-            server_pool=pool['id'])
-        if len(server_pool_members) != len(q_filters):
-            raise exceptions.PoolmemberNotExist()
+    member_ids = [pool_member['id'] for pool in pools
+                  for pool_member in pool['server_pool_members']]
+    members = dict(ServerPoolMember.objects.filter(
+        id__in=member_ids
+    ).values_list('id', 'server_pool'))
 
-    equips = _validate_pool_to_apply(pool, user=user)
-
-    return equips
+    for pool in pools:
+        if pool['server_pool_members']:
+            ids = [pool_member['id']
+                   for pool_member in pool['server_pool_members']]
+            found = set(member_id for member_id in ids
+                        if members.get(member_id) == pool['id'])
+            if len(found) != len(ids):
+                raise exceptions.PoolmemberNotExist()
+
+    server_pools = dict(ServerPool.objects.filter(
+        id__in=pool_ids
+    ).values_list('id', 'environment'))
+
+    equips_by_env = dict()
+    equips_by_pool = dict()
+    for pool_id in pool_ids:
+        if pool_id not in server_pools:
+            raise exceptions.PoolNotExist()
+
+        env_id = server_pools[pool_id]
+        if env_id not in equips_by_env:
+            equips = list(Equipamento.objects.filter(
+                maintenance=0,
+                equipamentoambiente__ambiente__id=env_id,
+                tipo_equipamento__tipo_equipamento=u'Balanceador'
+            ).select_related('modelo__marca').distinct())
+
+            if facade_eqpt.all_equipments_are_in_maintenance(equips):
+                raise exceptions_eqpt.\
+                    AllEquipmentsAreInMaintenanceException()
+
+            if user:
+                if not facade_eqpt.all_equipments_can_update_config(
+                        equips, user):
+                    raise exceptions_eqpt.\
+                        UserDoesNotHavePermInAllEqptException(
+                            'User does not have permission to update conf '
+                            'in eqpt. Verify the permissions of user group '
+                            'with equipment group. Pool:{}'.format(pool_id))
+
+            equips_by_env[env_id] = equips
+
+        equips_by_pool[pool_id] = equips_by_env[env_id]
+
+    return equips_by_pool
 
 
 def _validate_pool_to_apply(pool, update=False, user=None):
@@ -1,4 +1,5 @@
 # -*- coding: utf-8 -*-
+import copy
 import logging
 
 from django.core.management import call_command
@@ -6,6 +7,8 @@ from django.test.client import Client
 from mock import patch
 
 from networkapi.api_pools.facade.v3 import deploy as facade_pool_deploy
+from networkapi.requisicaovips.models import ServerPool
+from networkapi.requisicaovips.models import ServerPoolMember
 from networkapi.test.mock import MockPlugin
 from networkapi.test.test_case import NetworkApiTestCase
 from networkapi.usuario.models import Usuario
@@ -147,3 +150,45 @@ class PoolDeployMockPluginTestCase(NetworkApiTestCase):
             Exception,
             facade_pool_deploy.create_real_pool(dp, self.user)
         )
+
+    @patch('networkapi.plugins.factory.PluginFactory.factory')
+    def test_prepare_apply_queries_do_not_grow_with_pools(self, test_patch):
+        """
+            Prepare of deploy of 200 pools in 2 load balancers makes the
+            same number of queries of the prepare of one pool.
+        """
+
+        dp = self.load_json_file(
+            'api_pools/tests/unit/json/test_pool_post_not_created.json')
+        test_patch.return_value = MockPlugin()
+        pool_tpl = dp.get('server_pools')[0]
+
+        pools = [pool_tpl]
+        for idx in range(199):
+            server_pool = ServerPool.objects.get(id=pool_tpl['id'])
+            server_pool.id = None
+            server_pool.identifier = 'pool-bench-%s' % idx
+            server_pool.save()
+
+            pool = copy.deepcopy(pool_tpl)
+            pool['id'] = server_pool.id
+            pool['identifier'] = server_pool.identifier
+            for pool_member in pool['server_pool_members']:
+                member = ServerPoolMember.objects.get(id=pool_member['id'])
+                member.id = None
+                member.server_pool = server_pool
+                member.save()
+                pool_member['id'] = member.id
+            pools.append(pool)
+
+        one_queries, load_balance = self.count_queries(
+            facade_pool_deploy._prepare_apply, copy.deepcopy(pools[:1]),
+            user=self.user)
+        all_queries, load_balance = self.count_queries(
+            facade_pool_deploy._prepare_apply, copy.deepcopy(pools),
+            user=self.user)
+
+        self.compare_values(2, len(load_balance))
+        for lb in load_balance.values():
+            self.compare_values(200, len(lb['pools']))
+        self.compare_values(one_queries, all_queries)
@@ -142,6 +142,8 @@ class RackEnvironment:
             id_network_type = network_type.id
             pass
 
+        networks_v4 = list()
+        networks_v6 = list()
         for env in spn_lf_envs:
 
             obj = {
@@ -167,9 +169,13 @@ class RackEnvironment:
                                environmentvip=None)
                 log.debug("Network allocated: " + str(network))
                 if str(config.ip_version)[-1] is "4":
-                    facade_redev4_v3.create_networkipv4(network, self.user)
+                    networks_v4.append(network)
                 elif str(config.ip_version)[-1] is "6":
-                    facade_redev6_v3.create_networkipv6(network, self.user)
+                    networks_v6.append(network)
+
+        # Networks of all vlans are allocated at once
+        facade_redev4_v3.create_networkipv4_batch(networks_v4, self.user)
+        facade_redev6_v3.create_networkipv6_batch(networks_v6, self.user)
 
     def spine_leaf_vlans_read(self):
         pass
@@ -22,8 +22,29 @@ class BasicAuthentication(BaseAuthentication):
         """
         Returns a `User` if a correct username and password have been supplied
         using HTTP Basic authentication.  Otherwise returns `None`.
+
+        The result is kept in the request, so middlewares and views
+        authenticate the same header only once.
         """
-        auth = get_authorization_header(request).split()
+        http_request = getattr(request, '_request', request)
+        header = get_authorization_header(request)
+
+        memo = getattr(http_request, '_basic_auth_memo', None)
+        if memo is not None and memo[0] == header:
+            if isinstance(memo[1], exceptions.AuthenticationFailed):
+                raise memo[1]
+            return memo[1]
+
+        try:
+            result = self._authenticate(header)
+        except exceptions.AuthenticationFailed, e:
+            http_request._basic_auth_memo = (header, e)
+            raise
+        http_request._basic_auth_memo = (header, result)
+        return result
+
+    def _authenticate(self, header):
+        auth = header.split()
 
         if not auth or auth[0].lower() != b'basic':
             return None
@@ -24,6 +24,8 @@ from networkapi.equipamento.models import EquipamentoAcesso
 from networkapi.infrastructure.datatable import build_query_to_datatable_v3
 from networkapi.ip.models import Ip
 from networkapi.ip.models import Ipv6
+from networkapi.models.models_signal_receiver import invalidate_searches
+from networkapi.plugins import fanout
 from networkapi.plugins.factory import PluginFactory
 from networkapi.requisicaovips.models import OptionVip
 from networkapi.requisicaovips.models import ServerPool
@@ -409,11 +411,19 @@ def create_real_vip_request(vip_requests, user):
     if len(list(set(keys))) > 1:
         raise Exception('Vips Request are in differents load balancers')
 
+    calls = list()
     for lb in load_balance:
         inst = copy.deepcopy(load_balance.get(lb))
-        log.info('started call:%s' % lb)
-        inst.get('plugin').create_vip(inst)
-        log.info('ended call')
+        calls.append(fanout.PluginCall(
+            lb,
+            inst.get('plugin').create_vip,
+            (inst,),
+            rollback=inst.get('plugin').delete_vip,
+            rollback_args=(copy.deepcopy(load_balance.get(lb)),)
+        ))
+    log.info('started calls:%s' % ','.join(load_balance.keys()))
+    fanout.run(calls)
+    log.info('ended calls')
 
     ids = [vip_id.get('id') for vip_id in vip_requests]
 
@@ -426,6 +436,9 @@ def create_real_vip_request(vip_requests, user):
     ServerPool.objects.filter(
         viprequestportpool__vip_request_port__vip_request__id__in=ids).update(pool_created=True)
 
+    # QuerySet.update sends no signals
+    invalidate_searches()
+
 
 @commit_on_success
 def update_real_vip_request(vip_requests, user):
@@ -576,6 +589,9 @@ def update_real_vip_request(vip_requests, user):
         ServerPool.objects.filter(
             id__in=pools_ids_del).update(pool_created=False)
 
+    # QuerySet.update sends no signals
+    invalidate_searches()
+
 
 @commit_on_success
 def patch_real_vip_request(vip_requests, user):
@@ -653,6 +669,9 @@ def delete_real_vip_request(vip_requests, user, cleanup='0'):
         pools_ids = list(set(pools_ids))
         ServerPool.objects.filter(id__in=pools_ids).update(pool_created=False)
 
+    # QuerySet.update sends no signals
+    invalidate_searches()
+
 
 def _validate_vip_to_apply(vip_request, update=False, user=None):
 
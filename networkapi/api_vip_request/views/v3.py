@@ -13,7 +13,9 @@ from networkapi.api_vip_request.facade import v3 as facade
 from networkapi.api_vip_request.serializers.v3 import VipRequestV3Serializer
 from networkapi.distributedlock import LOCK_VIP
 from networkapi.settings import SPECS
+from networkapi.util.appcache import VIP_REQUEST_CACHE_ENTRY
 from networkapi.util.classes import CustomAPIView
+from networkapi.util.decorators import cached_search
 from networkapi.util.decorators import logs_method_apiview
 from networkapi.util.decorators import permission_classes_apiview
 from networkapi.util.decorators import permission_obj_apiview
@@ -227,6 +229,7 @@ class VipRequestDBView(CustomAPIView):
     @raise_json_validate('')
     @permission_classes_apiview((IsAuthenticated, permissions.Read))
     @prepare_search
+    @cached_search(VIP_REQUEST_CACHE_ENTRY)
     def get(self, request, *args, **kwargs):
         """
         Returns a list of vip request by ids ou dict
@@ -127,6 +127,7 @@ class VlanV3Serializer(DynamicFieldsModelSerializer):
                         'fields': ('id',)
                     },
                     'obj': 'networks_ipv4',
+                    'related': 'networkipv4_set',
                 },
                 'networks_ipv6': {
                     'serializer': ip_slz.NetworkIPv6V3Serializer,
@@ -135,6 +136,7 @@ class VlanV3Serializer(DynamicFieldsModelSerializer):
                         'fields': ('id',)
                     },
                     'obj': 'networks_ipv6',
+                    'related': 'networkipv6_set',
                 },
                 'networks_ipv4__details': {
                     'serializer': ip_slz.NetworkIPv4V3Serializer,
@@ -143,6 +145,7 @@ class VlanV3Serializer(DynamicFieldsModelSerializer):
                         'kind': 'details'
                     },
                     'obj': 'networks_ipv4',
+                    'related': 'networkipv4_set',
                     'eager_loading': self.setup_eager_loading_networks_ipv4
                 },
                 'networks_ipv6__details': {
@@ -152,6 +155,7 @@ class VlanV3Serializer(DynamicFieldsModelSerializer):
                         'kind': 'details'
                     },
                     'obj': 'networks_ipv6',
+                    'related': 'networkipv6_set',
                     'eager_loading': self.setup_eager_loading_networks_ipv6
                 },
                 'vrfs': {
@@ -11,7 +11,9 @@ from networkapi.api_vlan import serializers
 from networkapi.api_vlan import tasks
 from networkapi.api_vlan.facade import v3 as facade
 from networkapi.settings import SPECS
+from networkapi.util.appcache import VLAN_CACHE_ENTRY
 from networkapi.util.classes import CustomAPIView
+from networkapi.util.decorators import cached_search
 from networkapi.util.decorators import logs_method_apiview
 from networkapi.util.decorators import permission_classes_apiview
 from networkapi.util.decorators import permission_obj_apiview
@@ -29,6 +31,7 @@ class VlanDBView(CustomAPIView):
     @permission_classes_apiview((IsAuthenticated, permissions.Read))
     @permission_obj_apiview([permissions.read_obj_permission])
     @prepare_search
+    @cached_search(VLAN_CACHE_ENTRY)
     def get(self, request, *args, **kwargs):
         """
         Returns a list of vlans with details by ids ou dict.
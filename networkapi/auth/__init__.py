@@ -13,8 +13,12 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import hashlib
+import hmac
 import logging
 
+from django.conf import settings
+
 from networkapi.admin_permission import AdminPermission
 from networkapi.api_ogp import models
 from networkapi.equipamento.models import Equipamento
@@ -22,24 +26,74 @@ from networkapi.grupo.models import DireitosGrupoEquipamento
 from networkapi.grupo.models import EGrupo
 from networkapi.grupo.models import PermissaoAdministrativa
 from networkapi.grupo.models import PermissaoAdministrativaNotFoundError
+from networkapi.system import exceptions
+from networkapi.system.facade import get_value
 from networkapi.usuario.models import Usuario
+from networkapi.util import convert_string_or_int_to_boolean
+from networkapi.util.appcache import get_cache
+from networkapi.util.appcache import get_tags_version
+from networkapi.util.appcache import set_cache
+from networkapi.util.appcache import USER_CACHE_ENTRY
 
 log = logging.getLogger(__name__)
 
+# Seconds an authenticated user is reused for the same credentials
+AUTH_CACHE_TIMEOUT = 60
+AUTH_CACHE_PREFIX = 'AUTH_USER'
+
+
+def _credentials_key(username, password, user_ldap=None):
+    """Key of credentials signed with secret key, so cache keeps no
+    password and a key can not be built without the secret.
+
+    Key has the version of USER_CACHE_ENTRY, so saves of users and of their
+    group memberships drop every cached user.
+    """
+
+    credentials = '\0'.join(
+        value.encode('utf-8') if isinstance(value, unicode) else value
+        for value in (username, password, user_ldap or ''))
+    digest = hmac.new(str(settings.SECRET_KEY), credentials,
+                      hashlib.sha256).hexdigest()
+    version = get_tags_version([USER_CACHE_ENTRY]).get(USER_CACHE_ENTRY)
+    return '%s:%s:%s' % (AUTH_CACHE_PREFIX, version, digest)
+
+
+def _use_cache_user():
+    try:
+        return convert_string_or_int_to_boolean(get_value('use_cache_user'))
+    except exceptions.VariableDoesNotExistException:
+        return False
+
 
 def authenticate(username, password, user_ldap=None):
     """
     Busca o usuário com ativo com o login e senha informados.
 
+    Usuários autenticados ficam em cache por AUTH_CACHE_TIMEOUT segundos
+    quando use_cache_user está ligado.
+
     @raise UsuarioError: Falha ao pesquisar o usuário.
     """
     if username is None or password is None:
         return None
 
+    use_cache = _use_cache_user()
+    if use_cache:
+        key = _credentials_key(username, password, user_ldap)
+        user = get_cache(key)
+        if user is not None:
+            return user
+
     if user_ldap is None:
-        return Usuario().get_enabled_user(username, password)
+        user = Usuario().get_enabled_user(username, password)
     else:
-        return Usuario().get_by_ldap_user(user_ldap, True)
+        user = Usuario().get_by_ldap_user(user_ldap, True)
+
+    if user is not None and user.ativo and use_cache:
+        set_cache(key, user, AUTH_CACHE_TIMEOUT)
+
+    return user
 
 
 def has_perm(user, perm_function, perm_oper, egroup_id=None, equip_id=None, equip_oper=None):
@@ -88,58 +142,109 @@ def _has_equip_perm(ugroup, egroups, equip_oper):
     return False
 
 
-def validate_object_perm(objects_id, user, operation, object_type):
+class ObjectPermissionResolver(object):
 
-    ugroups = user.grupos.all()
+    """Resolves object permissions of a user in bulk.
 
-    # general perms
-    perms = models.ObjectGroupPermissionGeneral.objects.filter(
-        object_type__name=object_type
-    )
-    if perms:
-        pool_perm = _validate_obj(perms, ugroups, operation)
-        if pool_perm:
-            return True
+    Groups of user and general permissions are loaded once and kept while
+    the user instance lives (the request), and each check of many objects
+    costs one query by object type.
+    """
 
-    if len(objects_id) == 0:
+    OPERATION_FIELDS = {
+        AdminPermission.OBJ_READ_OPERATION: 'read',
+        AdminPermission.OBJ_WRITE_OPERATION: 'write',
+        AdminPermission.OBJ_DELETE_OPERATION: 'delete',
+        AdminPermission.OBJ_UPDATE_CONFIG_OPERATION: 'change_config',
+    }
+
+    def __init__(self, user):
+        self.user = user
+        self._ugroup_ids = None
+        self._general_perms = None
+
+    @property
+    def ugroup_ids(self):
+        if self._ugroup_ids is None:
+            self._ugroup_ids = set(
+                ugroup.id for ugroup in self.user.grupos.all())
+        return self._ugroup_ids
+
+    def _allows(self, perm, operation):
+        field = self.OPERATION_FIELDS.get(operation)
+        return field is None or perm[field]
+
+    def has_general_perm(self, operation, object_type):
+
+        if self._general_perms is None:
+            self._general_perms = list(
+                models.ObjectGroupPermissionGeneral.objects.filter(
+                    user_group__in=self.ugroup_ids
+                ).values('object_type__name', 'read', 'write',
+                         'change_config', 'delete'))
+
+        for perm in self._general_perms:
+            if perm['object_type__name'] == object_type and \
+                    self._allows(perm, operation):
+                return True
         return False
 
-    for object_id in objects_id:
+    def denied_objects(self, objects_id, operation, object_type):
+        """Returns ids of objects with individual permissions where no group
+        of user is allowed to operation."""
+
+        objects_id = set(int(object_id) for object_id in objects_id
+                         if object_id not in (None, ''))
+        if not objects_id:
+            return set()
 
-        # individuals perms
         perms = models.ObjectGroupPermission.objects.filter(
-            object_value=object_id,
-            object_type__name=object_type
-        )
-        if perms:
-            pool_perm = _validate_obj(perms, ugroups, operation)
-            if not pool_perm:
-                log.warning('User {} does not have permission {} to Object {}:{}'.format(
-                    user, operation, object_type, object_id
-                ))
-                return False
-
-    return True
-
-
-def _validate_obj(perms, ugroups, operation):
-    obj_perm = False
-
-    perms = perms.filter(user_group__in=ugroups)
-
-    if operation == AdminPermission.OBJ_READ_OPERATION:
-        perms = perms.filter(read=True)
-    elif operation == AdminPermission.OBJ_WRITE_OPERATION:
-        perms = perms.filter(write=True)
-    elif operation == AdminPermission.OBJ_DELETE_OPERATION:
-        perms = perms.filter(delete=True)
-    elif operation == AdminPermission.OBJ_UPDATE_CONFIG_OPERATION:
-        perms = perms.filter(change_config=True)
-
-    if perms:
-        obj_perm = True
-
-    return obj_perm
+            object_type__name=object_type,
+            object_value__in=objects_id
+        ).values('object_value', 'user_group', 'read', 'write',
+                 'change_config', 'delete')
+
+        protected = set()
+        allowed = set()
+        for perm in perms:
+            protected.add(perm['object_value'])
+            if perm['user_group'] in self.ugroup_ids and \
+                    self._allows(perm, operation):
+                allowed.add(perm['object_value'])
+
+        return protected - allowed
+
+    def has_perm(self, objects_id, operation, object_type):
+
+        if self.has_general_perm(operation, object_type):
+            return True
+
+        objects_id = list(objects_id)
+        if len(objects_id) == 0:
+            return False
+
+        denied = self.denied_objects(objects_id, operation, object_type)
+        for object_id in sorted(denied):
+            log.warning('User {} does not have permission {} to Object {}:{}'.format(
+                self.user, operation, object_type, object_id
+            ))
+
+        return not denied
+
+
+def get_perm_resolver(user):
+    """Returns the permission resolver kept by user instance."""
+
+    resolver = getattr(user, '_perm_resolver', None)
+    if resolver is None:
+        resolver = ObjectPermissionResolver(user)
+        user._perm_resolver = resolver
+    return resolver
+
+
+def validate_object_perm(objects_id, user, operation, object_type):
+
+    return get_perm_resolver(user).has_perm(objects_id, operation, object_type)
 
 
 def perm_obj(request, operation, object_type, *args, **kwargs):
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+from networkapi.admin_permission import AdminPermission
+from networkapi.api_ogp.models import ObjectGroupPermission
+from networkapi.api_ogp.models import ObjectGroupPermissionGeneral
+from networkapi.api_ogp.models import ObjectType
+from networkapi.auth import validate_object_perm
+from networkapi.test.test_case import NetworkApiTestCase
+from networkapi.usuario.models import Usuario
+
+
+class ValidateObjectPermTestCase(NetworkApiTestCase):
+
+    fixtures = [
+        'networkapi/system/fixtures/initial_variables.json',
+        'networkapi/usuario/fixtures/initial_usuario.json',
+        'networkapi/grupo/fixtures/initial_ugrupo.json',
+        'networkapi/usuario/fixtures/initial_usuariogrupo.json',
+        'networkapi/api_ogp/fixtures/initial_objecttype.json',
+        'networkapi/api_ogp/fixtures/initial_objectgrouppermissiongeneral.json',
+        'networkapi/grupo/fixtures/initial_permissions.json',
+        'networkapi/grupo/fixtures/initial_permissoes_administrativas.json',
+    ]
+
+    def test_validate_object_perm_with_constant_queries(self):
+        """Test that object permissions of many vlans are validated without
+        queries by object."""
+
+        ObjectGroupPermissionGeneral.objects.filter(
+            object_type__name=AdminPermission.OBJ_TYPE_VLAN).delete()
+        object_type = ObjectType.objects.get(
+            name=AdminPermission.OBJ_TYPE_VLAN)
+        ids = range(1000, 1200)
+        for object_value in ids:
+            ObjectGroupPermission.objects.create(
+                user_group_id=1, object_type=object_type,
+                object_value=object_value, read=True, write=False,
+                change_config=False, delete=False)
+
+        def validate(objects_id, operation):
+            user = Usuario.objects.get(id=1)
+            return validate_object_perm(
+                objects_id, user, operation, AdminPermission.OBJ_TYPE_VLAN)
+
+        one_queries, allowed = self.count_queries(
+            validate, ids[:1], AdminPermission.OBJ_READ_OPERATION)
+        self.assertTrue(allowed)
+
+        all_queries, allowed = self.count_queries(
+            validate, ids, AdminPermission.OBJ_READ_OPERATION)
+        self.assertTrue(allowed)
+        self.compare_values(one_queries, all_queries)
+
+        allowed = validate(ids, AdminPermission.OBJ_WRITE_OPERATION)
+        self.assertFalse(allowed)
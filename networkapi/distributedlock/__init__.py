@@ -58,17 +58,32 @@ LOCK_GET_IPV6_AVAILABLE = 'Ipv6_get_available_for_vip:%s'
 
 
 # Adjusts settings
+import logging
+
+from django.conf import settings
 from django.core.cache import cache
 from networkapi.distributedlock.memcachedlock import MemcachedLock
+from networkapi.distributedlock.mysqllock import MySQLLock
+
+log = logging.getLogger(__name__)
 
 DEBUG = False
 DEFAULT_TIMEOUT = 1200
 DEFAULT_BLOCKING = True
 DEFAULT_MEMCACHED_CLIENT = cache
+# Max time (in seconds) to wait for a busy lock before trying all again
+DEFAULT_WAIT_TIMEOUT = 10
+
+# Lock backends by name, chosen by settings.LOCK_BACKEND
+LOCK_BACKENDS = {
+    'memcached': MemcachedLock,
+    'mysql': MySQLLock,
+}
 
 
 def default_lock_factory(key):
-    return MemcachedLock(
+    backend = LOCK_BACKENDS[getattr(settings, 'LOCK_BACKEND', 'memcached')]
+    return backend(
         key, DEFAULT_MEMCACHED_CLIENT, DEFAULT_TIMEOUT)
 
 
@@ -83,13 +98,14 @@ class LockNotAcquiredError(Exception):
 
 class distributedlock(object):
 
-    def __init__(self, key=None, lock=None, blocking=None):
+    def __init__(self, key=None, lock=None, blocking=None, wait_timeout=None):
         self.key = key
         self.lock = lock
         if blocking is None:
             self.blocking = DEFAULT_BLOCKING
         else:
             self.blocking = blocking
+        self.wait_timeout = wait_timeout
 
         if not self.lock:
             self.lock = default_lock_factory(self.key)
@@ -109,7 +125,7 @@ class distributedlock(object):
         if not (type(self.key) == str or type(self.key) == unicode) and self.key == '':
             raise RuntimeError('Key not specified!')
 
-        if self.lock.acquire(self.blocking):
+        if self.lock.acquire(self.blocking, self.wait_timeout):
             _debug('locking with key %s' % self.key)
         else:
             raise LockNotAcquiredError()
@@ -120,3 +136,57 @@ class distributedlock(object):
 
     def get_cached_data(self):
         return self.lock.get_cached_data()
+
+
+def _by_backend(locks):
+    backends = dict()
+    for lock in locks:
+        backends.setdefault(type(lock.lock), list()).append(lock)
+    return backends.items()
+
+
+def acquire_many(keys, wait_timeout=DEFAULT_WAIT_TIMEOUT, take_over=False):
+    """Acquires locks of all keys, blocking until all of them are free.
+
+    Keys are acquired together, in sorted order, with one batched operation
+    of the backend; if one is busy, all are released and it waits only for
+    the busy one, holding nothing else, so it can not deadlock.
+
+    @param take_over: removes locks of keys held by others before acquiring.
+    @return: list of distributedlock, to release with release_many.
+    """
+
+    locks = [distributedlock(key, blocking=False, wait_timeout=wait_timeout)
+             for key in sorted(set(keys))]
+    if not locks:
+        return locks
+
+    backend = type(locks[0].lock)
+    if take_over:
+        for key in backend.force_release_many([lock.lock for lock in locks]):
+            log.info('Get cached lock data for %s. Disabling it and '
+                     'creating a new lock' % key)
+
+    waited = None
+    while True:
+        pending = [lock.lock for lock in locks if lock is not waited]
+        busy = backend.acquire_many(pending)
+        if busy is None:
+            return locks
+
+        if waited is not None:
+            waited.__exit__('', '', '')
+
+        # Waits for the busy lock and tries again holding it
+        _debug('waiting lock %s' % busy.key)
+        waited = [lock for lock in locks if lock.lock is busy][0]
+        if not busy.acquire(True, wait_timeout):
+            waited = None
+
+
+def release_many(locks):
+    """Releases locks with one batched operation by backend."""
+
+    for backend, backend_locks in _by_backend(locks):
+        _debug('releasing locks %s' % [lock.key for lock in backend_locks])
+        backend.release_many([lock.lock for lock in backend_locks])
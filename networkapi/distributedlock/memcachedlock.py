@@ -14,6 +14,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 import logging
+import random
 import time
 import uuid
 
@@ -21,6 +22,11 @@ log = logging.getLogger('MemcachedLock')
 
 __all__ = ('MemcachedLock',)
 
+# Memcached has no way to notify waiters, so blocking acquire polls with
+# exponential backoff (with jitter) between these intervals, in seconds
+MIN_RETRY_INTERVAL = 0.05
+MAX_RETRY_INTERVAL = 1.0
+
 
 class MemcachedLock(object):
 
@@ -39,25 +45,110 @@ class MemcachedLock(object):
         # identify who has the lock
         self.instance_id = uuid.uuid1().hex
 
-    def acquire(self, blocking=True):
-        while True:
-            added = self.client.add(self.key, self.instance_id, self.timeout)
-            log.warning('Added Lock=%s,Key=%s,instance_id=%s,timeout=%s' % (
-                repr(added), self.key, self.instance_id, self.timeout))
-            if added:
-                break
+    def acquire(self, blocking=True, wait_timeout=None):
+        """Acquires lock. When blocking, waits at most wait_timeout seconds
+        (forever if None)."""
 
-            if added == 0 and not (added is False):
-                raise RuntimeError(
-                    u'Error calling memcached add! Is memcached up and configured? memcached_client.add returns %s' % repr(added))
+        start = time.time()
+        interval = MIN_RETRY_INTERVAL
+        while not self._add():
+            log.debug('Waiting locking for "%s"', self.key)
 
-            if not blocking:   # and not added
+            waited = time.time() - start
+            if not blocking or (wait_timeout is not None and
+                                waited >= wait_timeout):
                 return False
 
-            log.warning('Waiting locking for "%s"', self.key)
-            time.sleep(1)
+            sleep = random.uniform(interval / 2, interval)
+            if wait_timeout is not None:
+                sleep = min(sleep, wait_timeout - waited)
+            time.sleep(sleep)
+            interval = min(interval * 2, MAX_RETRY_INTERVAL)
+
         return True
 
+    def _add(self):
+        added = self.client.add(self.key, self.instance_id, self.timeout)
+        log.debug('Added Lock=%s,Key=%s,instance_id=%s,timeout=%s' % (
+            repr(added), self.key, self.instance_id, self.timeout))
+
+        if not added and added == 0 and not (added is False):
+            raise RuntimeError(
+                u'Error calling memcached add! Is memcached up and configured? memcached_client.add returns %s' % repr(added))
+
+        return bool(added)
+
+    @classmethod
+    def acquire_many(cls, locks):
+        """Acquires all locks or none of them, without blocking.
+
+        Busy keys are found with one get_many before adding any key, and
+        keys already added are removed with one delete_many on failure.
+
+        @return: None when all locks were acquired | first busy lock
+        """
+
+        if not locks:
+            return None
+
+        client = locks[0].client
+        locks = sorted(locks, key=lambda lock: lock.key)
+
+        held = client.get_many([lock.key for lock in locks])
+        busy = None
+        for lock in locks:
+            if lock.key in held:
+                busy = lock
+                break
+
+        added = list()
+        if busy is None:
+            for lock in locks:
+                if not lock._add():
+                    busy = lock
+                    break
+                added.append(lock)
+
+        if busy is not None:
+            if added:
+                client.delete_many([lock.key for lock in added])
+            return busy
+
+        return None
+
+    @classmethod
+    def release_many(cls, locks):
+        """Releases locks with one get_many and one delete_many."""
+
+        if not locks:
+            return
+
+        client = locks[0].client
+        values = client.get_many([lock.key for lock in locks])
+        owned = [lock for lock in locks
+                 if values.get(lock.key) == lock.instance_id]
+        if len(owned) < len(locks):
+            log.warning(
+                "I've no lock to release. Increase TIMEOUT of lock operations")
+        if owned:
+            client.delete_many([lock.key for lock in owned])
+
+    @classmethod
+    def force_release_many(cls, locks):
+        """Removes locks of keys, whoever holds them.
+
+        @return: keys that were held
+        """
+
+        if not locks:
+            return list()
+
+        client = locks[0].client
+        held = client.get_many([lock.key for lock in locks]).keys()
+        if held:
+            client.delete_many(held)
+        return held
+
     def release(self):
         value = self.client.get(self.key)
         if value == self.instance_id:
@@ -65,7 +156,7 @@ class MemcachedLock(object):
             # below can delete another lock! There is no way to solve this in
             # memcached
             self.client.delete(self.key)
-            log.warning('Removed Lock,Key=%s' % (self.key))
+            log.debug('Removed Lock,Key=%s' % (self.key))
         else:
             log.warning(
                 "I've no lock to release. Increase TIMEOUT of lock operations")
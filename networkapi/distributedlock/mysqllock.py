@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import hashlib
+import logging
+
+from django.db import connection
+
+log = logging.getLogger('MySQLLock')
+
+__all__ = ('MySQLLock',)
+
+# MySQL does not accept lock names longer than 64 characters
+MAX_NAME_LENGTH = 64
+
+
+class MySQLLock(object):
+
+    """
+    Distributed lock using MySQL named locks (GET_LOCK/RELEASE_LOCK).
+
+    Waiters are blocked inside the database and woken up as soon as the lock
+    is released, instead of polling. A named lock belongs to the database
+    connection, so it is released when the connection is closed and it must
+    be released by the same thread that acquired it.
+    """
+
+    def __init__(self, key, client, timeout=600):
+        self.key = 'lock:%s' % key
+        self.name = self.key
+        if len(self.name) > MAX_NAME_LENGTH:
+            self.name = 'lock:%s' % hashlib.sha1(self.key).hexdigest()
+        self.client = client
+        # Named locks do not expire, they live while connection is open
+        self.timeout = timeout
+        self.held = False
+
+    @staticmethod
+    def _query_row(sql, params):
+        cursor = connection.cursor()
+        try:
+            cursor.execute(sql, params)
+            return cursor.fetchone()
+        finally:
+            cursor.close()
+
+    def _query(self, sql, *params):
+        return self._query_row(sql, params)[0]
+
+    def acquire(self, blocking=True, wait_timeout=None):
+        """Acquires lock. When blocking, waits at most wait_timeout seconds
+        (forever if None)."""
+
+        if not blocking:
+            wait = 0
+        elif wait_timeout is None:
+            wait = -1
+        else:
+            wait = max(int(round(wait_timeout)), 0)
+
+        acquired = self._query('SELECT GET_LOCK(%s, %s)', self.name, wait)
+        if acquired is None:
+            raise RuntimeError(
+                u'Error calling GET_LOCK for %s. Is database up?' % self.key)
+
+        if acquired != 1:
+            return False
+
+        self.held = True
+        return True
+
+    @classmethod
+    def acquire_many(cls, locks):
+        """Acquires all locks or none of them, without blocking, with one
+        query (and one more to undo on failure).
+
+        @return: None when all locks were acquired | first busy lock
+        """
+
+        if not locks:
+            return None
+
+        locks = sorted(locks, key=lambda lock: lock.name)
+        acquired = cls._query_row(
+            'SELECT %s' % ', '.join(['GET_LOCK(%s, 0)'] * len(locks)),
+            [lock.name for lock in locks])
+
+        busy = None
+        for lock, result in zip(locks, acquired):
+            if result is None:
+                raise RuntimeError(
+                    u'Error calling GET_LOCK for %s. Is database up?' % lock.key)
+            if result != 1 and busy is None:
+                busy = lock
+
+        if busy is not None:
+            undo = [lock.name for lock, result in zip(locks, acquired)
+                    if result == 1]
+            if undo:
+                cls._query_row(
+                    'SELECT %s' % ', '.join(['RELEASE_LOCK(%s)'] * len(undo)),
+                    undo)
+            return busy
+
+        for lock in locks:
+            lock.held = True
+        return None
+
+    @classmethod
+    def release_many(cls, locks):
+        """Releases locks with one query."""
+
+        held = [lock for lock in locks if lock.held]
+        if len(held) < len(locks):
+            log.warning("I've no lock to release.")
+        if not held:
+            return
+
+        cls._query_row(
+            'SELECT %s' % ', '.join(['RELEASE_LOCK(%s)'] * len(held)),
+            [lock.name for lock in held])
+
+        for lock in held:
+            lock.held = False
+
+    @classmethod
+    def force_release_many(cls, locks):
+        # Named locks can not be released by other connections
+        return list()
+
+    def release(self):
+        if not self.held:
+            log.warning("I've no lock to release. Key=%s" % self.key)
+            return
+
+        released = self._query('SELECT RELEASE_LOCK(%s)', self.name)
+        if released != 1:
+            log.warning("I've no lock to release. Key=%s" % self.key)
+
+        self.held = False
+
+    def get_cached_data(self):
+        # Named locks can not be released by other connections, so there
+        # is no data to take over a lock
+        return None
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import unittest
+
+from networkapi.distributedlock.memcachedlock import MemcachedLock
+
+
+class FakeClient(object):
+
+    def __init__(self):
+        self.data = dict()
+
+    def add(self, key, value, timeout=0):
+        if key in self.data:
+            return False
+        self.data[key] = value
+        return True
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+    def get_many(self, keys):
+        return dict((key, self.data[key]) for key in keys if key in self.data)
+
+    def delete_many(self, keys):
+        for key in keys:
+            self.delete(key)
+
+
+class MemcachedLockTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.client = FakeClient()
+
+    def test_acquire_and_release(self):
+        lock = MemcachedLock('vlan:1', self.client)
+        self.assertTrue(lock.acquire())
+        self.assertEqual(lock.instance_id, lock.get_cached_data())
+        lock.release()
+        self.assertIsNone(lock.get_cached_data())
+
+    def test_busy_lock(self):
+        lock = MemcachedLock('vlan:1', self.client)
+        other = MemcachedLock('vlan:1', self.client)
+        self.assertTrue(lock.acquire())
+        self.assertFalse(other.acquire(blocking=False))
+        self.assertFalse(other.acquire(wait_timeout=0.1))
+
+    def test_acquire_many(self):
+        locks = [MemcachedLock('ipv4:%s' % i, self.client) for i in range(3)]
+        self.assertIsNone(MemcachedLock.acquire_many(locks))
+        for lock in locks:
+            self.assertEqual(lock.instance_id, lock.get_cached_data())
+
+        MemcachedLock.release_many(locks)
+        for lock in locks:
+            self.assertIsNone(lock.get_cached_data())
+
+    def test_acquire_many_busy(self):
+        other = MemcachedLock('ipv4:1', self.client)
+        other.acquire()
+
+        locks = [MemcachedLock('ipv4:%s' % i, self.client) for i in range(3)]
+        busy = MemcachedLock.acquire_many(locks)
+        self.assertEqual('lock:ipv4:1', busy.key)
+        # Nothing is held on failure
+        self.assertIsNone(locks[0].get_cached_data())
+        self.assertIsNone(locks[2].get_cached_data())
+        self.assertEqual(other.instance_id, other.get_cached_data())
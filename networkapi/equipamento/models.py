@@ -19,6 +19,8 @@ from _mysql_exceptions import OperationalError
 from django.core.exceptions import ObjectDoesNotExist
 from django.db import models
 from django.db.models import get_model
+from django.db.models.signals import post_delete
+from django.db.models.signals import post_save
 
 from networkapi.ambiente.models import Ambiente
 from networkapi.ambiente.models import AmbienteNotFoundError
@@ -29,6 +31,7 @@ from networkapi.grupo.models import EGrupoNotFoundError
 from networkapi.models.BaseModel import BaseModel
 from networkapi.roteiro.models import Roteiro
 from networkapi.tipoacesso.models import TipoAcesso, AccessTypeNotFoundError
+from networkapi.vlan import occupancy
 from networkapi.api_vrf.models import Vrf
 from networkapi.api_vrf.exceptions import VrfNotFoundError
 
@@ -1982,3 +1985,9 @@ class ModeloRoteiro(BaseModel):
                 u'Falha ao remover uma associação entre um Modelo e um Roteiro.')
             raise EquipamentoError(
                 e, u'Falha ao remover uma associação entre um Modelo e um Roteiro.')
+
+
+post_save.connect(occupancy.equipment_environment_changed,
+                  sender=EquipamentoAmbiente)
+post_delete.connect(occupancy.equipment_environment_changed,
+                    sender=EquipamentoAmbiente)
@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Buffer of audit events of a request and publisher of events to queue.
+
+While a request is buffering (started by TrackingRequestOnThreadLocalMiddleware)
+events are kept in memory once their changes commit, and saved with one
+insert when the request ends. Events of changes rolled back are never kept.
+Outside of requests (tasks, scripts) events are saved at once.
+Events are sent to queue by a background thread, in batches.
+"""
+import logging
+import os
+import threading
+from datetime import datetime
+from functools import partial
+from Queue import Empty
+from Queue import Full
+from Queue import Queue
+
+from networkapi.eventlog.models import AuditRequest
+from networkapi.eventlog.models import EventLog
+from networkapi.eventlog.models import EventLogQueue
+from networkapi.settings import LOG_QUEUE
+from networkapi.util.transaction_hooks import on_commit
+
+log = logging.getLogger(__name__)
+
+# Messages waiting to be sent, newer messages are dropped when it is full
+MAX_PENDING_MESSAGES = 10000
+# Messages sent with one connection
+MESSAGES_BATCH_SIZE = 100
+
+
+class AuditBuffer(threading.local):
+
+    def __init__(self):
+        self.active = False
+        self.events = list()
+
+    def start(self):
+        self.active = True
+        self.events = list()
+
+    def add(self, event):
+        """Keeps event while buffering or saves it."""
+
+        event.setdefault('hora_evento', datetime.now())
+        if self.active:
+            on_commit(partial(self._keep, event))
+        else:
+            _save([event])
+
+    def _keep(self, event):
+        # Runs inside commit, so event can not be saved here
+        if self.active:
+            self.events.append(event)
+        else:
+            log.error(u'Audit event committed after its request ended, '
+                      u'dropped: %s' % event)
+
+    def flush(self):
+        """Saves buffered events and stops buffering."""
+
+        events, self.events, self.active = self.events, list(), False
+        if not events:
+            return
+
+        try:
+            _save(events)
+        except Exception:
+            log.error(u'Error saving %s audit events' % len(events),
+                      exc_info=True)
+
+
+def _save(events):
+    for event in events:
+        audit_request = event['audit_request']
+        if audit_request is not None and audit_request.pk is None:
+            audit_request.save()
+
+    events = [(_user(event), event) for event in events]
+    if len(events) == 1:
+        EventLog.log(*events[0])
+    else:
+        EventLog.log_many(events)
+
+    if LOG_QUEUE:
+        for user, event in events:
+            publisher.publish(EventLogQueue.message(user, event))
+
+
+def _user(event):
+    audit_request = event['audit_request']
+    return audit_request.user if audit_request else None
+
+
+class EventLogPublisher(object):
+
+    """Sends messages of events to queue in a background thread."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._queue = None
+        self._pid = None
+
+    def _start(self):
+        # Threads do not survive fork, each process starts its own
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._queue = Queue(MAX_PENDING_MESSAGES)
+            worker = threading.Thread(target=self._run, args=(self._queue,))
+            worker.daemon = True
+            worker.start()
+            self._pid = os.getpid()
+
+    def publish(self, message):
+        if self._pid != os.getpid():
+            self._start()
+        try:
+            self._queue.put_nowait(message)
+        except Full:
+            log.error('Event log queue is full, message dropped: %s' %
+                      message)
+
+    def _run(self, queue):
+        while True:
+            messages = [queue.get()]
+            try:
+                while len(messages) < MESSAGES_BATCH_SIZE:
+                    messages.append(queue.get_nowait())
+            except Empty:
+                pass
+
+            try:
+                EventLogQueue.send(messages)
+            except Exception, e:
+                log.error('Failed to send %s event log messages: %s' %
+                          (len(messages), e))
+
+
+events_buffer = AuditBuffer()
+publisher = EventLogPublisher()
+
+
+def add_event(event):
+    """Registers event of current audit request."""
+
+    event['audit_request'] = AuditRequest.current_request()
+    events_buffer.add(event)
@@ -90,30 +90,11 @@ class EventLog(models.Model):
         }
         """
 
-        parametro_anterior = [
-            '{0} : {1}'.format(key, evento['parametro_anterior'][key])
-            for key in evento['parametro_anterior']]
-        parametro_anterior = u'\n'.join(parametro_anterior)
-
-        parametro_atual = [
-            '{0} : {1}'.format(key, evento['parametro_atual'][key])
-            for key in evento['parametro_atual']]
-        parametro_atual = u'\n'.join(parametro_atual)
-
         try:
             functionality = Functionality()
-            event_log = EventLog()
-            event_log.usuario = usuario
-            event_log.hora_evento = datetime.now()
-            event_log.acao = evento['acao']
+            event_log = cls._build(usuario, evento)
             event_log.funcionalidade = functionality.exist(
                 evento['funcionalidade'])
-            event_log.parametro_anterior = parametro_anterior
-            event_log.parametro_atual = parametro_atual
-            event_log.id_objeto = evento['id_objeto']
-            event_log.audit_request = evento['audit_request']
-            event_log.evento = ''
-            event_log.resultado = 0
             event_log.save()
         except Exception, e:
             cls.logger.error(
@@ -121,6 +102,51 @@ class EventLog(models.Model):
             raise EventLogError(
                 e, u'Falha ao salvar o log: evento = %s, id do usuario = %s.' % (evento, usuario))
 
+    @classmethod
+    def log_many(cls, events):
+        """
+        saves many eventlogs in the database with one insert
+        @params
+        events: list of (usuario, evento)
+        """
+
+        try:
+            Functionality.exist_many(
+                set(evento['funcionalidade'] for usuario, evento in events))
+            EventLog.objects.bulk_create(
+                [cls._build(usuario, evento) for usuario, evento in events])
+        except Exception, e:
+            cls.logger.error(
+                u'Falha ao salvar os logs: %s eventos.' % len(events))
+            raise EventLogError(
+                e, u'Falha ao salvar os logs: %s eventos.' % len(events))
+
+    @classmethod
+    def _build(cls, usuario, evento):
+
+        parametro_anterior = [
+            '{0} : {1}'.format(key, evento['parametro_anterior'][key])
+            for key in evento['parametro_anterior']]
+        parametro_anterior = u'\n'.join(parametro_anterior)
+
+        parametro_atual = [
+            '{0} : {1}'.format(key, evento['parametro_atual'][key])
+            for key in evento['parametro_atual']]
+        parametro_atual = u'\n'.join(parametro_atual)
+
+        event_log = EventLog()
+        event_log.usuario = usuario
+        event_log.hora_evento = evento.get('hora_evento') or datetime.now()
+        event_log.acao = evento['acao']
+        event_log.funcionalidade = evento['funcionalidade']
+        event_log.parametro_anterior = parametro_anterior
+        event_log.parametro_atual = parametro_atual
+        event_log.id_objeto = evento['id_objeto']
+        event_log.audit_request = evento['audit_request']
+        event_log.evento = ''
+        event_log.resultado = 0
+        return event_log
+
 
 class EventLogQueue(object):
 
@@ -128,18 +154,17 @@ class EventLogQueue(object):
     def log(cls, usuario, evento):
         """Send the eventlog to queues"""
 
+        cls.send([cls.message(usuario, evento)])
+
+    @classmethod
+    def message(cls, usuario, evento):
+        """Body of the message of an eventlog"""
+
         usuario_id = 'NoUser'
         if usuario:
             usuario_id = usuario.id
 
-        # Send to Queue
-        queue_manager = QueueManager(
-            broker_vhost='tasks',
-            exchange_name='eventslog',
-            routing_key='eventslog'
-        )
-
-        queue_manager.append({
+        return {
             'action': evento['acao'],
             'kind': evento['funcionalidade'],
             'timestamp': int(time()),
@@ -149,7 +174,20 @@ class EventLogQueue(object):
                 'old_value': evento['parametro_anterior'],
                 'new_value': evento['parametro_atual']
             }
-        })
+        }
+
+    @classmethod
+    def send(cls, messages):
+        """Send many messages to queues with one connection"""
+
+        queue_manager = QueueManager(
+            broker_vhost='tasks',
+            exchange_name='eventslog',
+            routing_key='eventslog'
+        )
+
+        for message in messages:
+            queue_manager.append(message)
         queue_manager.send()
 
 
@@ -260,3 +298,12 @@ class Functionality(models.Model):
             functionality.nome = event_functionality
             functionality.save()
             return event_functionality
+
+    @classmethod
+    def exist_many(cls, event_functionalities):
+        existing = set(Functionality.objects.filter(
+            nome__in=event_functionalities).values_list('nome', flat=True))
+        for event_functionality in set(event_functionalities) - existing:
+            functionality = Functionality()
+            functionality.nome = event_functionality
+            functionality.save()
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+
+import unittest
+
+from mock import patch
+
+from networkapi.eventlog import audit
+
+
+class AuditBufferTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.callbacks = list()
+        patch('networkapi.eventlog.audit.on_commit',
+              side_effect=self.callbacks.append).start()
+        self.save = patch('networkapi.eventlog.audit._save').start()
+        self.buffer = audit.AuditBuffer()
+
+    def tearDown(self):
+        patch.stopall()
+
+    def commit(self):
+        for callback in self.callbacks:
+            callback()
+        del self.callbacks[:]
+
+    def test_events_of_committed_changes_are_saved_on_flush(self):
+        self.buffer.start()
+        self.buffer.add({'acao': 'Alterar'})
+        self.buffer.add({'acao': 'Remover'})
+        self.commit()
+        self.assertFalse(self.save.called)
+
+        self.buffer.flush()
+
+        events = self.save.call_args[0][0]
+        self.assertEqual(['Alterar', 'Remover'],
+                         [event['acao'] for event in events])
+
+    def test_events_of_rolled_back_changes_are_not_saved(self):
+        self.buffer.start()
+        self.buffer.add({'acao': 'Alterar'})
+        # Rollback drops the callbacks
+        del self.callbacks[:]
+
+        self.buffer.flush()
+
+        self.assertFalse(self.save.called)
+
+    def test_event_committed_after_flush_is_not_saved(self):
+        self.buffer.start()
+        self.buffer.add({'acao': 'Alterar'})
+        self.buffer.flush()
+
+        self.commit()
+
+        self.assertFalse(self.save.called)
+
+    def test_event_is_saved_at_once_without_request(self):
+        self.buffer.add({'acao': 'Cadastrar'})
+
+        self.assertEqual(1, self.save.call_count)
+        self.assertEqual([], self.callbacks)
@@ -0,0 +1,268 @@
+# -*- coding: utf-8 -*-
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Per-network index of free addresses.
+
+Addresses are stored as offsets relative to the network address, so offset 0
+is the network address and offset ``size - 1`` is the broadcast address.
+
+IPv4 networks use a bitmap (one bit per address, kept in a python long),
+IPv6 networks use a sorted list of used offsets since their address space
+can not be represented as a bitmap.
+
+Indexes are kept in the django cache and updated by the Ip/Ipv6 signals.
+The cache is only a hint: callers must confirm a candidate against the
+database (see ``select_free``) and the index heals itself when it is stale.
+Signals run before commit, so an address of a rolled back transaction (or
+of a lost concurrent update of the cache) may stay marked as used; before
+reporting that there are no free addresses, the index is rebuilt from the
+database.
+"""
+import logging
+from bisect import bisect_left
+from bisect import bisect_right
+from bisect import insort
+
+from django.core.cache import cache as djangocache
+
+log = logging.getLogger(__name__)
+
+FREE_INDEX_CACHE_TIMEOUT = 3600
+FREE_INDEX_CACHE_PREFIX = 'FREE_IP_INDEX'
+
+
+class BitmapIndex(object):
+
+    """Free-address index backed by a bitmap of used offsets."""
+
+    def __init__(self, network, size, used=()):
+        self.network = network
+        self.size = size
+        self.bits = 0
+        for offset in used:
+            self.mark_used(offset)
+
+    def is_used(self, offset):
+        return bool(self.bits >> offset & 1)
+
+    def mark_used(self, offset):
+        if 0 <= offset < self.size:
+            self.bits |= 1 << offset
+
+    def mark_free(self, offset):
+        if 0 <= offset < self.size:
+            self.bits &= ~(1 << offset)
+
+    def _free_mask(self, lo, hi):
+        lo = max(lo, 0)
+        hi = min(hi, self.size - 1)
+        if lo > hi:
+            return 0
+        return ((1 << (hi + 1)) - (1 << lo)) & ~self.bits
+
+    def first_free(self, lo, hi):
+        free = self._free_mask(lo, hi)
+        if not free:
+            return None
+        return (free & -free).bit_length() - 1
+
+    def last_free(self, lo, hi):
+        free = self._free_mask(lo, hi)
+        if not free:
+            return None
+        return free.bit_length() - 1
+
+    def next_free(self, count, lo, hi):
+        free = self._free_mask(lo, hi)
+        offsets = list()
+        while free and len(offsets) < count:
+            lowest = free & -free
+            offsets.append(lowest.bit_length() - 1)
+            free ^= lowest
+        return offsets
+
+
+class IntervalIndex(object):
+
+    """Free-address index backed by a sorted list of used offsets."""
+
+    def __init__(self, network, size, used=()):
+        self.network = network
+        self.size = size
+        self.used = sorted(set(offset for offset in used
+                               if 0 <= offset < size))
+
+    def is_used(self, offset):
+        pos = bisect_left(self.used, offset)
+        return pos < len(self.used) and self.used[pos] == offset
+
+    def mark_used(self, offset):
+        if 0 <= offset < self.size and not self.is_used(offset):
+            insort(self.used, offset)
+
+    def mark_free(self, offset):
+        pos = bisect_left(self.used, offset)
+        if pos < len(self.used) and self.used[pos] == offset:
+            del self.used[pos]
+
+    def first_free(self, lo, hi):
+        lo = max(lo, 0)
+        hi = min(hi, self.size - 1)
+        pos = bisect_left(self.used, lo)
+        candidate = lo
+        while pos < len(self.used) and self.used[pos] == candidate:
+            candidate += 1
+            pos += 1
+        return candidate if candidate <= hi else None
+
+    def last_free(self, lo, hi):
+        lo = max(lo, 0)
+        hi = min(hi, self.size - 1)
+        pos = bisect_right(self.used, hi) - 1
+        candidate = hi
+        while pos >= 0 and self.used[pos] == candidate:
+            candidate -= 1
+            pos -= 1
+        return candidate if candidate >= lo else None
+
+    def next_free(self, count, lo, hi):
+        offsets = list()
+        candidate = self.first_free(lo, hi)
+        while candidate is not None and len(offsets) < count:
+            offsets.append(candidate)
+            candidate = self.first_free(candidate + 1, hi)
+        return offsets
+
+
+def _cache_key(version, network_id):
+    return '%s:%s:%s' % (FREE_INDEX_CACHE_PREFIX, version, network_id)
+
+
+def build_index(version, network, size, used):
+    """Builds a new index for a network of ``size`` addresses."""
+
+    if version == 4:
+        return BitmapIndex(network, size, used)
+    return IntervalIndex(network, size, used)
+
+
+def get_index(version, network_id, network, size, loader):
+    """Returns the cached index of a network, building it when missing.
+
+    @param network: network address as integer.
+    @param size: number of addresses of the network.
+    @param loader: callable returning the used offsets of the network.
+    """
+
+    key = _cache_key(version, network_id)
+    try:
+        index = djangocache.get(key)
+    except Exception as e:
+        log.error(e)
+        index = None
+
+    if index is None or index.network != network or index.size != size:
+        index = build_index(version, network, size, loader())
+        save_index(version, network_id, index)
+
+    return index
+
+
+def save_index(version, network_id, index):
+    try:
+        djangocache.set(_cache_key(version, network_id), index,
+                        FREE_INDEX_CACHE_TIMEOUT)
+    except Exception as e:
+        log.error(e)
+
+
+def update_index(version, network_id, used=None, free=None):
+    """Marks an address as used or free in a cached index, if there is one.
+
+    @param used: address (as integer) to mark as used.
+    @param free: address (as integer) to mark as free.
+    """
+
+    key = _cache_key(version, network_id)
+    try:
+        index = djangocache.get(key)
+        if index is None:
+            return
+        if used is not None:
+            index.mark_used(used - index.network)
+        if free is not None:
+            index.mark_free(free - index.network)
+        djangocache.set(key, index, FREE_INDEX_CACHE_TIMEOUT)
+    except Exception as e:
+        log.error(e)
+
+
+def invalidate_index(version, network_id):
+    try:
+        djangocache.delete(_cache_key(version, network_id))
+    except Exception as e:
+        log.error(e)
+
+
+def select_free(version, network_id, index, lo, hi, is_taken,
+                topdown=False, count=1, loader=None):
+    """Returns up to ``count`` free offsets in [lo, hi].
+
+    Each candidate is confirmed with ``is_taken``; offsets found to be in use
+    are marked in the index, which is saved back when it had to be healed.
+    When less than ``count`` offsets are found and ``loader`` is given, the
+    index is rebuilt with the used offsets it returns and searched again, as
+    offsets marked as used may have never been committed.
+    """
+
+    selected, healed = _select_free(index, lo, hi, is_taken, topdown, count)
+
+    if len(selected) < count and loader is not None:
+        log.info('Rebuilding free index %s of network %s' %
+                 (version, network_id))
+        index = build_index(version, index.network, index.size, loader())
+        selected, _ = _select_free(index, lo, hi, is_taken, topdown, count)
+        healed = True
+
+    if healed:
+        save_index(version, network_id, index)
+
+    return selected
+
+
+def _select_free(index, lo, hi, is_taken, topdown, count):
+    selected = list()
+    healed = False
+    while len(selected) < count:
+        if topdown:
+            offset = index.last_free(lo, hi)
+        else:
+            offset = index.first_free(lo, hi)
+        if offset is None:
+            break
+
+        if is_taken(offset):
+            healed = True
+        else:
+            selected.append(offset)
+
+        # Marks as used so the next lookup moves past this offset; selected
+        # offsets are released again below, the signals mark them on save.
+        index.mark_used(offset)
+
+    for offset in selected:
+        index.mark_free(offset)
+
+    return selected, healed
@@ -20,6 +20,8 @@ from django.core.exceptions import ObjectDoesNotExist
 from django.db import models
 from django.db import transaction
 from django.db.models import get_model
+from django.db.models.signals import post_delete
+from django.db.models.signals import post_save
 from rest_framework import status
 
 from networkapi.ambiente.models import ConfigEnvironmentInvalidError
@@ -52,6 +54,7 @@ from networkapi.infrastructure.ipaddr import IPv4Address
 from networkapi.infrastructure.ipaddr import IPv4Network
 from networkapi.infrastructure.ipaddr import IPv6Address
 from networkapi.infrastructure.ipaddr import IPv6Network
+from networkapi.ip import freeindex
 from networkapi.models.BaseModel import BaseModel
 from networkapi.queue_tools import queue_keys
 from networkapi.queue_tools.rabbitmq import QueueManager
@@ -680,7 +683,8 @@ class NetworkIPv4(BaseModel):
     ##################
     # Methods for V3 #
     ##################
-    def create_v3(self, networkv4, locks_used=[], force=False):
+    def create_v3(self, networkv4, locks_used=[], force=False,
+                  free_space=None):
         """Create new networkIPv4."""
 
         vlan_model = get_app('vlan')
@@ -754,7 +758,8 @@ class NetworkIPv4(BaseModel):
                 # Allocate network for vlan with prefix(optional)
                 try:
                     self.allocate_network_v3(networkv4.get('vlan'),
-                                             networkv4.get('prefix'))
+                                             networkv4.get('prefix'),
+                                             free_space=free_space)
                 except NetworkIPv4AddressNotAvailableError, e:
                     self.log.error(e.message)
                     raise NetworkIPv4ErrorV3(e.message)
@@ -781,6 +786,9 @@ class NetworkIPv4(BaseModel):
                     self.log.error(e.detail)
                     raise NetworkIPv4ErrorV3(e.detail)
 
+                if free_space is not None:
+                    free_space.allocate(net_ip[0])
+
             else:
                 # Was not send correctly
                 raise NetworkIPv4ErrorV3(
@@ -1071,9 +1079,12 @@ class NetworkIPv4(BaseModel):
             self.log.error(u'Error disabling NetworkIPv4.')
             raise NetworkIPv4Error(e, u'Error disabling NetworkIPv4.')
 
-    def allocate_network_v3(self, id_vlan, prefix=None):
+    def allocate_network_v3(self, id_vlan, prefix=None, free_space=None):
         """
             Allocate new NetworkIPv4.
+            When free_space (FreeSpace) is given, it is used instead of
+            networks related with vlan and allocated network is marked
+            as used on it.
             @raise VlanNotFoundError: Vlan is not registered.
             @raise VlanError: Failed to search for the Vlan
             @raise ConfigEnvironmentInvalidError: Invalid Environment
@@ -1091,12 +1102,8 @@ class NetworkIPv4(BaseModel):
 
         self.vlan = vlan_model().get_by_pk(id_vlan)
 
-        nets_envs, netv6 = network.get_networks_related(
-            vrfs=self.vlan.get_vrf(),
-            eqpts=self.vlan.get_eqpt(),
-            has_netv6=False
-        )
-        nets_envs = [IPNetwork(net.networkv4) for net in nets_envs]
+        if free_space is None:
+            free_space = self.vlan.get_free_space(IP_VERSION.IPv4[0])
         network_found = None
 
         try:
@@ -1117,32 +1124,28 @@ class NetworkIPv4(BaseModel):
                 self.log.info(
                     u'Prefix that will be used: %s' % new_prefix)
 
-                free_nets = network.get_free_space_network([net4], nets_envs)
+                subnet = free_space.first_free_subnet(net4, new_prefix)
 
-                for free_net in free_nets:
-                    try:
-                        subnets = free_net.iter_subnets(new_prefix=new_prefix)
-                        subnet = subnets.next()
-                    except Exception:
-                        pass
-                    else:
-                        # Set octs by network generated
-                        self.oct1, self.oct2, self.oct3, self.oct4 = str(
-                            subnet.network).split('.')
-                        # Set block by network generated
-                        self.block = subnet.prefixlen
+                if subnet is not None:
+                    free_space.allocate(subnet)
 
-                        self.broadcast = subnet.broadcast.compressed
-                        mask = subnet.netmask.exploded.split('.')
-                        self.mask_oct1 = mask[0]
-                        self.mask_oct2 = mask[1]
-                        self.mask_oct3 = mask[2]
-                        self.mask_oct4 = mask[3]
+                    # Set octs by network generated
+                    self.oct1, self.oct2, self.oct3, self.oct4 = str(
+                        subnet.network).split('.')
+                    # Set block by network generated
+                    self.block = subnet.prefixlen
 
-                        if not self.network_type:
-                            self.network_type = config.id_network_type
+                    self.broadcast = subnet.broadcast.compressed
+                    mask = subnet.netmask.exploded.split('.')
+                    self.mask_oct1 = mask[0]
+                    self.mask_oct2 = mask[1]
+                    self.mask_oct3 = mask[2]
+                    self.mask_oct4 = mask[3]
 
-                        return
+                    if not self.network_type:
+                        self.network_type = config.id_network_type
+
+                    return
 
             # Checks if found any available network
             if network_found is None:
@@ -1155,6 +1158,81 @@ class NetworkIPv4(BaseModel):
             self.log.error(u'Invalid Configuration')
             raise ConfigEnvironmentInvalidError(e, u'Invalid Configuration')
 
+    @classmethod
+    def create_many_v3(cls, networks, locks_used=[], force=False):
+        """Create a list of networkIPv4.
+
+        Locks of all environments related are taken once and free space of
+        each group of vlans sharing vrfs and equipments is computed once,
+        so many networks are allocated without recomputing it.
+        """
+
+        vlan_model = get_app('vlan')
+
+        try:
+            vlans = dict()
+            locks_name = list()
+            for networkv4 in networks:
+                id_vlan = networkv4.get('vlan')
+                if id_vlan in vlans:
+                    continue
+
+                vlan = vlan_model.Vlan().get_by_pk(id_vlan)
+                vlans[id_vlan] = vlan
+
+                # Get environments related
+                envs = vlan.get_environment_related(use_vrf=True) \
+                    .values_list('id', flat=True)
+                for env in envs:
+                    lock_name = LOCK_ENVIRONMENT_ALLOCATES % env
+                    if lock_name not in locks_used:
+                        locks_name.append(lock_name)
+
+        except vlan_model.VlanNotFoundError, e:
+            cls.log.error(e.message)
+            raise InvalidInputException(e.message)
+
+        except Exception, e:
+            cls.log.error(e)
+            raise NetworkIPv4ErrorV3(e)
+
+        # Create Locks
+        locks_name = list(set(locks_name))
+        locks_list = create_lock_with_blocking(locks_name)
+
+        try:
+            # Free space is computed only after locks were taken
+            free_spaces = dict()
+            vlan_spaces = dict()
+            for id_vlan, vlan in vlans.items():
+                key = vlan.get_free_space_key()
+                if key not in free_spaces:
+                    free_spaces[key] = vlan.get_free_space(
+                        IP_VERSION.IPv4[0])
+                vlan_spaces[id_vlan] = free_spaces[key]
+
+            locks = locks_name + locks_used
+            netv4_objs = list()
+            for networkv4 in networks:
+                netv4_obj = cls()
+                free_space = vlan_spaces[networkv4.get('vlan')]
+                netv4_obj.create_v3(
+                    networkv4, locks_used=locks, force=force,
+                    free_space=free_space)
+                netv4_objs.append(netv4_obj)
+
+                # Groups of vlans may share some networks related, so
+                # network created is not offered by other groups either
+                net_ip = IPNetwork(netv4_obj.networkv4)
+                for other_space in free_spaces.values():
+                    if other_space is not free_space:
+                        other_space.allocate(net_ip)
+
+        finally:
+            destroy_lock(locks_list)
+
+        return netv4_objs
+
 
 class Ip(BaseModel):
     id = models.AutoField(
@@ -1298,6 +1376,56 @@ class Ip(BaseModel):
             self.log.error(u'Failure to delete the IP.')
             raise IpError(e, u'Failure to delete the IP')
 
+    @classmethod
+    def get_free_index(cls, networkipv4, net4):
+        """Get the index of free IPv4 addresses of networkIPv4
+            @return: freeindex.BitmapIndex with offsets relative to the
+                     network address
+        """
+
+        return freeindex.get_index(4, networkipv4.id, int(net4.network),
+                                   net4.numhosts,
+                                   cls._used_offsets_loader(networkipv4, net4))
+
+    @classmethod
+    def _used_offsets_loader(cls, networkipv4, net4):
+        """Returns function that reads offsets of Ipv4 of networkIPv4."""
+
+        network_int = int(net4.network)
+
+        def loader():
+            octs = Ip.objects.filter(networkipv4__id=networkipv4.id) \
+                .values_list('oct1', 'oct2', 'oct3', 'oct4')
+            return [(oct1 << 24 | oct2 << 16 | oct3 << 8 | oct4) - network_int
+                    for oct1, oct2, oct3, oct4 in octs]
+
+        return loader
+
+    @classmethod
+    def select_free_ips(cls, networkipv4, net4, first, last, topdown=False,
+                        count=1):
+        """Get up to count available Ipv4 between the offsets first and last
+            of networkIPv4, checking each one against the database.
+            @return: List of IPv4Address
+        """
+
+        network_int = int(net4.network)
+
+        def is_taken(offset):
+            oct1, oct2, oct3, oct4 = str(
+                IPv4Address(network_int + offset)).split('.')
+            return Ip.objects.filter(
+                networkipv4__id=networkipv4.id, oct1=oct1, oct2=oct2,
+                oct3=oct3, oct4=oct4).exists()
+
+        index = cls.get_free_index(networkipv4, net4)
+        offsets = freeindex.select_free(4, networkipv4.id, index, first, last,
+                                        is_taken, topdown=topdown, count=count,
+                                        loader=cls._used_offsets_loader(
+                                            networkipv4, net4))
+
+        return [IPv4Address(network_int + offset) for offset in offsets]
+
     @classmethod
     def get_available_ip(cls, id_network):
         """Get a available Ipv4 for networkIPv4
@@ -1305,43 +1433,39 @@ class Ip(BaseModel):
             @raise IpNotAvailableError: NetworkIPv4 does not has available Ipv4
         """
 
+        ips = cls.get_available_ips(id_network, 1)
+
+        return ips[0]
+
+    @classmethod
+    def get_available_ips(cls, id_network, count):
+        """Get the next count available Ipv4 for networkIPv4
+            @return: List of available Ipv4
+            @raise IpNotAvailableError: NetworkIPv4 does not has available Ipv4
+        """
+
         configuration = get_model('config', 'Configuration')
         networkipv4 = NetworkIPv4().get_by_pk(id_network)
 
         # Cast to API
         net4 = IPv4Network(networkipv4.networkv4)
 
-        # Find all ips ralated to network
-        ips = Ip.objects.filter(networkipv4__id=networkipv4.id)
-
-        # Cast all to API class
-        ipsv4 = set([IPv4Address(ip.ip_formated) for ip in ips])
-
         # Get configuration
         conf = configuration.get()
 
-        selected_ip = None
-
-        # For each ip generated
-        i = 0
-        for ip in net4.iterhosts():
-
-            # Do not use some range of IPs (config)
-            i = i + 1
-            if i >= conf.IPv4_MIN and i < (net4.numhosts - conf.IPv4_MAX):
-
-                # If IP generated was not used
-                if ip not in ipsv4:
-                    # Use it
-                    selected_ip = ip
+        # Do not use some range of IPs (config), network and broadcast
+        first = max(1, conf.IPv4_MIN)
+        last = min(net4.numhosts - 2, net4.numhosts - conf.IPv4_MAX - 1)
 
-                    # Stop generation
-                    return selected_ip
+        selected_ips = cls.select_free_ips(networkipv4, net4, first, last,
+                                           count=count)
 
-        if selected_ip is None:
+        if not selected_ips:
             raise IpNotAvailableError(
                 None, u'No IP available to NETWORK %s.' % networkipv4.id)
 
+        return selected_ips
+
     @classmethod
     def get_first_available_ip(cls, id_network, topdown=False):
         """Get a first available Ipv4 for networkIPv4
@@ -1354,34 +1478,16 @@ class Ip(BaseModel):
         # Cast to API
         net4 = IPv4Network(networkipv4.networkv4)
 
-        # Find all ips ralated to network
-        ips = Ip.objects.filter(networkipv4__id=networkipv4.id)
-
-        # Cast all to API class
-        ipsv4 = set([IPv4Address(ip.ip_formated) for ip in ips])
-
-        selected_ip = None
-
-        if topdown:
-            method = net4.iterhostsTopDown
-        else:
-            method = net4.iterhosts
-
-        # For each ip generated
-        for ip in method():
-
-            # If IP generated was not used
-            if ip not in ipsv4:
-                # Use it
-                selected_ip = ip
+        # All hosts, except network and broadcast
+        selected_ips = cls.select_free_ips(networkipv4, net4, 1,
+                                           net4.numhosts - 2, topdown=topdown)
 
-                # Stop generation
-                return selected_ip
-
-        if selected_ip is None:
+        if not selected_ips:
             raise IpNotAvailableError(
                 None, u'No IP available to NETWORK %s.' % networkipv4.id)
 
+        return selected_ips[0]
+
     def edit_ipv4(self, user):
         try:
 
@@ -2185,62 +2291,31 @@ class Ip(BaseModel):
         # Cast to API
         net4 = IPNetwork(self.networkipv4.networkv4)
 
-        # Find all ips ralated to network
-        ips = self.networkipv4.ip_set.all()
-
-        # Cast all to API class
-        ipsv4 = set([IPv4Address(ip.ip_formated) for ip in ips])
-
-        # Get configuration
-        conf = configuration.get()
-
-        selected_ip = None
-
-        # For each ip generated
-        i = 0
-
         # To use all IPs in a network
         if reserve_all:
-
-            # Define a IPs list, include network and broadcast addresses
-            all_ips = [net4.network] # Append the network address to list
-            for ip in net4.iterhosts(): # Append all usable IP addresses to list
-                all_ips.append(ip)
-            all_ips.append(net4.broadcast) # Append broadcast address to list
-
-            # Search for an available IP
-            for ip in all_ips:
-                i += 1
-
-                # Validate if the current IP is not already used.
-                if ip not in ipsv4:
-
-                    # Found a available IP
-                    selected_ip = ip
-                    break
+            # Include network and broadcast addresses
+            first = 0
+            last = net4.numhosts - 1
 
         else:
-            for ip in net4.iterhosts():
-
-                # Do not use some range of IPs (config)
-                # IPv4_MIN = Firsts
-                # IPv4_MAX = Number minimum of Ip reserveds
-                # First IP and 2 last I
-                i = i + 1
-                if i >= conf.IPv4_MIN and i < (net4.numhosts - conf.IPv4_MAX):
+            # Get configuration
+            conf = configuration.get()
 
-                    # If IP generated was not used
-                    if ip not in ipsv4:
-                        # Use it
-                        selected_ip = ip
+            # Do not use some range of IPs (config)
+            # IPv4_MIN = Firsts
+            # IPv4_MAX = Number minimum of Ip reserveds
+            # First IP and 2 last I
+            first = max(1, conf.IPv4_MIN)
+            last = min(net4.numhosts - 2, net4.numhosts - conf.IPv4_MAX - 1)
 
-                        # Stop generation
-                        break
+        selected_ips = Ip.select_free_ips(self.networkipv4, net4, first, last)
 
-        if selected_ip is None:
+        if not selected_ips:
             raise IpNotAvailableError(None, u'No IP available to VLAN %s.' %
                                       self.networkipv4.vlan.num_vlan)
 
+        selected_ip = selected_ips[0]
+
         self.oct1, self.oct2, self.oct3, self.oct4 = str(
             selected_ip).split('.')
 
@@ -3000,7 +3075,8 @@ class NetworkIPv6(BaseModel):
     ##################
     # Methods for V3 #
     ##################
-    def create_v3(self, networkv6, locks_used=[], force=False):
+    def create_v3(self, networkv6, locks_used=[], force=False,
+                  free_space=None):
         """Create new networkIPv6."""
 
         vlan_model = get_app('vlan')
@@ -3086,7 +3162,8 @@ class NetworkIPv6(BaseModel):
 
                 try:
                     self.allocate_network_v3(networkv6.get('vlan'),
-                                             networkv6.get('prefix'))
+                                             networkv6.get('prefix'),
+                                             free_space=free_space)
                 except NetworkIPv6AddressNotAvailableError, e:
                     self.log.error(e.message)
                     raise NetworkIPv6ErrorV3(e.message)
@@ -3116,6 +3193,9 @@ class NetworkIPv6(BaseModel):
                     self.log.error(e.detail)
                     raise NetworkIPv6ErrorV3(e.detail)
 
+                if free_space is not None:
+                    free_space.allocate(net_ip[0])
+
                 try:
                     self.validate_v3()
                 except vlan_model.VlanErrorV3, e:
@@ -3419,8 +3499,11 @@ class NetworkIPv6(BaseModel):
             self.log.error(u'Error disabling NetworkIPv6.')
             raise NetworkIPv6ErrorV3(e, u'Error disabling NetworkIPv6.')
 
-    def allocate_network_v3(self, id_vlan, prefix=None):
+    def allocate_network_v3(self, id_vlan, prefix=None, free_space=None):
         """Allocate new NetworkIPv6
+            When free_space (FreeSpace) is given, it is used instead of
+            networks related with vlan and allocated network is marked
+            as used on it.
             @raise VlanNotFoundError: Vlan is not registered.
             @raise VlanError: Failed to search for the Vlan
             @raise ConfigEnvironmentInvalidError: Invalid Environment
@@ -3438,12 +3521,8 @@ class NetworkIPv6(BaseModel):
 
         self.vlan = vlan_model().get_by_pk(id_vlan)
 
-        netv4, nets_envs = network.get_networks_related(
-            vrfs=self.vlan.get_vrf(),
-            eqpts=self.vlan.get_eqpt(),
-            has_netv4=False
-        )
-        nets_envs = [IPNetwork(net.networkv6) for net in nets_envs]
+        if free_space is None:
+            free_space = self.vlan.get_free_space(IP_VERSION.IPv6[0])
         network_found = None
 
         try:
@@ -3464,38 +3543,33 @@ class NetworkIPv6(BaseModel):
                 self.log.info(
                     u'Prefix that will be used: %s' % new_prefix)
 
-                free_nets = network.get_free_space_network([net6], nets_envs)
-
-                for free_net in free_nets:
-                    try:
-                        subnets = free_net.iter_subnets(new_prefix=new_prefix)
-                        subnet = subnets.next()
-                    except Exception:
-                        pass
-                    else:
-
-                        # Set octs by network generated
-                        self.block1, self.block2, self.block3, self.block4, \
-                        self.block5, self.block6, self.block7, \
-                        self.block8 = str(
-                            subnet.network.exploded
-                        ).split(':')
-
-                        # Set block by network generated
-                        self.block = subnet.prefixlen
-
-                        mask = subnet.netmask.exploded.split(':')
-                        self.mask1 = mask[0]
-                        self.mask2 = mask[1]
-                        self.mask3 = mask[2]
-                        self.mask4 = mask[3]
-                        self.mask5 = mask[4]
-                        self.mask6 = mask[5]
-                        self.mask7 = mask[6]
-                        self.mask8 = mask[7]
-                        if not self.network_type:
-                            self.network_type = config.network_type
-                        return
+                subnet = free_space.first_free_subnet(net6, new_prefix)
+
+                if subnet is not None:
+                    free_space.allocate(subnet)
+
+                    # Set octs by network generated
+                    self.block1, self.block2, self.block3, self.block4, \
+                    self.block5, self.block6, self.block7, \
+                    self.block8 = str(
+                        subnet.network.exploded
+                    ).split(':')
+
+                    # Set block by network generated
+                    self.block = subnet.prefixlen
+
+                    mask = subnet.netmask.exploded.split(':')
+                    self.mask1 = mask[0]
+                    self.mask2 = mask[1]
+                    self.mask3 = mask[2]
+                    self.mask4 = mask[3]
+                    self.mask5 = mask[4]
+                    self.mask6 = mask[5]
+                    self.mask7 = mask[6]
+                    self.mask8 = mask[7]
+                    if not self.network_type:
+                        self.network_type = config.network_type
+                    return
 
             # Checks if found any available network
             if network_found is None:
@@ -3506,6 +3580,81 @@ class NetworkIPv6(BaseModel):
         except (ValueError, TypeError, AddressValueError), e:
             raise ConfigEnvironmentInvalidError(e, u'Invalid Configuration')
 
+    @classmethod
+    def create_many_v3(cls, networks, locks_used=[], force=False):
+        """Create a list of networkIPv6.
+
+        Locks of all environments related are taken once and free space of
+        each group of vlans sharing vrfs and equipments is computed once,
+        so many networks are allocated without recomputing it.
+        """
+
+        vlan_model = get_app('vlan')
+
+        try:
+            vlans = dict()
+            locks_name = list()
+            for networkv6 in networks:
+                id_vlan = networkv6.get('vlan')
+                if id_vlan in vlans:
+                    continue
+
+                vlan = vlan_model.Vlan().get_by_pk(id_vlan)
+                vlans[id_vlan] = vlan
+
+                # Get environments related
+                envs = vlan.get_environment_related(use_vrf=True) \
+                    .values_list('id', flat=True)
+                for env in envs:
+                    lock_name = LOCK_ENVIRONMENT_ALLOCATES % env
+                    if lock_name not in locks_used:
+                        locks_name.append(lock_name)
+
+        except vlan_model.VlanNotFoundError, e:
+            cls.log.error(e.message)
+            raise InvalidInputException(e.message)
+
+        except Exception, e:
+            cls.log.error(e)
+            raise NetworkIPv6ErrorV3(e)
+
+        # Create Locks
+        locks_name = list(set(locks_name))
+        locks_list = create_lock_with_blocking(locks_name)
+
+        try:
+            # Free space is computed only after locks were taken
+            free_spaces = dict()
+            vlan_spaces = dict()
+            for id_vlan, vlan in vlans.items():
+                key = vlan.get_free_space_key()
+                if key not in free_spaces:
+                    free_spaces[key] = vlan.get_free_space(
+                        IP_VERSION.IPv6[0])
+                vlan_spaces[id_vlan] = free_spaces[key]
+
+            locks = locks_name + locks_used
+            netv6_objs = list()
+            for networkv6 in networks:
+                netv6_obj = cls()
+                free_space = vlan_spaces[networkv6.get('vlan')]
+                netv6_obj.create_v3(
+                    networkv6, locks_used=locks, force=force,
+                    free_space=free_space)
+                netv6_objs.append(netv6_obj)
+
+                # Groups of vlans may share some networks related, so
+                # network created is not offered by other groups either
+                net_ip = IPNetwork(netv6_obj.networkv6)
+                for other_space in free_spaces.values():
+                    if other_space is not free_space:
+                        other_space.allocate(net_ip)
+
+        finally:
+            destroy_lock(locks_list)
+
+        return netv6_objs
+
 
 class Ipv6(BaseModel):
     id = models.AutoField(
@@ -3688,55 +3837,97 @@ class Ipv6(BaseModel):
             cls.log.error(u'Failure to search the IP.')
             raise IpError(e, u'Failure to search the IP')
 
+    @classmethod
+    def get_free_index(cls, networkipv6, net6):
+        """Get the index of free IPv6 addresses of networkIPv6
+            @return: freeindex.IntervalIndex with offsets relative to the
+                     network address
+        """
+
+        return freeindex.get_index(6, networkipv6.id, int(net6.network),
+                                   net6.numhosts,
+                                   cls._used_offsets_loader(networkipv6, net6))
+
+    @classmethod
+    def _used_offsets_loader(cls, networkipv6, net6):
+        """Returns function that reads offsets of Ipv6 of networkIPv6."""
+
+        network_int = int(net6.network)
+
+        def loader():
+            blocks = Ipv6.objects.filter(networkipv6__id=networkipv6.id) \
+                .values_list('block1', 'block2', 'block3', 'block4',
+                             'block5', 'block6', 'block7', 'block8')
+            return [int(IPv6Address(':'.join(block))) - network_int
+                    for block in blocks]
+
+        return loader
+
+    @classmethod
+    def select_free_ips(cls, networkipv6, net6, first, last, topdown=False,
+                        count=1):
+        """Get up to count available Ipv6 between the offsets first and last
+            of networkIPv6, checking each one against the database.
+            @return: List of IPv6Address
+        """
+
+        network_int = int(net6.network)
+
+        def is_taken(offset):
+            block1, block2, block3, block4, block5, block6, block7, block8 = \
+                IPv6Address(network_int + offset).exploded.split(':')
+            return Ipv6.objects.filter(
+                networkipv6__id=networkipv6.id, block1=block1, block2=block2,
+                block3=block3, block4=block4, block5=block5, block6=block6,
+                block7=block7, block8=block8).exists()
+
+        index = cls.get_free_index(networkipv6, net6)
+        offsets = freeindex.select_free(6, networkipv6.id, index, first, last,
+                                        is_taken, topdown=topdown, count=count,
+                                        loader=cls._used_offsets_loader(
+                                            networkipv6, net6))
+
+        return [IPv6Address(network_int + offset) for offset in offsets]
+
     @classmethod
     def get_available_ip6(cls, id_network):
         """Get a available ip6 for network6
             @return: Available IP6
             @raise IpNotAvailableError: NetworkIPv6 does not has available Ip6
         """
+
+        ips = cls.get_available_ips6(id_network, 1)
+
+        return ips[0]
+
+    @classmethod
+    def get_available_ips6(cls, id_network, count):
+        """Get the next count available ip6 for network6
+            @return: List of available IP6
+            @raise IpNotAvailableError: NetworkIPv6 does not has available Ip6
+        """
         configuration = get_model('config', 'Configuration')
 
-        cls.networkipv6 = NetworkIPv6.get_by_pk(id_network)
+        networkipv6 = NetworkIPv6.get_by_pk(id_network)
 
         # Cast to API
-        net6 = IPv6Network('%s:%s:%s:%s:%s:%s:%s:%s/%s' % (
-            cls.networkipv6.block1, cls.networkipv6.block2, cls.networkipv6.block3,
-            cls.networkipv6.block4, cls.networkipv6.block5, cls.networkipv6.block6,
-            cls.networkipv6.block7, cls.networkipv6.block8, cls.networkipv6.block))
-        # Find all ipv6s ralated to network
-        ips = Ipv6.objects.filter(networkipv6__id=cls.networkipv6.id)
-
-        # Cast all to API class
-        ipsv6 = set([(IPv6Address('%s:%s:%s:%s:%s:%s:%s:%s' % (
-            ip.block1, ip.block2, ip.block3, ip.block4, ip.block5, ip.block6, ip.block7, ip.block8))) for ip in ips])
+        net6 = IPv6Network(networkipv6.networkv6)
 
         # Get configuration
         conf = configuration.get()
 
-        selected_ip = None
-
-        # For each ip generated
-        # For each ip generated
-        i = 0
-        for ip in net6.iterhosts():
-
-            # Do not use some range of IPs (config)
-            i = i + 1
-            if i >= conf.IPv6_MIN and i < (net6.numhosts - conf.IPv6_MAX):
+        # Do not use some range of IPs (config), network and broadcast
+        first = max(1, conf.IPv6_MIN)
+        last = min(net6.numhosts - 2, net6.numhosts - conf.IPv6_MAX - 1)
 
-                # If IP generated was not used
-                if ip not in ipsv6:
-                    # Use it
-                    selected_ip = ip
-
-                    return selected_ip.exploded
-
-                    # Stop generation
-                    break
+        selected_ips = cls.select_free_ips(networkipv6, net6, first, last,
+                                           count=count)
 
-        if selected_ip is None:
+        if not selected_ips:
             raise IpNotAvailableError(
-                None, u'No IP6 available to NETWORK %s.' % cls.networkipv6.id)
+                None, u'No IP6 available to NETWORK %s.' % networkipv6.id)
+
+        return [ip.exploded for ip in selected_ips]
 
     @classmethod
     def get_first_available_ip6(cls, id_network, topdown=False):
@@ -3745,45 +3936,20 @@ class Ipv6(BaseModel):
             @raise IpNotAvailableError: NetworkIPv6 does not has available Ip6
         """
 
-        cls.networkipv6 = NetworkIPv6.get_by_pk(id_network)
-        # Cast to API
-        net6 = IPv6Network('%s:%s:%s:%s:%s:%s:%s:%s/%s' % (
-            cls.networkipv6.block1, cls.networkipv6.block2, cls.networkipv6.block3,
-            cls.networkipv6.block4, cls.networkipv6.block5, cls.networkipv6.block6,
-            cls.networkipv6.block7, cls.networkipv6.block8, cls.networkipv6.block))
-        # Find all ipv6s ralated to network
-        ips = Ipv6.objects.filter(networkipv6__id=cls.networkipv6.id)
-        for ip in ips:
-            cls.log.info('ip %s' % ip.block8)
-
-        # Cast all to API class
-        ipsv6 = set([(IPv6Address('%s:%s:%s:%s:%s:%s:%s:%s' % (
-            ip.block1, ip.block2, ip.block3, ip.block4, ip.block5, ip.block6, ip.block7, ip.block8)
-                                  )) for ip in ips])
-
-        selected_ip = None
-
-        if topdown:
-            method = net6.iterhostsTopDown
-        else:
-            method = net6.iterhosts
-
-        # For each ip generated
-        for ip in method():
-
-            # If IP generated was not used
-            if ip not in ipsv6:
-                # Use it
-                selected_ip = ip
+        networkipv6 = NetworkIPv6.get_by_pk(id_network)
 
-                return selected_ip.exploded
+        # Cast to API
+        net6 = IPv6Network(networkipv6.networkv6)
 
-                # Stop generation
-                break
+        # All hosts, except network and broadcast
+        selected_ips = cls.select_free_ips(networkipv6, net6, 1,
+                                           net6.numhosts - 2, topdown=topdown)
 
-        if selected_ip is None:
+        if not selected_ips:
             raise IpNotAvailableError(
-                None, u'No IP6 available to NETWORK %s.' % cls.networkipv6.id)
+                None, u'No IP6 available to NETWORK %s.' % networkipv6.id)
+
+        return selected_ips[0].exploded
 
     def delete_ip6(self, user, id_ip):
         try:
@@ -4616,40 +4782,25 @@ class Ipv6(BaseModel):
         # Cast to API
         net6 = IPNetwork(self.networkipv6.networkv6)
 
-        # Find all ips ralated to network
-        ips = self.networkipv6.ipv6_set.all()
-
-        # Cast all to API class
-        ipsv6 = set([IPv6Address(ip.ip_formated) for ip in ips])
-
         # Get configuration
         conf = configuration.get()
 
-        selected_ip = None
-
-        # For each ip generated
-        i = 0
-        for ip in net6.iterhosts():
+        # Do not use some range of IPs (config)
+        # IPv6_MIN = Firsts
+        # IPv6_MAX = Number minimum of Ip reserveds
+        # First IP and 2 last I
+        first = max(1, conf.IPv6_MIN)
+        last = min(net6.numhosts - 2, net6.numhosts - conf.IPv6_MAX - 1)
 
-            # Do not use some range of IPs (config)
-            # IPv6_MIN = Firsts
-            # IPv6_MAX = Number minimum of Ip reserveds
-            # First IP and 2 last I
-            i = i + 1
-            if i >= conf.IPv6_MIN and i < (net6.numhosts - conf.IPv6_MAX):
+        selected_ips = Ipv6.select_free_ips(self.networkipv6, net6,
+                                            first, last)
 
-                # If IP generated was not used
-                if ip not in ipsv6:
-                    # Use it
-                    selected_ip = ip
-
-                    # Stop generation
-                    break
-
-        if selected_ip is None:
+        if not selected_ips:
             raise IpNotAvailableError(None, u'No IP available to VLAN %s.' %
                                       self.networkipv6.vlan.num_vlan)
 
+        selected_ip = selected_ips[0]
+
         self.block1, self.block2, self.block3, self.block4, self.block5, \
         self.block6, self.block7, self.block8 = str(
             selected_ip.exploded).split(':')
@@ -5077,3 +5228,55 @@ def verify_subnet(vlan, network, version):
 
     # If don't found any subnet return False
     return False
+
+
+def update_free_index_ipv4(sender, instance, created=False, **kwargs):
+    """Keeps the free address index of the network of an Ipv4 up to date."""
+
+    if created:
+        freeindex.update_index(4, instance.networkipv4_id,
+                               used=int(IPv4Address(instance.ip_formated)))
+    else:
+        # Octets may have been changed, so rebuilds index in next search
+        freeindex.invalidate_index(4, instance.networkipv4_id)
+
+
+def release_free_index_ipv4(sender, instance, **kwargs):
+
+    freeindex.update_index(4, instance.networkipv4_id,
+                           free=int(IPv4Address(instance.ip_formated)))
+
+
+def update_free_index_ipv6(sender, instance, created=False, **kwargs):
+    """Keeps the free address index of the network of an Ipv6 up to date."""
+
+    if created:
+        freeindex.update_index(6, instance.networkipv6_id,
+                               used=int(IPv6Address(instance.ip_formated)))
+    else:
+        # Blocks may have been changed, so rebuilds index in next search
+        freeindex.invalidate_index(6, instance.networkipv6_id)
+
+
+def release_free_index_ipv6(sender, instance, **kwargs):
+
+    freeindex.update_index(6, instance.networkipv6_id,
+                           free=int(IPv6Address(instance.ip_formated)))
+
+
+def invalidate_free_index_networkipv4(sender, instance, **kwargs):
+
+    freeindex.invalidate_index(4, instance.id)
+
+
+def invalidate_free_index_networkipv6(sender, instance, **kwargs):
+
+    freeindex.invalidate_index(6, instance.id)
+
+
+post_save.connect(update_free_index_ipv4, sender=Ip)
+post_delete.connect(release_free_index_ipv4, sender=Ip)
+post_save.connect(update_free_index_ipv6, sender=Ipv6)
+post_delete.connect(release_free_index_ipv6, sender=Ipv6)
+post_delete.connect(invalidate_free_index_networkipv4, sender=NetworkIPv4)
+post_delete.connect(invalidate_free_index_networkipv6, sender=NetworkIPv6)
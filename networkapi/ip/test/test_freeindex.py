@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import unittest
+
+from mock import patch
+
+from networkapi.ip import freeindex
+from networkapi.ip.freeindex import BitmapIndex
+from networkapi.ip.freeindex import IntervalIndex
+
+
+class FreeIndexTestCase(unittest.TestCase):
+
+    used = [0, 1, 2, 5, 255]
+
+    def indexes(self):
+        return [BitmapIndex(0, 256, self.used),
+                IntervalIndex(0, 256, self.used)]
+
+    def test_first_free(self):
+        for index in self.indexes():
+            self.assertEqual(3, index.first_free(1, 254))
+            self.assertEqual(6, index.first_free(5, 254))
+            self.assertIsNone(index.first_free(0, 2))
+
+    def test_last_free(self):
+        for index in self.indexes():
+            self.assertEqual(254, index.last_free(1, 254))
+            self.assertEqual(4, index.last_free(1, 5))
+            self.assertIsNone(index.last_free(255, 255))
+
+    def test_next_free(self):
+        for index in self.indexes():
+            self.assertEqual([3, 4, 6], index.next_free(3, 1, 254))
+            self.assertEqual([3, 4], index.next_free(3, 1, 5))
+
+    def test_mark_used_and_free(self):
+        for index in self.indexes():
+            index.mark_used(3)
+            self.assertTrue(index.is_used(3))
+            self.assertEqual(4, index.first_free(1, 254))
+            index.mark_free(1)
+            self.assertFalse(index.is_used(1))
+            self.assertEqual(1, index.first_free(1, 254))
+
+    @patch('networkapi.ip.freeindex.save_index')
+    def test_select_free_heals_stale_index(self, save_index):
+        index = BitmapIndex(0, 256, self.used)
+
+        selected = freeindex.select_free(
+            4, 1, index, 1, 254, lambda offset: offset == 3, count=2)
+
+        self.assertEqual([4, 6], selected)
+        self.assertTrue(index.is_used(3))
+        self.assertFalse(index.is_used(4))
+        save_index.assert_called_once_with(4, 1, index)
+
+    @patch('networkapi.ip.freeindex.save_index')
+    def test_select_free_rebuilds_index_before_exhaustion(self, save_index):
+        # Offset 3 was marked by an insert that was rolled back
+        index = BitmapIndex(0, 8, [0, 1, 2, 3, 4, 5, 6, 7])
+
+        selected = freeindex.select_free(
+            4, 1, index, 1, 6, lambda offset: False,
+            loader=lambda: [0, 1, 2, 4, 5, 6, 7])
+
+        self.assertEqual([3], selected)
+        rebuilt = save_index.call_args[0][2]
+        self.assertFalse(rebuilt.is_used(3))
+        self.assertTrue(rebuilt.is_used(4))
@@ -56,7 +56,10 @@ class TrackingRequestOnThreadLocalMiddleware(object):
 
     def process_request(self, request):
 
+        from networkapi.eventlog.audit import events_buffer
         from networkapi.eventlog.models import AuditRequest
+
+        events_buffer.start()
         if not request.user.is_anonymous():
             ip = self._get_ip(request)
             context = local.request_context
@@ -73,6 +76,8 @@ class TrackingRequestOnThreadLocalMiddleware(object):
                 user = RestResource.authenticate_user(request)
 
             if user is not None:
+                # Views reuse the user authenticated here
+                request.user = user
                 ip = self._get_ip(request)
                 context = local.request_context
                 identity = local.request_id
@@ -80,7 +85,11 @@ class TrackingRequestOnThreadLocalMiddleware(object):
                                          ip, identity, context)
 
     def process_response(self, request, response):
+        from networkapi.eventlog.audit import events_buffer
         from networkapi.eventlog.models import AuditRequest
+
+        # Only events of committed changes were buffered
+        events_buffer.flush()
         AuditRequest.cleanup_request()
 
         return response
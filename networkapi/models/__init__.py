@@ -13,16 +13,24 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+from django.db.models.signals import m2m_changed
 from django.db.models.signals import post_delete
+from django.db.models.signals import post_init
 from django.db.models.signals import post_save
 from django.db.models.signals import pre_delete
 from django.db.models.signals import pre_save
 
+from networkapi.models.models_signal_receiver import audit_post_init
 from networkapi.models.models_signal_receiver import audit_post_save
 from networkapi.models.models_signal_receiver import audit_pre_delete
 from networkapi.models.models_signal_receiver import audit_pre_save
+from networkapi.models.models_signal_receiver import invalidate_cached_searches
 
 ###### SIGNALS #####
+post_init.connect(audit_post_init)
 pre_save.connect(audit_pre_save)
 post_save.connect(audit_post_save)
 pre_delete.connect(audit_pre_delete)
+post_save.connect(invalidate_cached_searches)
+post_delete.connect(invalidate_cached_searches)
+m2m_changed.connect(invalidate_cached_searches)
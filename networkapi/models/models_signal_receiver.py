@@ -17,13 +17,13 @@ import logging
 import re
 
 from django.core.cache import cache
+from django.core.exceptions import ObjectDoesNotExist
 from django.utils.translation import ugettext_lazy as _
 
-from networkapi.eventlog.models import AuditRequest
+from networkapi.eventlog.audit import add_event
 from networkapi.eventlog.models import EventLog
-from networkapi.eventlog.models import EventLogQueue
-from networkapi.settings import LOG_QUEUE
 from networkapi.util import signals_helper as m2m_audit
+from networkapi.util.transaction_hooks import on_commit
 
 MODEL_LIST = set()
 LOG = logging.getLogger(__name__)
@@ -96,6 +96,48 @@ def dict_diff(old, new):
     return diff
 
 
+def snapshot(instance):
+    """Loaded values of concrete fields, deferred fields are left out."""
+
+    return dict((field.attname, instance.__dict__[field.attname])
+                for field in instance._meta.fields
+                if field.attname in instance.__dict__)
+
+
+def snapshot_diff(instance):
+    """
+    Returns old and new states of fields changed since instance was loaded
+    or saved, or None when instance has no snapshot of its saved state.
+    """
+
+    old_values = getattr(instance, '_audit_snapshot', None)
+    # Instances built with a pk were never loaded
+    if old_values is None or instance._state.adding or \
+            old_values.get(instance._meta.pk.attname) != instance.pk:
+        return None
+
+    old_state = {}
+    new_state = {}
+    for field in instance._meta.fields:
+        if field.attname not in old_values:
+            return None
+        old_value = old_values[field.attname]
+        if old_value == instance.__dict__.get(field.attname):
+            continue
+
+        new_state[field.name] = get_value(instance, field.name)
+        if field.rel is not None and old_value is not None:
+            try:
+                related = field.rel.to._default_manager.get(
+                    **{field.rel.field_name: old_value})
+                old_value = {'id': related.id, 'value': related.__unicode__()}
+            except ObjectDoesNotExist:
+                pass
+        old_state[field.name] = old_value
+
+    return old_state, new_state
+
+
 def format_value(v):
     if isinstance(v, basestring):
         return u"'%s'" % v
@@ -116,15 +158,22 @@ def save_audit(instance, operation, kwargs={}):
     """
 
     m2m_change = kwargs.get('m2m_change', False)
-    event = dict()
     action = None
     try:
         persist_audit = True
 
-        new_state = to_dict(instance)
-        old_state = {}
+        states = None
+        if operation == EventLog.CHANGE and not m2m_change:
+            states = snapshot_diff(instance)
+
+        if states is not None:
+            # Only changed fields, without a query of the saved instance
+            old_state, new_state = states
+        else:
+            new_state = to_dict(instance)
+            old_state = {}
         try:
-            if operation == EventLog.CHANGE and instance.pk:
+            if operation == EventLog.CHANGE and instance.pk and states is None:
                 if not m2m_change:
                     old_state = to_dict(
                         instance.__class__.objects.get(pk=instance.pk))
@@ -183,61 +232,26 @@ def save_audit(instance, operation, kwargs={}):
 
         # LOG.debug("called audit with operation=%s instance=%s persist=%s" % (operation, instance, persist_audit))
         if persist_audit:
-            if m2m_change:
-                for description in descriptions:
-                    # obj_description = (
-                    #     instance and unicode(instance) and '')[:100]
-                    audit_request = AuditRequest.current_request(True)
-
-                    changed_field = changed_fields.pop(0)
-                    old_value_list = {}
-                    new_value_list = {}
-                    for field, (old_value, new_value) in changed_field.items():
-                        old_value_list.update(
-                            {field: handle_unicode(old_value)})
-                        new_value_list.update(
-                            {field: handle_unicode(new_value)})
-
-                    event['acao'] = 'Alterar' if action is None else action
-                    event['funcionalidade'] = instance.__class__.__name__
-                    event['parametro_anterior'] = old_value_list
-                    event['parametro_atual'] = new_value_list
-                    event['id_objeto'] = instance.pk
-                    event['audit_request'] = audit_request
-                    # save the event log
-                    if audit_request:
-                        EventLog.log(audit_request.user, event)
-                        if LOG_QUEUE:
-                            EventLogQueue.log(audit_request.user, event)
-                    else:
-                        EventLog.log(None, event)
-                        if LOG_QUEUE:
-                            EventLogQueue.log(None, event)
-
-            else:
-                # obj_description = (instance and unicode(instance) and '')[:100]
-                audit_request = AuditRequest.current_request(True)
+            if not m2m_change:
+                changed_fields = [changed_fields]
+                descriptions = [description]
 
+            for description in descriptions:
+                changed_field = changed_fields.pop(0)
                 old_value_list = {}
                 new_value_list = {}
-                for field, (old_value, new_value) in changed_fields.items():
+                for field, (old_value, new_value) in changed_field.items():
                     old_value_list.update({field: handle_unicode(old_value)})
                     new_value_list.update({field: handle_unicode(new_value)})
 
-                event['acao'] = 'Alterar' if action is None else action
-                event['funcionalidade'] = instance.__class__.__name__
-                event['parametro_anterior'] = old_value_list
-                event['parametro_atual'] = new_value_list
-                event['id_objeto'] = instance.pk
-                event['audit_request'] = audit_request
-                if audit_request:
-                    EventLog.log(audit_request.user, event)
-                    if LOG_QUEUE:
-                        EventLogQueue.log(audit_request.user, event)
-                else:
-                    EventLog.log(None, event)
-                    if LOG_QUEUE:
-                        EventLogQueue.log(None, event)
+                # saved with the other events of request
+                add_event({
+                    'acao': 'Alterar' if action is None else action,
+                    'funcionalidade': instance.__class__.__name__,
+                    'parametro_anterior': old_value_list,
+                    'parametro_atual': new_value_list,
+                    'id_objeto': instance.pk,
+                })
     except:
         LOG.error(u'Error registering auditing to %s: (%s) %s',
                   repr(instance), type(instance), getattr(instance, '__dict__', None), exc_info=True)
@@ -291,6 +305,48 @@ def audit_post_save(sender, instance, created, **kwargs):
     if created:
         save_audit(instance, EventLog.ADD)
 
+    instance._audit_snapshot = snapshot(instance)
+
+
+def audit_post_init(sender, instance, **kwargs):
+
+    from networkapi.models.BaseModel import BaseModel
+
+    if (not issubclass(instance.__class__, BaseModel)):
+        return
+
+    instance._audit_snapshot = snapshot(instance)
+
+
+def _invalidate_searches():
+    # appcache imports system.facade, which imports this module
+    from networkapi.util.appcache import delete_cached_searches_list
+    from networkapi.util.appcache import SEARCH_CACHE_ENTRY
+
+    try:
+        delete_cached_searches_list(SEARCH_CACHE_ENTRY)
+    except Exception:
+        LOG.error(u'Error invalidating cached searches', exc_info=True)
+
+
+def invalidate_searches():
+    """Invalidates cached searches when the transaction commits.
+
+    Called by signals, and directly after QuerySet.update, which sends none.
+    """
+
+    on_commit(_invalidate_searches)
+
+
+def invalidate_cached_searches(sender, instance, **kwargs):
+
+    from networkapi.models.BaseModel import BaseModel
+
+    if (not issubclass(instance.__class__, BaseModel)):
+        return
+
+    invalidate_searches()
+
 
 def handle_unicode(s):
     if isinstance(s, basestring):
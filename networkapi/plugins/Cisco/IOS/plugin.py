@@ -17,6 +17,7 @@ import logging
 import re
 
 from ...base import BasePlugin
+from ...sshpool import session_privilege
 from networkapi.util.decorators import mock_return
 # from networkapi.api_rest import exceptions as api_exceptions
 # from networkapi.plugins import exceptions as base_exceptions
@@ -61,6 +62,7 @@ class IOS(BasePlugin):
         return recv
 
     @mock_return('')
+    @session_privilege
     def ensure_privilege_level(self, privilege_level=None):
 
         if privilege_level is None:
@@ -17,6 +17,7 @@ import logging
 import re
 
 from ...base import BasePlugin
+from ...sshpool import session_privilege
 from networkapi.plugins.Cisco.NXOS.BGP.Cli import Generic as BGP
 from networkapi.util.decorators import mock_return
 
@@ -80,11 +81,13 @@ class NXOS(BasePlugin):
         return recv
 
     @mock_return('')
+    @session_privilege
     def ensure_privilege_level(self, privilege_level=None):
 
         if privilege_level is None:
             privilege_level = self.admin_privileges
 
+        self.channel.send('\n')
         recv = self.waitString('>|#')
         self.channel.send('show privilege\n')
         recv = self.waitString('Current privilege level:')
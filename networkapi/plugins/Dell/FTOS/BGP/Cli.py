@@ -34,6 +34,7 @@ from networkapi.extra_logging import NO_REQUEST_ID
 from networkapi.infrastructure.ipaddr import IPAddress
 from networkapi.plugins import exceptions as plugin_exc
 from networkapi.plugins.base import BasePlugin
+from networkapi.plugins.sshpool import session_privilege
 from networkapi.settings import BGP_CONFIG_FILES_PATH
 from networkapi.settings import BGP_CONFIG_TEMPLATE_PATH
 from networkapi.settings import BGP_CONFIG_TOAPPLY_REL_PATH
@@ -455,6 +456,7 @@ class Generic(BasePlugin):
 
         return recv
 
+    @session_privilege
     def _ensure_privilege_level(self, privilege_level=None):
 
         if privilege_level is None:
@@ -16,9 +16,11 @@
 import logging
 import re
 from time import sleep
+from time import time
 
 from ... import exceptions
 from ...base import BasePlugin
+from ...sshpool import session_privilege
 from networkapi.api_rest import exceptions as api_exceptions
 from networkapi.plugins.Dell.FTOS.BGP.Cli import Generic as BGP
 from networkapi.util.decorators import mock_return
@@ -31,7 +33,6 @@ class FTOS(BasePlugin):
 
     MAX_TRIES = 10
     RETRY_WAIT_TIME = 5
-    WAIT_FOR_CLI_RETURN = 1
     CURRENTLY_BUSY_WAIT = 'Currently busy with copying a file'
     INVALID_REGEX = '([Ii]nvalid)|overlaps with'
     WARNING_REGEX = 'config ignored|Warning|Dynamic member cannot be statically removed'
@@ -124,6 +125,7 @@ class FTOS(BasePlugin):
         return recv
 
     @mock_return('')
+    @session_privilege
     def ensure_privilege_level(self, privilege_level=None):
 
         if privilege_level is None:
@@ -178,37 +180,47 @@ class FTOS(BasePlugin):
         if wait_str_failed_regex is None:
             wait_str_failed_regex = self.ERROR_REGEX
 
-        string_ok = 0
-        recv_string = ''
-        while not string_ok:
-            while not self.channel.recv_ready():
-                sleep(self.WAIT_FOR_CLI_RETURN)
-
-            recv_string = self.channel.recv(9999)
-            file_name_string = self.removeDisallowedChars(recv_string)
+        ok_regex = self.compile_regex(wait_str_ok_regex)
+        invalid_regex = self.compile_regex(wait_str_invalid_regex)
+        failed_regex = self.compile_regex(wait_str_failed_regex)
+        busy_regex = self.compile_regex(self.CURRENTLY_BUSY_WAIT)
+        warning_regex = self.compile_regex(self.WARNING_REGEX)
+        tftp_put_regex = self.compile_regex(self.VALID_TFTP_PUT_MESSAGE_OS10)
 
-            for output_line in recv_string.splitlines():
-                if re.search(self.CURRENTLY_BUSY_WAIT, output_line):
+        start = time()
+        # Last line without end of line is checked again with next output
+        pending = ''
+        string_ok = 0
+        for data, window, recv_string in self.read_output():
+            output_lines = (pending + data).splitlines()
+            if output_lines and not data.endswith(('\n', '\r')):
+                pending = output_lines[-1]
+            else:
+                pending = ''
+            file_name_string = self.removeDisallowedChars(window)
+
+            for output_line in output_lines:
+                if busy_regex.search(output_line):
                     log.warning('Need to wait - Switch busy: %s' % output_line)
                     raise exceptions.CurrentlyBusyErrorException()
-                elif re.search(self.WARNING_REGEX, output_line):
+                elif warning_regex.search(output_line):
                     log.warning('Equipment warning: %s' % output_line)
-                elif re.search(wait_str_invalid_regex, output_line):
+                elif invalid_regex.search(output_line):
                     log.error('Equipment raised INVALID error: %s' %
                               output_line)
                     raise exceptions.CommandErrorException(file_name_string)
-                elif re.search(wait_str_failed_regex, output_line):
+                elif failed_regex.search(output_line):
                     log.error('Equipment raised FAILED error: %s' %
                               output_line)
                     raise exceptions.InvalidCommandException(file_name_string)
-                elif re.search(wait_str_ok_regex, output_line):
+                elif ok_regex.search(output_line):
                     log.debug('Equipment output: %s' % output_line)
 
                     if output_line == '0 bytes successfully copied':
                         log.debug('Switch copied 0 bytes, need to try again.')
                         raise exceptions.CurrentlyBusyErrorException()
                     string_ok = 1
-                elif re.search(self.VALID_TFTP_PUT_MESSAGE_OS10, output_line):
+                elif tftp_put_regex.search(output_line):
                     log.debug('Equipment output: %s' % output_line)
 
                     if output_line == 'Copy failed':
@@ -216,4 +228,8 @@ class FTOS(BasePlugin):
                         raise exceptions.CurrentlyBusyErrorException()
                     string_ok = 1
 
-        return recv_string
+            if string_ok:
+                break
+
+        self.log_wait(wait_str_ok_regex, start, recv_string)
+        return data
@@ -17,7 +17,9 @@ class Lb(object):
         self._hostname = hostname
         self._username = username
         self._password = password
+        self._session = session
         self._time_reconn = 10
+        self._transaction_timeout = None
 
         try:
             self._channel = bigsuds.BIGIP(
@@ -64,8 +66,15 @@ class Lb(object):
                     'There are too many existing user sessions. '
                     'Trying again in %s seconds' % self._time_reconn)
                 sleep(self._time_reconn)
-                self.get_session()
+                return self.get_session()
             else:
                 raise e
         else:
             return channel
+
+    def set_transaction_timeout(self, timeout):
+        """Sets transaction timeout of session once."""
+
+        if self._transaction_timeout != timeout:
+            self._channel.System.Session.set_transaction_timeout(timeout)
+            self._transaction_timeout = timeout
@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+"""Pool of iControl sessions by device, kept by each worker.
+
+Sessions are checked out by the decorators of util and returned when the
+decorated method ends, so consecutive calls to the same device reuse one
+session instead of opening a new BIG-IP connection every time.
+"""
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+import bigsuds
+
+from networkapi.plugins import exceptions as base_exceptions
+from networkapi.plugins.F5 import lb
+from networkapi.system.facade import get_value as get_variable
+
+log = logging.getLogger(__name__)
+
+# Seconds an idle session is kept in pool
+MAX_IDLE = 30
+# Idle seconds after that a session is checked before reused
+HEALTH_CHECK_IDLE = 5
+# Sessions opened at the same time in a device
+MAX_SESSIONS = 4
+# Seconds waiting for a session when device reached max sessions
+WAIT_TIMEOUT = 60
+# Seconds the variables of pool are kept before read again
+SETTINGS_TIMEOUT = 60
+
+
+def get_int_variable(name, default):
+    try:
+        return int(get_variable(name, default))
+    except Exception, e:
+        log.warning('Invalid value of variable %s: %s' % (name, e))
+        return int(default)
+
+
+class SessionPool(object):
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        # key: list of (lb, password, last used)
+        self._idle = dict()
+        # key: number of sessions checked out
+        self._busy = dict()
+        # (max idle, max sessions, read at)
+        self._settings = None
+
+    def _evict(self, key, now, max_idle):
+        idle = self._idle.get(key, list())
+        self._idle[key] = [entry for entry in idle
+                           if now - entry[2] <= max_idle]
+        evicted = len(idle) - len(self._idle[key])
+        if evicted:
+            log.info('Evicted %s idle sessions of %s' % (evicted, key[0]))
+
+    def _get_settings(self, now):
+        """Returns max idle and max sessions, read at most every
+        SETTINGS_TIMEOUT seconds."""
+
+        settings = self._settings
+        if settings is None or now - settings[2] > SETTINGS_TIMEOUT:
+            settings = (
+                get_int_variable('f5_session_pool_max_idle', MAX_IDLE),
+                get_int_variable(
+                    'f5_session_pool_max_sessions', MAX_SESSIONS),
+                now)
+            self._settings = settings
+        return settings[0], settings[1]
+
+    def _is_alive(self, session):
+        try:
+            session._channel.System.SystemInfo.get_version()
+            return True
+        except Exception, e:
+            log.info('Session of %s discarded: %s' % (session._hostname, e))
+            return False
+
+    def acquire(self, fqdn, user, password, session=True):
+        """Returns an idle session of device or a new one."""
+
+        key = (fqdn, user, session)
+        max_idle, max_sessions = self._get_settings(time.time())
+        deadline = time.time() + WAIT_TIMEOUT
+
+        while True:
+            with self._cond:
+                now = time.time()
+                self._evict(key, now, max_idle)
+                idle = self._idle[key]
+                while idle:
+                    lb_session, lb_password, last_used = idle.pop()
+                    if lb_password == password:
+                        break
+                else:
+                    lb_session = None
+                    if self._busy.get(key, 0) >= max_sessions:
+                        if now >= deadline:
+                            raise base_exceptions.CommandErrorException(
+                                'No free session of %s after %s seconds' %
+                                (fqdn, WAIT_TIMEOUT))
+                        self._cond.wait(deadline - now)
+                        continue
+                self._busy[key] = self._busy.get(key, 0) + 1
+
+            try:
+                if lb_session is not None:
+                    if now - last_used <= HEALTH_CHECK_IDLE or \
+                            self._is_alive(lb_session):
+                        log.info('Reusing session of %s' % fqdn)
+                        return lb_session
+                    self.discard(lb_session)
+                    continue
+                return lb.Lb(fqdn, user, password, session)
+            except BaseException:
+                # Frees the slot taken above whatever interrupted it
+                self.discard(lb_session, key)
+                raise
+
+    def release(self, session):
+        """Returns session to pool."""
+
+        key = (session._hostname, session._username, session._session)
+        with self._cond:
+            self._busy[key] -= 1
+            self._idle.setdefault(key, list()).append(
+                (session, session._password, time.time()))
+            self._cond.notify()
+
+    def discard(self, session, key=None):
+        """Drops a checked out session that can not be reused."""
+
+        if key is None:
+            key = (session._hostname, session._username, session._session)
+        with self._cond:
+            self._busy[key] -= 1
+            self._cond.notify()
+
+    def clear(self):
+        with self._cond:
+            self._idle = dict()
+            self._settings = None
+
+
+pool = SessionPool()
+
+
+@contextmanager
+def checkout(equipment, session=True):
+    """Checks out a session of the https access of equipment.
+
+    The session returns to pool when block ends, unless it raised an error
+    that did not come from device.
+    """
+
+    access = equipment.get('access').filter(
+        tipo_acesso__protocolo='https').uniqueResult()
+    lb_session = pool.acquire(access.fqdn, access.user, access.password,
+                              session)
+    try:
+        yield lb_session
+    except bigsuds.OperationFailed:
+        pool.release(lb_session)
+        raise
+    except BaseException:
+        pool.discard(lb_session)
+        raise
+    else:
+        pool.release(lb_session)
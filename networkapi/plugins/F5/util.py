@@ -9,7 +9,7 @@ import bigsuds
 import ipaddress
 
 from networkapi.plugins import exceptions as base_exceptions
-from networkapi.plugins.F5 import lb
+from networkapi.plugins.F5 import sessionpool
 
 log = logging.getLogger(__name__)
 
@@ -31,22 +31,24 @@ def transation(func):
     @wraps(func)
     def inner(self, *args, **kwargs):
         if not kwargs.__contains__('connection') or kwargs['connection']:
+            previous_lb = getattr(self, '_lb', None)
             try:
-                access = args[0].get('access').filter(
-                    tipo_acesso__protocolo='https').uniqueResult()
-                self._lb = lb.Lb(access.fqdn, access.user, access.password)
-                if not kwargs.__contains__('transation') or kwargs['transation']:
-                    log.info('Transaction Started')
-                    with bigsuds.Transaction(self._lb._channel):
+                with sessionpool.checkout(args[0]) as lb_session:
+                    self._lb = lb_session
+                    if not kwargs.__contains__('transation') or kwargs['transation']:
+                        log.info('Transaction Started')
+                        with bigsuds.Transaction(self._lb._channel):
+                            return func(self, *args, **kwargs)
+                    else:
                         return func(self, *args, **kwargs)
-                else:
-                    return func(self, *args, **kwargs)
             except bigsuds.OperationFailed, e:
                 log.error(e)
                 raise base_exceptions.CommandErrorException(e)
             except Exception, e:
                 log.error('Error  %s' % e)
                 raise base_exceptions.CommandErrorException(e)
+            finally:
+                self._lb = previous_lb
         else:
             return func(self, *args, **kwargs)
     return inner
@@ -55,29 +57,33 @@ def transation(func):
 def connection(func):
     @wraps(func)
     def inner(self, *args, **kwargs):
+        previous_lb = getattr(self, '_lb', None)
         try:
-            access = args[0].get('access').filter(
-                tipo_acesso__protocolo='https').uniqueResult()
-            self._lb = lb.Lb(access.fqdn, access.user, access.password)
-            self._lb._channel.System.Session.set_transaction_timeout(60)
-            return func(self, *args, **kwargs)
+            with sessionpool.checkout(args[0]) as lb_session:
+                self._lb = lb_session
+                self._lb.set_transaction_timeout(60)
+                return func(self, *args, **kwargs)
         except bigsuds.OperationFailed, e:
             log.error(e)
             raise base_exceptions.CommandErrorException(e)
+        finally:
+            self._lb = previous_lb
     return inner
 
 
 def connection_simple(func):
     @wraps(func)
     def inner(self, *args, **kwargs):
+        previous_lb = getattr(self, '_lb', None)
         try:
-            access = args[0].get('access').filter(
-                tipo_acesso__protocolo='https').uniqueResult()
-            self._lb = lb.Lb(access.fqdn, access.user, access.password, False)
-            return func(self, *args, **kwargs)
+            with sessionpool.checkout(args[0], False) as lb_session:
+                self._lb = lb_session
+                return func(self, *args, **kwargs)
         except bigsuds.OperationFailed, e:
             log.error(e)
             raise base_exceptions.CommandErrorException(e)
+        finally:
+            self._lb = previous_lb
     return inner
 
 
@@ -14,13 +14,14 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import re
 import logging
 import string
 from time import sleep
+from time import time
 
 from networkapi.plugins import exceptions
 from networkapi.plugins.base import BasePlugin
+from networkapi.plugins.sshpool import session_privilege
 from networkapi.util.decorators import mock_return
 
 log = logging.getLogger(__name__)
@@ -86,6 +87,7 @@ class HPE(BasePlugin):
         return recv
 
     @mock_return('')
+    @session_privilege
     def ensure_privilege_level(self, privilege_level=None):
 
         self.channel.send('\n')
@@ -99,25 +101,26 @@ class HPE(BasePlugin):
         if wait_str_failed_regex is None:
             wait_str_failed_regex = self.ERROR_REGEX
 
-        confirm_regex = "[Y/N]"
+        ok_regex = self.compile_regex(wait_str_ok_regex)
+        invalid_regex = self.compile_regex(wait_str_invalid_regex)
+        failed_regex = self.compile_regex(wait_str_failed_regex)
+        confirm_regex = self.compile_regex('[Y/N]')
         confirm_command = 'Y'
-        string_ok = 0
-        recv_string = ''
-        while not string_ok:
-            while not self.channel.recv_ready():
-                sleep(1)
-            recv_string = self.channel.recv(9999)
-            file_name_string = self.removeDisallowedChars(recv_string)
-            if re.search(wait_str_failed_regex, recv_string):
-                log.error('Equipment raised INVALID error: %s' % recv_string)
+        start = time()
+        for data, window, recv_string in self.read_output():
+            file_name_string = self.removeDisallowedChars(window)
+            if failed_regex.search(window):
+                log.error('Equipment raised INVALID error: %s' % window)
                 raise exceptions.InvalidCommandException(file_name_string)
-            elif re.search(wait_str_invalid_regex, recv_string):
-                log.error('Equipment raised Failed error: %s' % recv_string)
+            elif invalid_regex.search(window):
+                log.error('Equipment raised Failed error: %s' % window)
                 raise exceptions.CommandErrorException(file_name_string)
-            elif re.search(wait_str_ok_regex, recv_string):
-                log.debug('Equipment output: %s' % recv_string)
-                string_ok = 1
-            elif re.search(confirm_regex, recv_string):
+            elif ok_regex.search(window):
+                log.debug('Equipment output: %s' % window)
+                break
+            # Only new output is answered, a question is confirmed once
+            elif confirm_regex.search(data):
                 self.channel.send('%s\n' % confirm_command)
 
-        return recv_string
\ No newline at end of file
+        self.log_wait(wait_str_ok_regex, start, recv_string)
+        return data
@@ -14,17 +14,20 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import hashlib
 import logging
 import json
 from enum import Enum
 
 import requests
+from requests.adapters import HTTPAdapter
 from requests.auth import HTTPBasicAuth
 from requests.exceptions import HTTPError
 
 from django.core.exceptions import ObjectDoesNotExist
 
 from networkapi.plugins import exceptions
+from networkapi.plugins import fanout
 from networkapi.plugins.SDN.base import BaseSdnPlugin
 from networkapi.equipamento.models import EquipamentoAcesso
 from networkapi.plugins.SDN.ODL.flows.acl import AclFlowBuilder
@@ -44,6 +47,12 @@ class ODLPlugin(BaseSdnPlugin):
 
     versions = ["BERYLLIUM", "BORON", "CARBON", "NITROGEN"]
 
+    # Connections kept by controller, used by concurrent pushes to nodes
+    POOL_SIZE = 8
+    # Table is replaced in one request when changes reach this fraction
+    # of the flows of a node
+    TABLE_REPLACE_RATIO = 0.5
+
     def __init__(self, **kwargs):
 
         super(ODLPlugin, self).__init__(**kwargs)
@@ -69,14 +78,24 @@ class ODLPlugin(BaseSdnPlugin):
 
             flows_set = builder.build()
 
-        try:
-            for flows in flows_set:
-                for flow in flows['flow']:
+        if nodes_ids == []:
+            nodes_ids = self._get_nodes_ids()
+
+        flows = [flow for flows in flows_set for flow in flows['flow']]
 
-                    self._flow(flow_id=flow['id'],
-                               method='put',
-                               data=json.dumps({'flow': [flow]}),
-                               nodes_ids=nodes_ids)
+        fanout.run([fanout.PluginCall(
+            node_id, self._put_flows, (node_id, flows)
+        ) for node_id in nodes_ids])
+
+    def _put_flows(self, node_id, flows):
+        """ Sends flows to a node, one request by flow """
+
+        try:
+            for flow in flows:
+                self._flow(flow_id=flow['id'],
+                           method='put',
+                           data=json.dumps({'flow': [flow]}),
+                           nodes_ids=[node_id])
         except HTTPError as e:
             raise exceptions.CommandErrorException(
                                 msg=self._parse_errors(e.response.json()))
@@ -96,29 +115,65 @@ class ODLPlugin(BaseSdnPlugin):
     def update_all_flows(self, data, flow_type=FlowTypes.ACL):
         current_flows = self.get_flows()
 
-        for node in current_flows.keys():
-            log.info("Starting update all flows for node %s"%node)
+        # Flows are built and hashed once for all nodes
+        if flow_type == FlowTypes.ACL:
+            builder = AclFlowBuilder(data, self.environment, version=self.version)
+            new_flows = [flow for flows in builder.build()
+                         for flow in flows['flow']]
+
+        new_hashes = dict((flow['id'], self._hash_flow(flow))
+                          for flow in new_flows)
 
-            if flow_type == FlowTypes.ACL:
-                builder = AclFlowBuilder(data, self.environment, version=self.version)
-                new_flows_set = builder.build()
+        fanout.run([fanout.PluginCall(
+            node, self._sync_flows,
+            (node, current_flows[node], new_flows, new_hashes)
+        ) for node in current_flows.keys()])
 
-            operations = self._diff_flows(current_flows[node], new_flows_set)
+    def _sync_flows(self, node, current_data, new_flows, new_hashes):
+        """ Sends to node only the flows that changed """
 
-            try:
-                for flow in operations["delete"]:
-                    self.del_flow(flow_id=flow['id'], nodes_ids=[node])
+        log.info("Starting update all flows for node %s"%node)
 
-                for flow in operations["insert"]:
-                    self._flow(flow_id=flow['id'],
-                               method='put',
-                               data=json.dumps({'flow': [flow]}),
-                               nodes_ids=[node])
+        operations = self._diff_flows(current_data, new_flows, new_hashes)
+        changes = len(operations["delete"]) + len(operations["insert"])
 
-            except Exception as e:
-                message = self._parse_errors(e.response.json())
-                log.error("ERROR while updating all flows: %s" % message)
-                raise exceptions.CommandErrorException(msg=message)
+        try:
+            if changes > 1 and \
+                    changes >= len(new_flows) * self.TABLE_REPLACE_RATIO:
+                log.info("Replacing table of node %s (%s changes)" %
+                         (node, changes))
+                self._put_table(node, new_flows)
+                return
+
+            for flow in operations["delete"]:
+                self.del_flow(flow_id=flow['id'], nodes_ids=[node])
+
+            for flow in operations["insert"]:
+                self._flow(flow_id=flow['id'],
+                           method='put',
+                           data=json.dumps({'flow': [flow]}),
+                           nodes_ids=[node])
+
+        except Exception as e:
+            message = self._parse_errors(e.response.json())
+            log.error("ERROR while updating all flows: %s" % message)
+            raise exceptions.CommandErrorException(msg=message)
+
+    def _put_table(self, node_id, flows):
+        """ Replaces all flows of table 0 of a node in one request """
+
+        path = "/restconf/config/opendaylight-inventory:nodes/node/" \
+               "%s/flow-node-inventory:table/0/" % node_id
+
+        return self._request(
+            method="put", path=path, contentType='json',
+            data=json.dumps({
+                "flow-node-inventory:table": [{
+                    "id": 0,
+                    "flow": flows
+                }]
+            })
+        )
 
 
     def flush_flows(self):
@@ -289,7 +344,7 @@ class ODLPlugin(BaseSdnPlugin):
 
         try:
             # Raises AttributeError if method is not valid
-            func = getattr(requests, params["method"])
+            func = getattr(self._get_session(), params["method"])
             request = func(
                 uri,
                 auth=self._get_auth(),
@@ -316,6 +371,18 @@ class ODLPlugin(BaseSdnPlugin):
                       'ie: GET, POST, PUT, DELETE')
 
 
+    def _get_session(self):
+        """ Session kept by plugin, reusing connections to controller """
+
+        if getattr(self, '_session', None) is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1,
+                                  pool_maxsize=self.POOL_SIZE)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            self._session = session
+        return self._session
+
     def _get_auth(self):
         return self._basic_auth()
 
@@ -360,67 +427,76 @@ class ODLPlugin(BaseSdnPlugin):
                       ('https', self.equipment.nome))
             raise exceptions.InvalidEquipmentAccessException()
 
-    def _diff_flows(self, current_data, new_data):
+    def _diff_flows(self, current_data, new_flows, new_hashes=None):
         #This function compares the current applied data with the desired new data
         #returning a dict containing
         # operation: the action that should be taken (delete or insert)
         # flow: the flow that should be manipulated
 
         if current_data != []:
-            current_data=current_data[0]['flow']
-
-        #turn lists into dicts and merge ids
-        ids_merged = []
-        new = {}
-        current = {}
-
-        for new_flows in new_data:
-            for new_flow in new_flows['flow']:
-                new[new_flow['id']] = new_flow
-                ids_merged.append(new_flow['id'])
-        for current_flow in current_data:
-            current[current_flow['id']] = current_flow
-            if ids_merged.count(current_flow['id'])==0:
-                ids_merged.append(current_flow['id'])
+            current_data = current_data[0].get('flow', [])
+
+        if new_hashes is None:
+            new_hashes = dict((flow['id'], self._hash_flow(flow))
+                              for flow in new_flows)
+
+        new = dict((flow['id'], flow) for flow in new_flows)
+        current = dict((flow['id'], flow) for flow in current_data)
 
         operations={"delete":[], "insert":[]} #update is also an insertion
 
-        ids_merged.sort()
-        for id in ids_merged:
+        for id in sorted(set(new.keys()) | set(current.keys())):
             if not id in new:
                 operations["delete"].append(current[id])
                 log.debug("flow id %s will be deleted"%id)
-            else:
-                if not id in current:
-                    operations["insert"].append(new[id])
-                    log.debug("flow id %s will be inserted" % id)
-                elif self.assertDictsEqual(new[id], current[id])==False:
-                    operations["insert"].append(new[id])
-                    log.debug("flow id %s will be updated" % id)
+            elif not id in current:
+                operations["insert"].append(new[id])
+                log.debug("flow id %s will be inserted" % id)
+            elif self._hash_flow(current[id], new[id]) != new_hashes[id]:
+                operations["insert"].append(new[id])
+                log.debug("flow id %s will be updated" % id)
 
         return operations
 
-    def assertDictsEqual(self, d1, d2):
-        for k in d1.keys():
-            if not d2.has_key(k):
-                log.debug("%s key missing" % k)
-                return False
-            else:
-                if type(d1[k]) is dict:
-                    if self.assertDictsEqual(d1[k], d2[k]) == False:
-                        return False
+    def _canonical_flow(self, data, shape=None):
+        """ Returns flow data only with keys of shape (the flow as built, since
+        controller can add keys to stored flows), without cookies and with
+        numbers as strings.
+        """
+
+        if shape is None:
+            shape = data
+
+        if isinstance(data, dict):
+            if not isinstance(shape, dict):
+                shape = data
+            canonical = {}
+            for key in shape:
+                #TODO: ignore cookie is a workaround for a unknown problem when
+                # diffing cookies
+                if key == "cookie":
+                    continue
+                if key not in data:
+                    log.debug("%s key missing" % key)
+                    canonical[key] = None
                 else:
-                    #TODO: ignore cookie is a workaround for a unknown problem when
-                    # diffing cookies
-                    if "%s"%k=="cookie":
-                        # ignoring cookie for now"
-                        pass
-                    elif type(d1[k]) == int or type(d2[k])==int:
-                        if "%s"%d1[k] != "%s"%d2[k]:
-                            log.debug("%s differs: %s - %s" % (k, d1[k], d2[k]))
-                            return False
-                    else:
-                        if d1[k] != d2[k]:
-                            log.debug ("%s differs: %s - %s"%(k, d1[k], d2[k]))
-                            return False
-        return True
+                    canonical[key] = self._canonical_flow(data[key],
+                                                          shape[key])
+            return canonical
+
+        if isinstance(data, list):
+            if not isinstance(shape, list) or len(shape) != len(data):
+                shape = data
+            return [self._canonical_flow(item, item_shape)
+                    for item, item_shape in zip(data, shape)]
+
+        if isinstance(data, (int, long)) and not isinstance(data, bool):
+            return "%s" % data
+
+        return data
+
+    def _hash_flow(self, flow, shape=None):
+        """ Content hash of the canonical flow """
+
+        canonical = self._canonical_flow(flow, shape)
+        return hashlib.sha1(json.dumps(canonical, sort_keys=True)).hexdigest()
@@ -18,6 +18,7 @@
 from networkapi.plugins.SDN.ODL.utils.cookie_handler import CookieHandler
 from networkapi.plugins.SDN.ODL.utils.tcp_control_bits import TCPControlBits
 from networkapi.plugins.SDN.ODL.utils.odl_plugin_masks import ODLPluginMasks
+from networkapi.plugins.SDN.ODL.utils.port_range import PortRange
 
 import re
 import logging
@@ -76,7 +77,13 @@ class AclFlowBuilder(object):
     ALLOWED_FLOWS_SIZE = 5
     MAX_RANGE_LENGTH = 120
 
-    def __init__(self, data, environment=0, version="BERYLLIUM"):
+    # Versions that match transport ports with masks (Nicira extension)
+    MASKED_PORTS_VERSIONS = ["BORON", "CARBON", "NITROGEN"]
+    EXTENSION_LIST = "openflowplugin-extension-general:extension-list"
+    NICIRA_MATCH = "openflowplugin-extension-nicira-match:nxm-of-{}-{}"
+
+    def __init__(self, data, environment=0, version="BERYLLIUM",
+                 masked_ports=None):
 
         self.raw_data = data  # Original data
         self.flows = {"flow": []}  # Processed data
@@ -88,6 +95,11 @@ class AclFlowBuilder(object):
         self.version = version
         self.dumped_rule = None  # Actual processing rule in json format
 
+        # Ranges are split in port/mask blocks instead of one flow by port
+        if masked_ports is None:
+            masked_ports = version in self.MASKED_PORTS_VERSIONS
+        self.masked_ports = masked_ports
+
         self._reset_control_members()
 
         logging.basicConfig(format=self.LOG_FORMAT, level=logging.DEBUG)
@@ -352,35 +364,36 @@ class AclFlowBuilder(object):
                 }
 
     def _build_simple_range(self, rule, protocol, start, end):
-        """ Builds a TCP|UDP flows when ACL has Src and Dst ranges."""
+        """ Builds a TCP|UDP flows when ACL has Src or Dst ranges."""
 
-        port_end = int(rule[Tokens.l4_options][end])
+        l4_options = rule[Tokens.l4_options]
+        port_end = int(l4_options[end])
+        blocks = self._port_blocks(l4_options[start], port_end)
+        last = len(blocks) - 1
 
         if self.current_src_or_dst_port is not None:
 
             # Assigns if the last iteration made flows array to reach
-            # ALLOWED_FLOWS_SIZE before reach the last port in range
-            port_start = self.current_src_or_dst_port
+            # ALLOWED_FLOWS_SIZE before reach the last block in range
+            first = self.current_src_or_dst_port
         else:
 
             # Assigns if it is the first time building range for rule
-            port_start = int(rule[Tokens.l4_options][start])
+            first = 0
 
-        for port in xrange(port_start, port_end + 1):
+        side = "source" if start == Tokens.src_port else "destination"
 
-            # Do this to avoid change the first port of range in orig rule
-            # We use it to update each flow description field
-            rule_copy = deepcopy(rule)
-            rule_copy[Tokens.l4_options][start] = str(port)
+        for idx in xrange(first, last + 1):
 
-            self._build_transport_source_ports(rule_copy, protocol)
-            self._build_transport_destination_ports(rule_copy, protocol)
+            self._build_transport_source_ports(rule, protocol)
+            self._build_transport_destination_ports(rule, protocol)
+            self._build_port_match(protocol, side, blocks[idx])
             self._build_id_and_description_when_simple_range(
-                rule, port,
-                rule[Tokens.l4_options][start],
+                rule, self._port_label(blocks[idx]),
+                l4_options[start],
                 port_end)
 
-            if port == port_end:
+            if idx == last:
                 # If we finished to build all ports in range,
                 # set variable below to True to avoid rebuild
                 # the same rule
@@ -390,74 +403,129 @@ class AclFlowBuilder(object):
             if len(self.flows["flow"]) == self.ALLOWED_FLOWS_SIZE:
                 # If flows array reach ALLOWED_FLOWS_SIZE, we stop to
                 # build and save actual state
-                self.current_src_or_dst_port = port + 1
+                self.current_src_or_dst_port = idx + 1
                 return
 
-            self._insert_new_flow_when_single_range(port, port_end)
+            self._insert_new_flow_when_single_range(idx, last)
 
     def _build_double_range(self, rule, protocol):
-        """ Builds a TCP|UDP flows when ACL has Src or Dst ranges."""
+        """ Builds a TCP|UDP flows when ACL has Src and Dst ranges."""
 
         l4_options = rule[Tokens.l4_options]
 
-        src_port_end = int(l4_options[Tokens.src_port_end])
-        dst_port_end = int(l4_options[Tokens.dst_port_end])
+        src_blocks = self._port_blocks(l4_options[Tokens.src_port],
+                                       l4_options[Tokens.src_port_end])
+        dst_blocks = self._port_blocks(l4_options[Tokens.dst_port],
+                                       l4_options[Tokens.dst_port_end])
+        src_last = len(src_blocks) - 1
+        dst_last = len(dst_blocks) - 1
 
         if self.current_src_port is not None \
            and self.current_dst_port is not None:
 
             # Assigns if the last iteration made flows array to reach
-            # ALLOWED_FLOWS_SIZE before reach the last port in range
-            src_port_start = self.current_src_port
-            dst_port_start = self.current_dst_port
+            # ALLOWED_FLOWS_SIZE before reach the last block in range
+            src_first = self.current_src_port
+            dst_first = self.current_dst_port
         else:
 
             # Assigns if it is the first time building range for rule
-            src_port_start = int(l4_options[Tokens.src_port])
-            dst_port_start = int(l4_options[Tokens.dst_port])
-
-        if dst_port_start > dst_port_end:
-            src_port_start += 1
-            dst_port_start = int(l4_options[Tokens.dst_port])
+            src_first = 0
+            dst_first = 0
 
-        for src_port in xrange(src_port_start, src_port_end + 1):
-            for dst_port in xrange(dst_port_start, dst_port_end + 1):
+        if dst_first > dst_last:
+            src_first += 1
+            dst_first = 0
 
-                # Do this to avoid change the first port of range
-                # in original rule.
-                # We use it to update each flow description field
+        for src_idx in xrange(src_first, src_last + 1):
+            for dst_idx in xrange(dst_first, dst_last + 1):
 
-                rule_copy = deepcopy(rule)
-                rule_copy[Tokens.l4_options][Tokens.src_port] = str(src_port)
-                rule_copy[Tokens.l4_options][Tokens.dst_port] = str(dst_port)
-
-                self._build_transport_source_ports(rule_copy, protocol)
-                self._build_transport_destination_ports(rule_copy, protocol)
+                self._build_port_match(protocol, "source",
+                                       src_blocks[src_idx])
+                self._build_port_match(protocol, "destination",
+                                       dst_blocks[dst_idx])
                 self._build_id_and_description_when_double_range(
-                    rule, src_port, dst_port)
+                    rule, self._port_label(src_blocks[src_idx]),
+                    self._port_label(dst_blocks[dst_idx]))
 
-                if src_port == src_port_end and dst_port == dst_port_end:
+                if src_idx == src_last and dst_idx == dst_last:
                     # If we finished to build all ports in range,
                     # set variable below to True to avoid rebuild
                     # the same rule
                     self.generated_all_flows_from_rule = True
                     return
 
-                if dst_port == dst_port_end:
+                if dst_idx == dst_last:
                     # When state is save, make sure that in next iteration
                     # of src ranges all related destination ports will be
                     # built together
-                    dst_port_start = int(l4_options[Tokens.dst_port])
+                    dst_first = 0
 
                 if len(self.flows["flow"]) == self.ALLOWED_FLOWS_SIZE:
                     # If flows array reach ALLOWED_FLOWS_SIZE, we stop to
                     # build and save actual state
-                    self.current_src_port = src_port
-                    self.current_dst_port = dst_port + 1
+                    self.current_src_port = src_idx
+                    self.current_dst_port = dst_idx + 1
                     return
 
-                self._insert_new_flow_when_double_range(src_port, src_port_end,
-                                                        dst_port, dst_port_end)
+                self._insert_new_flow_when_double_range(src_idx, src_last,
+                                                        dst_idx, dst_last)
+
+    def _port_blocks(self, port_start, port_end):
+        """ Splits a port range in the blocks matched by each flow: aligned
+            port/mask blocks or, when masks are not supported, one port
+            by block.
+        """
+
+        port_start = int(port_start)
+        port_end = int(port_end)
+
+        if self.masked_ports:
+            return PortRange(port_start, port_end).to_blocks()
+
+        return [(port, port) for port in xrange(port_start, port_end + 1)]
+
+    def _port_label(self, block):
+        """ Identifies the ports of a block in flow id """
+
+        first, last = block
+        if first == last:
+            return first
+        return "{}-{}".format(first, last)
+
+    def _build_port_match(self, protocol, side, block):
+        """ Builds the match of a block of ports in source or destination.
+            One port is matched by number and many by port/mask.
+        """
+
+        match = self.flows["flow"][0]["match"]
+        prefix = "{}-{}-port".format(protocol, side)
+        extension_key = self.NICIRA_MATCH.format(
+            protocol, "src" if side == "source" else "dst")
+
+        # Flow can be a copy of the previous one, with other ports
+        match.pop(prefix, None)
+        extensions = [extension for extension
+                      in match.pop(self.EXTENSION_LIST, [])
+                      if extension["extension-key"] != extension_key + "-key"]
+
+        first, last = block
+        if first == last:
+            match[prefix] = str(first)
+        else:
+            port, mask = PortRange.to_mask(block)
+            extensions.append({
+                "extension-key": extension_key + "-key",
+                "extension": {
+                    extension_key: {
+                        "port": port,
+                        "mask": mask
+                    }
+                }
+            })
+
+        if extensions:
+            match[self.EXTENSION_LIST] = extensions
 
     def _insert_new_flow_when_single_range(self, port, port_end):
         """ Check inside single range if still exists ports to build
@@ -612,19 +680,25 @@ class AclFlowBuilder(object):
             rule[Tokens.l4_options][start]
 
     def _calc_length_of_range(self, rule):
+        """ Returns the number of flows needed by port ranges of rule """
+
         l4_options = rule.get(Tokens.l4_options, {})
         src_range=1
         dst_range=1
 
         if l4_options.get(Tokens.src_port_op) == Tokens.range:
-            src_port_start = int(l4_options[Tokens.src_port])
-            src_port_end = int(l4_options[Tokens.src_port_end])
-            src_range=src_port_end-src_port_start+1
+            src_range = self._calc_length_of_blocks(
+                l4_options[Tokens.src_port], l4_options[Tokens.src_port_end])
 
         if l4_options.get(Tokens.dst_port_op) == Tokens.range:
-            dst_port_start = int(l4_options[Tokens.dst_port])
-            dst_port_end = int(l4_options[Tokens.dst_port_end])
-            dst_range=dst_port_end-dst_port_start+1
+            dst_range = self._calc_length_of_blocks(
+                l4_options[Tokens.dst_port], l4_options[Tokens.dst_port_end])
 
         return src_range * dst_range
 
+    def _calc_length_of_blocks(self, port_start, port_end):
+
+        if self.masked_ports:
+            return len(PortRange(port_start, port_end).to_blocks())
+        return int(port_end) - int(port_start) + 1
+
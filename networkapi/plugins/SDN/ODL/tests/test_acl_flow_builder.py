@@ -1,5 +1,8 @@
 
 
+import logging
+import time
+
 from nose.tools import assert_raises
 from nose.tools import assert_equal
 from nose.tools import assert_in
@@ -347,4 +350,115 @@ class ACLFlowBuilderTestCase(NetworkApiTestCase):
             output_ = output_path.format(type_, i)
             self.compare_json(output_, generator.next())
 
-        self.assertRaises(StopIteration, generator.next)
\ No newline at end of file
+        self.assertRaises(StopIteration, generator.next)
+
+    def _range_acl(self, protocol, src=None, dst=None):
+
+        l4_options = {}
+        if src:
+            l4_options.update({"src-port-op": "range",
+                               "src-port-start": str(src[0]),
+                               "src-port-end": str(src[1])})
+        if dst:
+            l4_options.update({"dest-port-op": "range",
+                               "dest-port-start": str(dst[0]),
+                               "dest-port-end": str(dst[1])})
+
+        return {
+            "kind": "default#acl",
+            "rules": [{
+                "id": "1",
+                "action": "permit",
+                "description": "range",
+                "protocol": protocol,
+                "source": "10.0.0.0/24",
+                "destination": "10.0.1.0/24",
+                "l4-options": l4_options
+            }]
+        }
+
+    def _build_all_flows(self, flow_builder):
+
+        return [flow for flows in flow_builder.build()
+                for flow in flows["flow"]]
+
+    def test_build_acl_tcp_range_dst_with_masks(self):
+        """ Build one masked flow by block of TCP Range Dst ACL."""
+
+        data = self._range_acl("tcp", dst=(1024, 65535))
+        flow_builder = AclFlowBuilder(data, version="CARBON")
+
+        flows = self._build_all_flows(flow_builder)
+
+        assert_equal(len(flows), 6)
+        flows = dict((flow["id"], flow) for flow in flows)
+        assert_in("1_1024-2047", flows)
+
+        match = flows["1_32768-65535"]["match"]
+        extensions = match[AclFlowBuilder.EXTENSION_LIST]
+        assert_equal(extensions, [{
+            "extension-key":
+                "openflowplugin-extension-nicira-match:nxm-of-tcp-dst-key",
+            "extension": {
+                "openflowplugin-extension-nicira-match:nxm-of-tcp-dst": {
+                    "port": 32768,
+                    "mask": 32768
+                }
+            }
+        }])
+        assert_not_in("tcp-destination-port", match)
+
+    def test_build_acl_udp_double_range_with_masks(self):
+        """ Build masked flows of UDP Double Range ACL."""
+
+        data = self._range_acl("udp", src=(1000, 1999), dst=(20, 30))
+        flow_builder = AclFlowBuilder(data, version="BORON")
+
+        flows = self._build_all_flows(flow_builder)
+
+        # 7 source blocks x 4 destination blocks
+        assert_equal(len(flows), 28)
+        assert_equal(len(set(flow["id"] for flow in flows)), 28)
+
+        single = [flow for flow in flows if flow["id"] == "1_1000-1007_30"]
+        assert_equal(single[0]["match"]["udp-destination-port"], "30")
+        assert_equal(
+            len(single[0]["match"][AclFlowBuilder.EXTENSION_LIST]), 1)
+
+    def test_build_acl_range_without_masks_in_old_versions(self):
+        """ Build one flow by port of ranges in BERYLLIUM."""
+
+        data = self._range_acl("tcp", dst=(901, 905))
+
+        flows = self._build_all_flows(AclFlowBuilder(data))
+        assert_equal(len(flows), 5)
+        assert_not_in(AclFlowBuilder.EXTENSION_LIST, flows[0]["match"])
+
+        flows = self._build_all_flows(
+            AclFlowBuilder(data, version="CARBON", masked_ports=False))
+        assert_equal(len(flows), 5)
+
+    def test_build_acl_large_range_with_masks_is_fast(self):
+        """ Compare flows and time of a large range with and without masks."""
+
+        data = self._range_acl("tcp", src=(1024, 2047), dst=(1024, 65535))
+
+        flow_builder = AclFlowBuilder(data, version="CARBON")
+        start = time.time()
+        masked_flows = len(self._build_all_flows(flow_builder))
+        masked_time = time.time() - start
+
+        flow_builder = AclFlowBuilder(
+            self._range_acl("tcp", dst=(1024, 2047)),
+            version="CARBON", masked_ports=False)
+        flow_builder.MAX_RANGE_LENGTH = 1024
+        start = time.time()
+        port_flows = len(self._build_all_flows(flow_builder))
+        port_time = time.time() - start
+
+        logging.info("Masked flows: %s in %.3fs, flows by port (1024 "
+                     "ports): %s in %.3fs", masked_flows, masked_time,
+                     port_flows, port_time)
+
+        assert_equal(masked_flows, 6)
+        assert_equal(port_flows, 1024)
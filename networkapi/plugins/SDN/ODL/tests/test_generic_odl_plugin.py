@@ -471,6 +471,39 @@ class GenericOpenDayLightTestCaseSuccess(NetworkApiTestCase):
         for node in all_flows:
             self.compare_json_lists(output, all_flows[node][0]['flow'])
 
+    def test_diff_flows_by_content(self):
+        """Test diff ignores cookies, number types and controller keys"""
+
+        new_flows = [
+            {'id': '1', 'priority': 10, 'cookie': 1},
+            {'id': '2', 'priority': 20},
+            {'id': '3', 'priority': 30},
+        ]
+        current = [{'id': 0, 'flow': [
+            {'id': '1', 'priority': '10', 'cookie': 7, 'hard-timeout': 0},
+            {'id': '2', 'priority': 21},
+            {'id': '4', 'priority': 40},
+        ]}]
+
+        operations = self.odl._diff_flows(current, new_flows)
+
+        self.assertEqual([f['id'] for f in operations['delete']], ['4'])
+        self.assertEqual([f['id'] for f in operations['insert']], ['2', '3'])
+
+    @mock.patch('networkapi.plugins.SDN.ODL.Generic.ODLPlugin._request')
+    def test_sync_flows_replaces_table(self, mock_request):
+        """Test many changes in a node are sent in one request"""
+
+        new_flows = [{'id': str(i), 'priority': i} for i in range(10)]
+        new_hashes = dict((f['id'], self.odl._hash_flow(f))
+                          for f in new_flows)
+
+        self.odl._sync_flows('openflow:1', [], new_flows, new_hashes)
+
+        self.assertEqual(mock_request.call_count, 1)
+        self.assertIn('flow-node-inventory:table/0/',
+                      mock_request.call_args[1]['path'])
+
     @mock.patch('networkapi.plugins.SDN.ODL.Generic.ODLPlugin._request')
     def test_get_nodes_ids_empty(self, mock_request):
         """Test get nodes with a empty result"""
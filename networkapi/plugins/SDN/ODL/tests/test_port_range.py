@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+
+from nose.tools import assert_raises
+from nose.tools import assert_equal
+
+from networkapi.test.test_case import NetworkApiTestCase
+from networkapi.plugins.SDN.ODL.utils.port_range import PortRange
+
+
+class TestPortRange(NetworkApiTestCase):
+    """ Class to test split of port ranges in port/mask blocks """
+
+    def test_should_raise_value_error_for_inverted_range(self):
+        """ Should raise value error when start is greater than end """
+
+        assert_raises(ValueError, PortRange, 10, 1)
+
+    def test_should_split_a_single_port_in_one_block(self):
+        """ Should split a single port in one block """
+
+        assert_equal(PortRange(80, 80).to_blocks(), [(80, 80)])
+
+    def test_should_split_high_ports_in_six_blocks(self):
+        """ Should split ports 1024-65535 in six aligned blocks """
+
+        assert_equal(PortRange(1024, 65535).to_blocks(), [
+            (1024, 2047), (2048, 4095), (4096, 8191),
+            (8192, 16383), (16384, 32767), (32768, 65535)])
+
+    def test_should_split_all_ports_in_one_block(self):
+        """ Should split ports 0-65535 in one block """
+
+        assert_equal(PortRange(0, 65535).to_blocks(), [(0, 65535)])
+
+    def test_blocks_should_cover_exactly_the_range(self):
+        """ Blocks should cover every port of the range once """
+
+        for start, end in [(1, 1000), (901, 905), (1000, 1999), (3, 65534)]:
+            blocks = PortRange(start, end).to_blocks()
+            ports = [port for first, last in blocks
+                     for port in xrange(first, last + 1)]
+            assert_equal(ports, range(start, end + 1))
+
+            for first, last in blocks:
+                port, mask = PortRange.to_mask((first, last))
+                assert_equal(port & mask, first)
+                assert_equal(port | (~mask & PortRange.FULL_MASK), last)
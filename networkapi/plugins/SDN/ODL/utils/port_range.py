@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+
+
+class PortRange(object):
+    """ Class to split a range of transport ports in blocks that can be
+        matched by one port/mask pair
+    """
+
+    BITS = 16
+    FULL_MASK = (1 << BITS) - 1
+
+    def __init__(self, start, end):
+
+        self.start = int(start)
+        self.end = int(end)
+
+        if self.start > self.end:
+            raise ValueError("Port range start is greater than end")
+
+    def to_blocks(self):
+        """ Returns a list of (first port, last port) of aligned blocks
+            covering the range. A range of n ports has at most 2*log2(n)
+            blocks.
+        """
+
+        blocks = []
+        port = self.start
+        while port <= self.end:
+            size = port & -port if port else 1 << self.BITS
+            while port + size - 1 > self.end:
+                size >>= 1
+            blocks.append((port, port + size - 1))
+            port += size
+        return blocks
+
+    @staticmethod
+    def to_mask(block):
+        """ Returns the port/mask pair of a block """
+
+        first, last = block
+        return first, PortRange.FULL_MASK ^ (last - first)
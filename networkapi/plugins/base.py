@@ -16,13 +16,16 @@
 import logging
 import random
 import re
+import select
 import string
 import unicodedata
 from time import sleep
+from time import time
 
 import paramiko
 
 from . import exceptions
+from . import sshpool
 from networkapi.api_rest import exceptions as api_exceptions
 from networkapi.equipamento.models import EquipamentoAcesso
 from networkapi.settings import TFTP_SERVER_ADDR
@@ -42,6 +45,17 @@ class BasePlugin(object):
     VALID_TFTP_PUT_MESSAGE = 'bytes copied in'
     VALID_OUTPUT_CHARS = '-_.():/#\\\r\n %s%s' % (string.ascii_letters, string.digits)
 
+    # Seconds waiting the expected output of a command
+    COMMAND_TIMEOUT = 600
+    # Previous output searched again with each read, so a message split
+    # between two reads is found
+    READ_OVERLAP = 1024
+    READ_SIZE = 9999
+    # Output kept to be returned by waitString
+    MAX_OUTPUT = 1024 * 1024
+    # Seconds between checks of channels that can not be selected
+    POLL_INTERVAL = 0.05
+
     admin_privileges = 'not defined'
     GUEST_PRIVILEGES = 'not defined'
 
@@ -51,6 +65,7 @@ class BasePlugin(object):
     equipment_access = None
     channel = None
     remote_conn = None
+    session = None
     tftpserver = TFTP_SERVER_ADDR
     management_vrf = ''
 
@@ -76,6 +91,7 @@ class BasePlugin(object):
     def connect(self):
         """Connects to equipment via ssh using paramiko.SSHClient  and
             sets channel variable with invoked shell object.
+            An idle session of the same access is reused when pool has one.
 
         Raises:
             IOError: if cannot connect to host
@@ -95,6 +111,13 @@ class BasePlugin(object):
         username = self.equipment_access.user
         password = self.equipment_access.password
 
+        self.session = sshpool.pool.acquire(
+            device, self.connect_port, username, password)
+        if self.session is not None:
+            self.remote_conn = self.session.client
+            self.channel = self.session.channel
+            return
+
         self.remote_conn = paramiko.SSHClient()
         self.remote_conn.set_missing_host_key_policy(paramiko.AutoAddPolicy())
 
@@ -123,6 +146,10 @@ class BasePlugin(object):
             log.error('Error connecting to host %s: %s' % (device, e))
             raise Exception(e)
 
+        self.session = sshpool.SshSession(
+            (device, self.connect_port, username), password,
+            self.remote_conn, self.channel)
+
     def create_svi(self, svi_number, svi_description='no description'):
         """Delete SVI in switch."""
 
@@ -130,7 +157,20 @@ class BasePlugin(object):
 
     @mock_return('')
     def close(self):
-        self.channel.close()
+        if self.session is None:
+            self.channel.close()
+            return
+
+        sshpool.pool.release(self.session)
+        self.session = None
+
+    def discard_session(self):
+        """Closes ssh session on close instead of returning it to pool, as
+        after an error its shell may be left in another mode (e.g. config).
+        """
+
+        if self.session is not None:
+            self.session.reusable = False
 
     def ensure_privilege_level(self, privilege_level=None):
         """Ensure connection has the right privileges expected."""
@@ -177,6 +217,74 @@ class BasePlugin(object):
 
         raise NotImplementedError()
 
+    def compile_regex(self, pattern):
+        """Returns pattern compiled once by plugin class."""
+
+        compiled = self.__class__.__dict__.get('_compiled_regexes')
+        if compiled is None:
+            compiled = dict()
+            setattr(self.__class__, '_compiled_regexes', compiled)
+        regex = compiled.get(pattern)
+        if regex is None:
+            regex = re.compile(pattern, re.DOTALL)
+            compiled[pattern] = regex
+        return regex
+
+    def _channel_fileno(self):
+        try:
+            fileno = self.channel.fileno()
+        except Exception:
+            return None
+        return fileno if isinstance(fileno, (int, long)) else None
+
+    def recv(self, deadline):
+        """Waits output of channel until deadline and returns it."""
+
+        while True:
+            if self.channel.recv_ready():
+                return self.channel.recv(self.READ_SIZE)
+            # Without more output after EOF, channel would be polled until
+            # deadline
+            if getattr(self.channel, 'closed', False) is True or \
+                    getattr(self.channel, 'eof_received', False) is True:
+                if self.session is not None:
+                    self.session.reusable = False
+                raise exceptions.CommandErrorException(
+                    'Connection closed by equipment')
+
+            remaining = deadline - time()
+            if remaining <= 0:
+                # Command may still be running, shell can not be reused
+                if self.session is not None:
+                    self.session.reusable = False
+                raise exceptions.CommandTimeoutException(
+                    'No output after %s seconds' % self.COMMAND_TIMEOUT)
+
+            fileno = self._channel_fileno()
+            if fileno is None:
+                sleep(min(self.POLL_INTERVAL, remaining))
+            else:
+                select.select([fileno], [], [], remaining)
+
+    def read_output(self, timeout=None):
+        """Yields output read from channel until timeout, as
+        (data, window, output): data is the new output, window is data with
+        the end of previous output and output is all output read (up to
+        MAX_OUTPUT).
+        """
+
+        deadline = time() + (timeout or self.COMMAND_TIMEOUT)
+        output = ''
+        while True:
+            data = self.recv(deadline)
+            window = output[-self.READ_OVERLAP:] + data
+            output = (output + data)[-self.MAX_OUTPUT:]
+            yield data, window, output
+
+    def log_wait(self, regex, start, output):
+        log.info('Waited %.3f seconds for %r (%s bytes)' %
+                 (time() - start, regex, len(output)))
+
     def waitString(self, wait_str_ok_regex='', wait_str_invalid_regex=None, wait_str_failed_regex=None):
 
         if wait_str_invalid_regex is None:
@@ -185,21 +293,24 @@ class BasePlugin(object):
         if wait_str_failed_regex is None:
             wait_str_failed_regex = self.ERROR_REGEX
 
-        string_ok = 0
-        recv_string = ''
-        while not string_ok:
-            while not self.channel.recv_ready():
-                sleep(1)
-            recv_string = self.channel.recv(9999)
-            file_name_string = self.removeDisallowedChars(recv_string)
-            if re.search(wait_str_invalid_regex, recv_string, re.DOTALL):
-                raise exceptions.CommandErrorException(file_name_string)
-            elif re.search(wait_str_failed_regex, recv_string, re.DOTALL):
-                raise exceptions.InvalidCommandException(file_name_string)
-            elif re.search(wait_str_ok_regex, recv_string, re.DOTALL):
-                string_ok = 1
-
-        return recv_string
+        ok_regex = self.compile_regex(wait_str_ok_regex)
+        invalid_regex = self.compile_regex(wait_str_invalid_regex)
+        failed_regex = self.compile_regex(wait_str_failed_regex)
+
+        start = time()
+        for data, window, recv_string in self.read_output():
+            if invalid_regex.search(window):
+                raise exceptions.CommandErrorException(
+                    self.removeDisallowedChars(window))
+            elif failed_regex.search(window):
+                raise exceptions.InvalidCommandException(
+                    self.removeDisallowedChars(window))
+            elif ok_regex.search(window):
+                break
+
+        self.log_wait(wait_str_ok_regex, start, recv_string)
+        # Callers get the last read, as before
+        return data
 
     def check_configuration_has_content(self, command, file_path):
         """
@@ -27,6 +27,15 @@ class CommandErrorException(APIException):
                       'Equipment returned error status. <<%s>>' % (msg)
 
 
+class CommandTimeoutException(APIException):
+    status_code = status.HTTP_400_BAD_REQUEST
+    default_detail = 'Error: Timeout waiting equipment response.'
+
+    def __init__(self, msg=None):
+        self.detail = 'Error: Timeout waiting equipment response. ' \
+                      '<<%s>>' % (msg)
+
+
 class ConnectionException(APIException):
     status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
     default_detail = 'Failed trying to connect to equipment.'
@@ -148,3 +157,15 @@ class ControllerInventoryIsEmpty(APIException):
 
     def __init__(self, msg=None):
         self.detail = u'SDN Controller\'s inventory is empty: <<%s>>' % (msg)
+
+
+class EquipmentsCallsException(APIException):
+    """Return message error: Errors of calls in many equipments"""
+
+    status_code = status.HTTP_400_BAD_REQUEST
+    default_detail = u'Error applying command on equipments.'
+
+    def __init__(self, errors=None):
+        self.detail = u'Error applying command on equipments: %s' % \
+            u'; '.join(u'%s: <<%s>>' % (name, getattr(error, 'detail', error))
+                       for name, error in sorted((errors or dict()).items()))
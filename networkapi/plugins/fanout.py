@@ -0,0 +1,331 @@
+# -*- coding: utf-8 -*-
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Calls to plugins of many equipments at the same time.
+
+Each call runs in a worker thread (at most ``max_workers`` at once) and has
+its own timeout, counted from when it started. With run, when any call
+fails, the rollback of the calls that succeeded is run before errors are
+raised; run_each yields each call as it ends instead.
+
+A call that times out can not be stopped, its thread is left running. With
+run, its rollback is run by that thread if the call succeeds later.
+
+Workers are other threads, so queries made by calls use connections of
+their own, outside the transaction of the caller: they do not see what the
+caller did not commit yet, and what they write is committed apart and is
+not undone when the caller rolls back. Calls should only talk to
+equipments, with data loaded before run (a single call runs in the caller
+thread, so calls must not depend on either behavior).
+"""
+import logging
+import threading
+import time
+
+from django.db import connection
+
+from networkapi.extra_logging import local
+from networkapi.plugins import exceptions
+from networkapi.system.facade import get_value as get_variable
+
+log = logging.getLogger(__name__)
+
+# Calls running at the same time
+MAX_WORKERS = 8
+# Seconds a call may take in an equipment
+CALL_TIMEOUT = 300
+
+
+class PluginCall(object):
+
+    """Call of a plugin method in one equipment.
+
+    Calls of the same group (e.g. brand of equipment) may be limited to
+    run a few at a time.
+    """
+
+    def __init__(self, name, func, args=(), rollback=None, rollback_args=(),
+                 group=None):
+        self.name = name
+        self.func = func
+        self.args = args
+        self.rollback = rollback
+        self.rollback_args = rollback_args
+        self.group = group
+        self.started = None
+        self.finished = False
+        self.timed_out = False
+        self.result = None
+        self.error = None
+        self._lock = threading.Lock()
+        self._succeeded = False
+        self._rollback_late = False
+
+    def run(self):
+        self.started = time.time()
+        result = error = None
+        try:
+            result = self.func(*self.args)
+        except Exception, e:
+            log.error('Call in %s failed: %s' % (self.name, e))
+            error = e
+
+        with self._lock:
+            self.finished = True
+            self._succeeded = error is None
+            # Outcome of a call given up was already reported
+            if not self.timed_out:
+                self.result = result
+                self.error = error
+            rollback = self._rollback_late and error is None
+
+        if rollback:
+            log.warning('Rolling back call in %s, finished after timeout' %
+                        self.name)
+            self._run_rollback()
+
+    def _run_rollback(self):
+        rollback = PluginCall(self.name, self.rollback, self.rollback_args)
+        rollback.run()
+        if rollback.error is not None:
+            log.error('Rollback in %s failed: %s' %
+                      (self.name, rollback.error))
+
+    def give_up(self, timeout):
+        """Reports call as timed out.
+
+        Returns False when call has just finished and is not given up.
+        """
+
+        with self._lock:
+            if self.finished:
+                return False
+            self.timed_out = True
+            self.error = exceptions.CommandErrorException(
+                'Timeout after %s seconds in %s' % (timeout, self.name))
+            return True
+
+    def roll_back_late(self):
+        """Makes a call given up run its rollback when it succeeds.
+
+        Returns True when call already succeeded, so the caller must run
+        the rollback.
+        """
+
+        with self._lock:
+            if not self.finished:
+                self._rollback_late = True
+                return False
+            return self._succeeded
+
+
+class _Scheduler(object):
+
+    """Hands calls to workers, respecting the limit of calls by group."""
+
+    def __init__(self, calls, group_limit=None):
+        self.cond = threading.Condition()
+        self._pending = list(calls)
+        self._group_limit = group_limit
+        self._running = dict()
+        self._running_calls = set()
+
+    def has_pending(self):
+        return bool(self._pending)
+
+    def take(self):
+        """Returns next call that may run, or None when there is none left."""
+
+        with self.cond:
+            while self._pending:
+                for idx, call in enumerate(self._pending):
+                    if self._group_limit is None or call.group is None or \
+                            self._running.get(call.group, 0) < \
+                            self._group_limit:
+                        del self._pending[idx]
+                        self._running[call.group] = \
+                            self._running.get(call.group, 0) + 1
+                        self._running_calls.add(call)
+                        return call
+                self.cond.wait()
+            return None
+
+    def done(self, call):
+        """Frees the place of call in its group (must hold cond).
+
+        Returns False when call was already given up by timeout.
+        """
+
+        self.cond.notify_all()
+        if call not in self._running_calls:
+            return False
+        self._running_calls.discard(call)
+        self._running[call.group] -= 1
+        return True
+
+
+def _worker(scheduler, context):
+    # Keeps request id and context of logs of the caller thread
+    local.__dict__.update(context)
+    try:
+        while True:
+            call = scheduler.take()
+            if call is None:
+                return
+            call.run()
+            with scheduler.cond:
+                # A new worker took the place of this one
+                if not scheduler.done(call):
+                    return
+    finally:
+        connection.close()
+
+
+def _start_worker(scheduler):
+    worker = threading.Thread(
+        target=_worker, args=(scheduler, dict(local.__dict__)))
+    worker.daemon = True
+    worker.start()
+
+
+def _iter_execute(calls, max_workers, timeout, group_limit=None):
+    """Starts calls and returns an iterator of each one when it finishes or
+    times out.
+
+    Calls start before the iterator is returned, not when it is first read,
+    so a caller streaming it starts them inside its own error handling.
+    """
+
+    if len(calls) == 1:
+        calls[0].run()
+        return iter(calls)
+
+    scheduler = _Scheduler(calls, group_limit)
+    for _ in xrange(min(max_workers, len(calls))):
+        _start_worker(scheduler)
+
+    return _iter_ended(calls, scheduler, timeout)
+
+
+def _iter_ended(calls, scheduler, timeout):
+    """Yields each call when it finishes or times out.
+
+    A worker whose call timed out is left behind and replaced by a new one,
+    so the other calls are not held by it.
+    """
+
+    reported = set()
+    while len(reported) < len(calls):
+        with scheduler.cond:
+            now = time.time()
+            ended = list()
+            wait = None
+            for call in calls:
+                if call in reported or call.started is None:
+                    continue
+                if call.finished:
+                    ended.append(call)
+                    continue
+                remaining = call.started + timeout - now
+                if remaining <= 0:
+                    if not call.give_up(timeout):
+                        # Finished meanwhile, its worker frees its place
+                        ended.append(call)
+                        continue
+                    scheduler.done(call)
+                    if scheduler.has_pending():
+                        _start_worker(scheduler)
+                    ended.append(call)
+                    continue
+                wait = remaining if wait is None else min(wait, remaining)
+
+            if not ended:
+                # Queued calls are waited until a worker takes them
+                scheduler.cond.wait(wait if wait is not None else 1)
+                continue
+
+        for call in ended:
+            reported.add(call)
+            yield call
+
+
+def _execute(calls, max_workers, timeout):
+    """Runs calls and waits for all of them or for their timeout."""
+
+    for _ in _iter_execute(calls, max_workers, timeout):
+        pass
+
+
+def run_each(calls, max_workers=None, timeout=None, group_limit=None):
+    """Starts plugin calls of all equipments and returns an iterator of each
+    call as soon as it finishes or times out, with its result or error.
+
+    Unlike run, calls are independent: errors are not raised and nothing
+    is rolled back.
+
+    @param group_limit: max calls of the same group running at once.
+    """
+
+    if max_workers is None:
+        max_workers = int(get_variable('plugin_max_workers', MAX_WORKERS))
+    if timeout is None:
+        timeout = int(get_variable('plugin_call_timeout', CALL_TIMEOUT))
+
+    return _iter_execute(calls, max_workers, timeout, group_limit)
+
+
+def run(calls, max_workers=None, timeout=None):
+    """Runs plugin calls of all equipments and returns their results.
+
+    When some call fails or times out, the rollback of the calls that
+    succeeded is run and the error is raised (all errors are joined in a
+    EquipmentsCallsException when there are many). Calls that timed out
+    are rolled back by their own thread if they succeed later.
+
+    @return: list of results in the same order of calls.
+    """
+
+    if max_workers is None:
+        max_workers = int(get_variable('plugin_max_workers', MAX_WORKERS))
+    if timeout is None:
+        timeout = int(get_variable('plugin_call_timeout', CALL_TIMEOUT))
+
+    _execute(calls, max_workers, timeout)
+
+    failed = [call for call in calls if call.error is not None]
+    if not failed:
+        return [call.result for call in calls]
+
+    rollbacks = list()
+    for call in calls:
+        if call.rollback is None:
+            continue
+        if call.error is None or (call.timed_out and call.roll_back_late()):
+            rollbacks.append(
+                PluginCall(call.name, call.rollback, call.rollback_args))
+    if rollbacks:
+        log.warning('Rolling back calls in %s' %
+                    ', '.join(call.name for call in rollbacks))
+        _execute(rollbacks, max_workers, timeout)
+        for call in rollbacks:
+            if call.error is not None:
+                log.error('Rollback in %s failed: %s' %
+                          (call.name, call.error))
+
+    if len(failed) == 1:
+        raise failed[0].error
+
+    raise exceptions.EquipmentsCallsException(
+        dict((call.name, call.error) for call in failed))
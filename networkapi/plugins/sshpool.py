@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Pool of SSH shells by equipment access, kept by each worker.
+
+BasePlugin.connect takes an idle shell of the same host and user from pool
+and BasePlugin.close returns it, so consecutive operations in the same
+equipment reuse one authenticated session. Privilege level is ensured once
+by session (see session_privilege).
+
+A shell is only returned to pool when its last command did not time out,
+and before it is reused the output left in it is drained and the transport
+checked. Shells idle for more than ssh_pool_max_idle seconds are closed.
+"""
+import functools
+import logging
+import os
+import select
+import threading
+import time
+
+from networkapi.system.facade import get_value as get_variable
+
+log = logging.getLogger(__name__)
+
+# Seconds an idle shell is kept in pool
+MAX_IDLE = 60
+# Idle shells kept by host and user
+MAX_IDLE_SESSIONS = 2
+# Seconds between keepalives sent by transport
+KEEPALIVE_INTERVAL = 15
+# Seconds without output after that a shell is ready to be reused
+DRAIN_QUIET = 0.2
+# Seconds reading output left in a shell before giving it up
+DRAIN_TIMEOUT = 2
+READ_SIZE = 9999
+
+
+def get_int_variable(name, default):
+    try:
+        return int(get_variable(name, default))
+    except Exception, e:
+        log.warning('Invalid value of variable %s: %s' % (name, e))
+        return int(default)
+
+
+class SshSession(object):
+
+    """SSH client and shell of an equipment access."""
+
+    def __init__(self, key, password, client, channel):
+        self.key = key
+        self.password = password
+        self.client = client
+        self.channel = channel
+        # Privilege levels already ensured in shell
+        self.privileges = set()
+        # Cleared when a command did not finish, shell state is unknown
+        self.reusable = True
+        self.last_used = time.time()
+
+        transport = client.get_transport()
+        if transport is not None:
+            transport.set_keepalive(KEEPALIVE_INTERVAL)
+
+    def is_alive(self):
+        transport = self.client.get_transport()
+        return transport is not None and transport.is_active() and \
+            not self.channel.closed
+
+    def drain(self):
+        """Reads output left in shell until it is quiet.
+
+        Returns False when shell does not stop writing.
+        """
+
+        quiet_since = self.last_used
+        deadline = time.time() + DRAIN_TIMEOUT
+        while True:
+            now = time.time()
+            if self.channel.recv_ready():
+                self.channel.recv(READ_SIZE)
+                quiet_since = now
+            elif now - quiet_since >= DRAIN_QUIET:
+                return True
+            elif now >= deadline:
+                return False
+            else:
+                self._wait_output(DRAIN_QUIET - (now - quiet_since))
+
+    def _wait_output(self, timeout):
+        try:
+            fileno = self.channel.fileno()
+        except Exception:
+            fileno = None
+        if isinstance(fileno, (int, long)):
+            select.select([fileno], [], [], timeout)
+        else:
+            time.sleep(min(timeout, 0.05))
+
+    def close(self):
+        try:
+            self.client.close()
+        except Exception, e:
+            log.debug('Error closing ssh session of %s: %s' % (self.key[0], e))
+
+
+class SshPool(object):
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # key: list of idle sessions, most recently used last
+        self._idle = dict()
+        self._pid = os.getpid()
+
+    def _check_fork(self):
+        # Sessions of parent process can not be shared with children
+        if self._pid != os.getpid():
+            self._idle = dict()
+            self._pid = os.getpid()
+
+    def _evict(self, now, max_idle):
+        evicted = list()
+        for key, sessions in self._idle.items():
+            alive = [s for s in sessions if now - s.last_used <= max_idle]
+            evicted.extend(s for s in sessions if now - s.last_used > max_idle)
+            if alive:
+                self._idle[key] = alive
+            else:
+                del self._idle[key]
+        return evicted
+
+    def acquire(self, fqdn, port, user, password):
+        """Returns an idle session of access ready to be used or None."""
+
+        key = (fqdn, port, user)
+        max_idle = get_int_variable('ssh_pool_max_idle', MAX_IDLE)
+
+        while True:
+            session = None
+            with self._lock:
+                self._check_fork()
+                evicted = self._evict(time.time(), max_idle)
+                sessions = self._idle.get(key, list())
+                while sessions:
+                    candidate = sessions.pop()
+                    if candidate.password == password:
+                        session = candidate
+                        break
+                    evicted.append(candidate)
+
+            for old_session in evicted:
+                old_session.close()
+
+            if session is None:
+                return None
+
+            if session.is_alive() and session.drain():
+                log.info('Reusing ssh session of %s' % fqdn)
+                return session
+
+            log.info('Ssh session of %s discarded' % fqdn)
+            session.close()
+
+    def release(self, session):
+        """Returns session to pool, or closes it when it can not be reused."""
+
+        max_idle = get_int_variable('ssh_pool_max_idle', MAX_IDLE)
+        if max_idle <= 0 or not session.reusable or not session.is_alive():
+            session.close()
+            return
+
+        session.last_used = time.time()
+        with self._lock:
+            self._check_fork()
+            sessions = self._idle.setdefault(session.key, list())
+            sessions.append(session)
+            evicted = sessions[:-MAX_IDLE_SESSIONS]
+            del sessions[:-MAX_IDLE_SESSIONS]
+
+        for old_session in evicted:
+            old_session.close()
+
+    def clear(self):
+        with self._lock:
+            sessions = [s for idle in self._idle.values() for s in idle]
+            self._idle = dict()
+
+        for session in sessions:
+            session.close()
+
+
+pool = SshPool()
+
+
+def session_privilege(func):
+    """Runs ensure_privilege_level of plugin once by session and level."""
+
+    @functools.wraps(func)
+    def inner(self, privilege_level=None):
+        session = getattr(self, 'session', None)
+        if session is None:
+            return func(self, privilege_level)
+        if privilege_level in session.privileges:
+            return
+        output = func(self, privilege_level)
+        session.privileges.add(privilege_level)
+        return output
+
+    return inner
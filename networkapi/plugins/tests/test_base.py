@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+from django.test import TestCase
+from mock import Mock
+from mock import patch
+
+from networkapi.plugins import exceptions
+from networkapi.plugins.base import BasePlugin
+
+
+class WaitStringTestCase(TestCase):
+
+    def setUp(self):
+        self.plugin = BasePlugin()
+        self.plugin.channel = Mock()
+        self.plugin.channel.closed = False
+        self.plugin.channel.eof_received = False
+        self.plugin.channel.fileno.return_value = None
+
+    def test_wait_string_finds_message_split_between_reads(self):
+        self.plugin.channel.recv_ready.return_value = True
+        self.plugin.channel.recv.side_effect = ['copy ok: 10 bytes succ',
+                                                'essfully copied\n#']
+
+        output = self.plugin.waitString('bytes successfully copied')
+
+        self.assertEqual(output, 'essfully copied\n#')
+
+    def test_wait_string_raises_invalid_output(self):
+        self.plugin.channel.recv_ready.return_value = True
+        self.plugin.channel.recv.side_effect = ['% Invalid input\n#']
+
+        self.assertRaises(exceptions.CommandErrorException,
+                          self.plugin.waitString, '#')
+
+    def test_wait_string_raises_timeout(self):
+        self.plugin.channel.recv_ready.return_value = False
+
+        with patch('networkapi.plugins.base.sleep'), \
+                patch('networkapi.plugins.base.time') as time_mock:
+            time_mock.side_effect = [0, 1, BasePlugin.COMMAND_TIMEOUT + 1]
+
+            self.assertRaises(exceptions.CommandTimeoutException,
+                              self.plugin.waitString, '#')
+
+    def test_wait_string_stops_at_end_of_output(self):
+        self.plugin.channel.recv_ready.return_value = False
+        self.plugin.channel.eof_received = True
+
+        with patch('networkapi.plugins.base.sleep') as sleep:
+            self.assertRaises(exceptions.CommandErrorException,
+                              self.plugin.waitString, '#')
+        self.assertFalse(sleep.called)
+
+
+class DiscardSessionTestCase(TestCase):
+
+    def test_discarded_session_is_closed_on_close(self):
+        plugin = BasePlugin()
+        plugin.session = Mock()
+        plugin.session.reusable = True
+        session = plugin.session
+
+        plugin.discard_session()
+        with patch('networkapi.plugins.base.sshpool.get_int_variable',
+                   return_value=60):
+            plugin.close()
+
+        self.assertFalse(session.reusable)
+        session.close.assert_called_once_with()
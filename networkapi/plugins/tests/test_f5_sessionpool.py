@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+import time
+
+import bigsuds
+from django.test import TestCase
+from mock import Mock
+from mock import patch
+
+from networkapi.plugins import exceptions as base_exceptions
+from networkapi.plugins.F5 import sessionpool
+
+
+def new_lb(hostname, username, password, session=True):
+    lb_session = Mock()
+    lb_session._hostname = hostname
+    lb_session._username = username
+    lb_session._password = password
+    lb_session._session = session
+    return lb_session
+
+
+class SessionPoolTestCase(TestCase):
+
+    def setUp(self):
+        self.get_variable = patch(
+            'networkapi.plugins.F5.sessionpool.get_variable',
+            side_effect=lambda name, default: default).start()
+        self.new_lb = patch('networkapi.plugins.F5.sessionpool.lb.Lb',
+                            side_effect=new_lb).start()
+        self.addCleanup(patch.stopall)
+        self.pool = sessionpool.SessionPool()
+        self.key = ('f5.globo.com', 'user', True)
+
+    def acquire(self, password='pass'):
+        return self.pool.acquire('f5.globo.com', 'user', password)
+
+    def set_idle_since(self, seconds):
+        self.pool._idle[self.key] = [
+            (lb_session, password, last_used - seconds)
+            for lb_session, password, last_used in self.pool._idle[self.key]]
+
+    def test_released_session_is_reused(self):
+        lb_session = self.acquire()
+        self.pool.release(lb_session)
+
+        self.assertIs(self.acquire(), lb_session)
+        self.assertEqual(1, self.new_lb.call_count)
+        # Recently used session is not checked
+        self.assertFalse(
+            lb_session._channel.System.SystemInfo.get_version.called)
+
+    def test_session_of_other_password_is_not_reused(self):
+        lb_session = self.acquire(password='old')
+        self.pool.release(lb_session)
+
+        self.assertIsNot(self.acquire(), lb_session)
+        self.assertEqual(2, self.new_lb.call_count)
+
+    def test_session_idle_for_long_is_evicted(self):
+        lb_session = self.acquire()
+        self.pool.release(lb_session)
+        self.set_idle_since(sessionpool.MAX_IDLE + 1)
+
+        self.assertIsNot(self.acquire(), lb_session)
+        self.assertEqual([], self.pool._idle[self.key])
+
+    def test_idle_session_is_checked_before_reused(self):
+        lb_session = self.acquire()
+        self.pool.release(lb_session)
+        self.set_idle_since(sessionpool.HEALTH_CHECK_IDLE + 1)
+
+        self.assertIs(self.acquire(), lb_session)
+        lb_session._channel.System.SystemInfo.get_version \
+            .assert_called_once_with()
+
+    def test_dead_session_is_replaced(self):
+        lb_session = self.acquire()
+        self.pool.release(lb_session)
+        self.set_idle_since(sessionpool.HEALTH_CHECK_IDLE + 1)
+        lb_session._channel.System.SystemInfo.get_version.side_effect = \
+            Exception('Connection reset')
+
+        self.assertIsNot(self.acquire(), lb_session)
+        self.assertEqual(1, self.pool._busy[self.key])
+
+    def test_waits_for_session_when_device_reached_max(self):
+        patch('networkapi.plugins.F5.sessionpool.WAIT_TIMEOUT', 0.1).start()
+        for i in range(sessionpool.MAX_SESSIONS):
+            self.acquire()
+
+        start = time.time()
+        self.assertRaises(base_exceptions.CommandErrorException,
+                          self.acquire)
+        self.assertGreaterEqual(time.time() - start, 0.1)
+
+    def test_failure_opening_session_frees_slot(self):
+        self.new_lb.side_effect = Exception('Connection refused')
+
+        self.assertRaises(Exception, self.acquire)
+        self.assertEqual(0, self.pool._busy[self.key])
+
+    def test_variables_are_not_read_by_acquire(self):
+        for i in range(3):
+            self.pool.release(self.acquire())
+
+        self.assertEqual(2, self.get_variable.call_count)
+
+    def test_checkout_releases_session_on_device_error(self):
+        equipment = Mock()
+
+        with self.assertRaises(bigsuds.OperationFailed):
+            with patch.object(sessionpool, 'pool', self.pool):
+                with sessionpool.checkout(equipment) as lb_session:
+                    raise bigsuds.OperationFailed('Invalid pool')
+
+        self.assertEqual(0, self.pool._busy[self.key_of(equipment)])
+        self.assertEqual(lb_session, self.pool._idle[
+            self.key_of(equipment)][0][0])
+
+    def test_checkout_discards_session_on_other_error(self):
+        equipment = Mock()
+
+        with self.assertRaises(ValueError):
+            with patch.object(sessionpool, 'pool', self.pool):
+                with sessionpool.checkout(equipment):
+                    raise ValueError()
+
+        self.assertEqual(0, self.pool._busy[self.key_of(equipment)])
+        self.assertEqual([], self.pool._idle.get(self.key_of(equipment), []))
+
+    def key_of(self, equipment):
+        access = equipment.get.return_value.filter.return_value \
+            .uniqueResult.return_value
+        return (access.fqdn, access.user, True)
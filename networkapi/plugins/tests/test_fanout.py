@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+import unittest
+
+from networkapi.plugins import exceptions
+from networkapi.plugins import fanout
+
+
+class RunEachTestCase(unittest.TestCase):
+
+    def test_yields_calls_as_they_finish(self):
+        calls = [fanout.PluginCall('slow', time.sleep, (0.3,)),
+                 fanout.PluginCall('fast', time.sleep, (0,))]
+
+        names = [call.name for call in fanout.run_each(calls, 2, 5)]
+
+        self.assertEqual(names, ['fast', 'slow'])
+
+    def test_timeout_does_not_hold_other_calls(self):
+        event = threading.Event()
+        calls = [fanout.PluginCall('stuck', event.wait, (5,))] + \
+            [fanout.PluginCall('equip%s' % i, int, (i,)) for i in range(3)]
+
+        ended = dict((call.name, call)
+                     for call in fanout.run_each(calls, 1, 0.5))
+        event.set()
+
+        self.assertIsInstance(ended['stuck'].error,
+                              exceptions.CommandErrorException)
+        self.assertEqual([ended['equip%s' % i].result for i in range(3)],
+                         [0, 1, 2])
+
+    def test_calls_start_before_iteration(self):
+        started = [threading.Event(), threading.Event()]
+        calls = [fanout.PluginCall('equip%s' % i, event.set)
+                 for i, event in enumerate(started)]
+
+        ended = fanout.run_each(calls, 2, 5)
+
+        self.assertTrue(all(event.wait(5) for event in started))
+        self.assertEqual(len(list(ended)), 2)
+
+    def test_limits_calls_by_group(self):
+        lock = threading.Lock()
+        running = [0, 0]
+
+        def call_equipment():
+            with lock:
+                running[0] += 1
+                running[1] = max(running)
+            time.sleep(0.05)
+            with lock:
+                running[0] -= 1
+
+        calls = [fanout.PluginCall('equip%s' % i, call_equipment,
+                                   group='brand') for i in range(6)]
+        list(fanout.run_each(calls, 6, 5, group_limit=2))
+
+        self.assertEqual(running[1], 2)
+
+
+class RunTestCase(unittest.TestCase):
+
+    def wait_for(self, condition, timeout=5):
+        deadline = time.time() + timeout
+        while not condition() and time.time() < deadline:
+            time.sleep(0.01)
+        return condition()
+
+    def test_rolls_back_calls_that_succeeded(self):
+        rolled_back = list()
+
+        def fail():
+            raise exceptions.CommandErrorException('Error')
+
+        calls = [fanout.PluginCall('equip1', int, (1,),
+                                   rollback=rolled_back.append,
+                                   rollback_args=('equip1',)),
+                 fanout.PluginCall('equip2', fail,
+                                   rollback=rolled_back.append,
+                                   rollback_args=('equip2',))]
+
+        self.assertRaises(exceptions.CommandErrorException,
+                          fanout.run, calls, 2, 5)
+        self.assertEqual(rolled_back, ['equip1'])
+
+    def test_rolls_back_call_that_succeeds_after_timeout(self):
+        event = threading.Event()
+        rolled_back = list()
+        calls = [fanout.PluginCall('stuck', event.wait, (5,),
+                                   rollback=rolled_back.append,
+                                   rollback_args=('stuck',)),
+                 fanout.PluginCall('equip', int, (1,),
+                                   rollback=rolled_back.append,
+                                   rollback_args=('equip',))]
+
+        self.assertRaises(exceptions.CommandErrorException,
+                          fanout.run, calls, 2, 0.3)
+        self.assertEqual(rolled_back, ['equip'])
+
+        event.set()
+        self.assertTrue(self.wait_for(lambda: len(rolled_back) == 2))
+        self.assertEqual(rolled_back, ['equip', 'stuck'])
+        # Outcome reported is kept
+        self.assertTrue(calls[0].timed_out)
+        self.assertIsInstance(calls[0].error,
+                              exceptions.CommandErrorException)
+
+    def test_call_failing_after_timeout_is_not_rolled_back(self):
+        event = threading.Event()
+        rolled_back = list()
+
+        def fail_later():
+            event.wait(5)
+            raise exceptions.CommandErrorException('Error')
+
+        calls = [fanout.PluginCall('stuck', fail_later,
+                                   rollback=rolled_back.append,
+                                   rollback_args=('stuck',)),
+                 fanout.PluginCall('equip', int, (1,))]
+
+        self.assertRaises(exceptions.CommandErrorException,
+                          fanout.run, calls, 2, 0.3)
+        event.set()
+
+        self.assertTrue(self.wait_for(lambda: calls[0].finished))
+        time.sleep(0.05)
+        self.assertEqual(rolled_back, [])
+
+    def test_call_given_up_that_already_succeeded_is_rolled_back_now(self):
+        call = fanout.PluginCall('equip', int, (1,))
+        call.started = time.time()
+        self.assertTrue(call.give_up(1))
+        call.run()
+
+        self.assertTrue(call.roll_back_late())
+        self.assertIsNone(call.result)
+
+    def test_finished_call_is_not_given_up(self):
+        call = fanout.PluginCall('equip', int, (1,))
+        call.run()
+
+        self.assertFalse(call.give_up(1))
+        self.assertIsNone(call.error)
+        self.assertEqual(call.result, 1)
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+from django.test import TestCase
+from mock import Mock
+from mock import patch
+
+from networkapi.plugins import sshpool
+
+
+class SshPoolTestCase(TestCase):
+
+    def setUp(self):
+        patch('networkapi.plugins.sshpool.get_variable',
+              side_effect=lambda name, default: default).start()
+        self.addCleanup(patch.stopall)
+        self.pool = sshpool.SshPool()
+
+    def new_session(self, password='pass'):
+        client = Mock()
+        client.get_transport.return_value.is_active.return_value = True
+        channel = Mock()
+        channel.closed = False
+        channel.recv_ready.return_value = False
+        session = sshpool.SshSession(
+            ('equip.globo.com', 22, 'user'), password, client, channel)
+        session.last_used -= sshpool.DRAIN_QUIET
+        return session
+
+    def test_released_session_is_reused(self):
+        session = self.new_session()
+        self.pool.release(session)
+
+        self.assertIs(
+            self.pool.acquire('equip.globo.com', 22, 'user', 'pass'), session)
+        self.assertIsNone(
+            self.pool.acquire('equip.globo.com', 22, 'user', 'pass'))
+
+    def test_session_of_other_password_is_closed(self):
+        session = self.new_session(password='old')
+        self.pool.release(session)
+
+        self.assertIsNone(
+            self.pool.acquire('equip.globo.com', 22, 'user', 'pass'))
+        session.client.close.assert_called_once_with()
+
+    def test_session_not_reusable_is_closed(self):
+        session = self.new_session()
+        session.reusable = False
+        self.pool.release(session)
+
+        self.assertIsNone(
+            self.pool.acquire('equip.globo.com', 22, 'user', 'pass'))
+        session.client.close.assert_called_once_with()
+
+    def test_privilege_level_is_ensured_once_by_session(self):
+        calls = list()
+
+        @sshpool.session_privilege
+        def ensure_privilege_level(plugin, privilege_level=None):
+            calls.append(privilege_level)
+
+        plugin = Mock()
+        plugin.session = self.new_session()
+        ensure_privilege_level(plugin)
+        ensure_privilege_level(plugin)
+
+        self.assertEqual(calls, [None])
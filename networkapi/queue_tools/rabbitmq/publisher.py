@@ -0,0 +1,286 @@
+# -*- coding: utf-8 -*-
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Publisher of messages kept by process, by broker.
+
+Connections are kept in a pool and reused by all QueueManager sends, and
+exchanges and queues are declared once by channel. Each send publishes its
+messages and waits the broker confirms of all of them at once (brokers
+without publisher confirms are not waited).
+
+When the broker fails, messages are kept in a bounded spill queue and the
+broker is not tried again until a backoff interval, doubled on each
+failure, passes. Spilled messages are sent before new ones on next send,
+or by a timer once the interval passes, and a last time at exit.
+"""
+import atexit
+import logging
+import os
+import socket
+import threading
+import time
+from collections import deque
+
+from kombu import Connection
+from kombu import Exchange
+from kombu import Producer
+from kombu import Queue
+
+log = logging.getLogger(__name__)
+
+# Connections kept by broker
+POOL_LIMIT = 4
+# Seconds waiting a free connection of pool
+POOL_TIMEOUT = 5
+# Seconds waiting the broker confirms of a send
+CONFIRM_TIMEOUT = 5
+# Messages kept while broker is unavailable, older ones are dropped
+MAX_SPILLED = 10000
+# Seconds without trying broker after a failure, doubled up to max
+BACKOFF = 0.5
+MAX_BACKOFF = 30
+
+
+class Destination(object):
+
+    """Exchange, routing key and optional queue of messages."""
+
+    def __init__(self, exchange_name, exchange_type, routing_key,
+                 queue_name=None):
+        self.exchange_name = exchange_name
+        self.exchange_type = exchange_type
+        self.routing_key = routing_key
+        self.queue_name = queue_name
+
+    def key(self):
+        return (self.exchange_name, self.exchange_type, self.routing_key,
+                self.queue_name)
+
+
+class Confirms(object):
+
+    """Delivery tags of a channel waiting broker confirms."""
+
+    def __init__(self, channel):
+        self.last_tag = 0
+        self.pending = set()
+        self.nacked = 0
+        channel.confirm_select()
+        channel.events['basic_ack'].add(self._ack)
+        channel.events['basic_nack'].add(self._nack)
+
+    def published(self):
+        self.last_tag += 1
+        self.pending.add(self.last_tag)
+
+    def _confirm(self, delivery_tag, multiple):
+        if multiple:
+            self.pending = set(tag for tag in self.pending
+                               if tag > delivery_tag)
+        else:
+            self.pending.discard(delivery_tag)
+
+    def _ack(self, delivery_tag, multiple):
+        self._confirm(delivery_tag, multiple)
+
+    def _nack(self, delivery_tag, multiple, requeue):
+        self.nacked += 1
+        self._confirm(delivery_tag, multiple)
+
+
+class Publisher(object):
+
+    def __init__(self, broker, connect_timeout=None, pool_limit=POOL_LIMIT):
+        self.broker = broker
+        self.connect_timeout = connect_timeout
+        self.pool_limit = pool_limit
+        self._lock = threading.Lock()
+        self._pool = None
+        self._pid = None
+        self._spilled = deque()
+        self._backoff = 0
+        self._retry_at = 0
+        self._timer = None
+
+    def _get_pool(self):
+        # Connections of parent process can not be used after fork
+        with self._lock:
+            if self._pid != os.getpid():
+                connection = Connection(self.broker,
+                                        connect_timeout=self.connect_timeout)
+                self._pool = connection.Pool(self.pool_limit)
+                self._pid = os.getpid()
+            return self._pool
+
+    def _channel_state(self, channel):
+        state = getattr(channel, '_publisher_state', None)
+        if state is None:
+            confirms = None
+            if hasattr(channel, 'confirm_select') and \
+                    hasattr(channel, 'events'):
+                confirms = Confirms(channel)
+            state = {'declared': set(), 'confirms': confirms}
+            channel._publisher_state = state
+        return state
+
+    def _declare(self, channel, state, destination):
+        exchange = Exchange(destination.exchange_name,
+                            type=destination.exchange_type)
+        if destination.key() not in state['declared']:
+            exchange(channel).declare()
+            if destination.queue_name:
+                Queue(name=destination.queue_name, channel=channel,
+                      exchange=exchange,
+                      routing_key=destination.routing_key).declare()
+            state['declared'].add(destination.key())
+        return exchange
+
+    def _wait_confirms(self, connection, confirms):
+        deadline = time.time() + CONFIRM_TIMEOUT
+        while confirms.pending:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                raise socket.timeout('No confirm of %s messages' %
+                                     len(confirms.pending))
+            connection.drain_events(timeout=remaining)
+        if confirms.nacked:
+            nacked, confirms.nacked = confirms.nacked, 0
+            raise IOError('%s messages were not accepted by broker' % nacked)
+
+    def _send(self, connection, messages):
+        channel = connection.default_channel
+        state = self._channel_state(channel)
+        confirms = state['confirms']
+
+        for destination, body in messages:
+            exchange = self._declare(channel, state, destination)
+            producer = Producer(exchange=exchange, channel=channel,
+                                routing_key=destination.routing_key,
+                                auto_declare=False)
+            producer.publish(body)
+            if confirms is not None:
+                confirms.published()
+
+        if confirms is not None:
+            self._wait_confirms(connection, confirms)
+
+    def _spill(self, messages):
+        with self._lock:
+            self._spilled.extend(messages)
+            dropped = 0
+            while len(self._spilled) > MAX_SPILLED:
+                self._spilled.popleft()
+                dropped += 1
+        if dropped:
+            log.error('Spill queue of %s is full, %s messages dropped' %
+                      (self.broker, dropped))
+        self._schedule_flush()
+
+    def _schedule_flush(self):
+        # Timers do not survive fork, so a dead one is replaced
+        with self._lock:
+            if self._timer is not None and self._timer.is_alive():
+                return
+            delay = max(self._retry_at - time.time(), 0) or BACKOFF
+            self._timer = threading.Timer(delay, self._flush_spilled)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _flush_spilled(self):
+        with self._lock:
+            self._timer = None
+        self.flush()
+
+    def publish(self, destination, bodies):
+        """Sends bodies to destination, or spills them when broker fails."""
+
+        self._publish([(destination, body) for body in bodies])
+
+    def flush(self, force=False):
+        """Sends spilled messages, even during backoff when force is set."""
+
+        self._publish([], force)
+
+    def _publish(self, messages, force=False):
+        with self._lock:
+            if not force and time.time() < self._retry_at:
+                waiting = True
+            else:
+                waiting = False
+                messages = list(self._spilled) + messages
+                self._spilled.clear()
+
+        if not messages:
+            return
+
+        if waiting:
+            self._spill(messages)
+            return
+
+        try:
+            connection = self._get_pool().acquire(block=True,
+                                                  timeout=POOL_TIMEOUT)
+        except Exception, e:
+            log.error('No free connection to %s: %s' % (self.broker, e))
+            self._spill(messages)
+            return
+
+        try:
+            self._send(connection, messages)
+        except Exception, e:
+            # Broken connection is reopened by next use
+            try:
+                connection.close()
+            except Exception:
+                pass
+            with self._lock:
+                self._backoff = min(MAX_BACKOFF,
+                                    (self._backoff or BACKOFF / 2) * 2)
+                self._retry_at = time.time() + self._backoff
+            log.error('Error sending %s messages to %s, retrying in %s '
+                      'seconds: %s' % (len(messages), self.broker,
+                                       self._backoff, e))
+            # Messages not confirmed may be sent twice
+            self._spill(messages)
+        else:
+            with self._lock:
+                self._backoff = 0
+        finally:
+            connection.release()
+
+    def spilled(self):
+        return len(self._spilled)
+
+
+_publishers = dict()
+_publishers_lock = threading.Lock()
+
+
+def get_publisher(broker, connect_timeout=None):
+    """Returns the publisher of broker kept by process."""
+
+    with _publishers_lock:
+        publisher = _publishers.get(broker)
+        if publisher is None:
+            publisher = Publisher(broker, connect_timeout)
+            _publishers[broker] = publisher
+        return publisher
+
+
+@atexit.register
+def _flush_publishers():
+    for publisher in _publishers.values():
+        if publisher.spilled():
+            publisher.flush(force=True)
@@ -17,11 +17,8 @@ import json
 import logging
 import types
 
-from kombu import Connection
-from kombu import Exchange
-from kombu import Producer
-from kombu import Queue
-
+from networkapi.queue_tools.rabbitmq.publisher import Destination
+from networkapi.queue_tools.rabbitmq.publisher import get_publisher
 from networkapi.settings import BROKER_CONNECT_TIMEOUT
 from networkapi.settings import BROKER_DESTINATION
 from networkapi.settings import BROKER_URL
@@ -82,35 +79,21 @@ class QueueManager(object):
                 'QueueManagerError - Error on appending objects to queue.')
 
     def send(self):
+        """
+            Sends appended objects through the publisher of broker kept by
+            process, reusing its connections. Objects are kept to be sent
+            later when broker is unavailable.
 
-        try:
-            # Connection
-            conn = Connection(self.broker)
-
-            # Channel
-            channel = conn.channel()
-
-            # Exchange
-            task_exchange = Exchange(self._exchange_name,
-                                     type=self._queue_type)
-
-            # Queues
-            if self._queue_name:
-                queue = Queue(name=self._queue_name, channel=channel,
-                              exchange=task_exchange,
-                              routing_key=self._routing_key)
-                queue.declare()
-
-            # Producer
-            producer = Producer(exchange=task_exchange, channel=channel,
-                                routing_key=self._routing_key)
+        """
 
-            # Send message
-            for message in self._msgs:
-                serialized_message = json.dumps(message, ensure_ascii=False)
-                producer.publish(serialized_message)
+        try:
+            destination = Destination(self._exchange_name, self._queue_type,
+                                      self._routing_key, self._queue_name)
+            bodies = [json.dumps(message, ensure_ascii=False)
+                      for message in self._msgs]
 
-            conn.close()
+            get_publisher(self.broker, float(self._broker_timeout)).publish(
+                destination, bodies)
 
         except Exception, e:
 
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""Benchmark of messages sent to queue.
+
+Usage: python -m networkapi.queue_tools.tests.benchmark_publisher [broker]
+
+Sends N messages, one by send, opening a connection and declaring the
+exchange on each send (as QueueManager did) and through the pooled
+Publisher. Broker defaults to the kombu in memory transport, a stand-in of
+a local broker (it has no handshake, so the gain on a real broker is
+bigger).
+"""
+import json
+import sys
+import time
+
+from kombu import Connection
+from kombu import Exchange
+from kombu import Producer
+
+from networkapi.queue_tools.rabbitmq.publisher import Destination
+from networkapi.queue_tools.rabbitmq.publisher import Publisher
+
+SIZES = (100, 1000, 5000)
+BROKER = 'memory://'
+
+
+def message(number):
+    return json.dumps({'action': 'Alterar', 'kind': 'Vlan',
+                       'data': {'id_object': number}})
+
+
+def legacy_send(broker, destination, body):
+    conn = Connection(broker)
+    channel = conn.channel()
+    exchange = Exchange(destination.exchange_name,
+                        type=destination.exchange_type)
+    producer = Producer(exchange=exchange, channel=channel,
+                        routing_key=destination.routing_key)
+    producer.publish(body)
+    conn.close()
+
+
+def timeit(func, *args):
+    start = time.time()
+    func(*args)
+    return (time.time() - start) * 1000
+
+
+def main():
+    broker = sys.argv[1] if len(sys.argv) > 1 else BROKER
+    destination = Destination('benchmark', 'direct', 'benchmark')
+    publisher = Publisher(broker)
+
+    print '%8s %14s %14s %10s' % (
+        'messages', 'legacy (ms)', 'pooled (ms)', 'msgs/s')
+
+    for size in SIZES:
+        bodies = [message(number) for number in xrange(size)]
+
+        def send_legacy():
+            for body in bodies:
+                legacy_send(broker, destination, body)
+
+        def send_pooled():
+            for body in bodies:
+                publisher.publish(destination, [body])
+
+        legacy = timeit(send_legacy)
+        pooled = timeit(send_pooled)
+        assert publisher.spilled() == 0
+
+        print '%8d %14.2f %14.2f %10d' % (
+            size, legacy, pooled, size / (pooled / 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+
+import socket
+import unittest
+from collections import defaultdict
+
+from mock import Mock
+from mock import patch
+
+from networkapi.queue_tools.rabbitmq import publisher as publisher_module
+from networkapi.queue_tools.rabbitmq.publisher import Confirms
+from networkapi.queue_tools.rabbitmq.publisher import Destination
+from networkapi.queue_tools.rabbitmq.publisher import Publisher
+
+
+class FakeChannel(object):
+
+    def __init__(self):
+        self.events = defaultdict(set)
+
+    def confirm_select(self):
+        pass
+
+    def ack(self, delivery_tag, multiple=False):
+        for callback in self.events['basic_ack']:
+            callback(delivery_tag, multiple)
+
+    def nack(self, delivery_tag, multiple=False):
+        for callback in self.events['basic_nack']:
+            callback(delivery_tag, multiple, False)
+
+
+class PublisherTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.timer = patch(
+            'networkapi.queue_tools.rabbitmq.publisher.threading.Timer'
+        ).start()
+        self.timer.return_value.is_alive.return_value = False
+        self.time = patch(
+            'networkapi.queue_tools.rabbitmq.publisher.time.time',
+            return_value=1000.0).start()
+        self.publisher = Publisher('amqp://localhost')
+        self.connection = Mock()
+        self.publisher._get_pool = Mock()
+        self.publisher._get_pool.return_value.acquire.return_value = \
+            self.connection
+        self.send = patch.object(self.publisher, '_send').start()
+        self.destination = Destination('networkapi', 'topic', 'vlan')
+
+    def tearDown(self):
+        patch.stopall()
+
+    def sent(self):
+        return [[body for destination, body in call[0][1]]
+                for call in self.send.call_args_list]
+
+    def test_messages_are_spilled_when_broker_fails(self):
+        self.send.side_effect = IOError('Connection refused')
+
+        self.publisher.publish(self.destination, ['1', '2'])
+
+        self.assertEqual(2, self.publisher.spilled())
+        self.assertTrue(self.connection.close.called)
+        self.connection.release.assert_called_once_with()
+
+    def test_broker_is_not_tried_during_backoff(self):
+        self.send.side_effect = IOError('Connection refused')
+        self.publisher.publish(self.destination, ['1'])
+
+        self.time.return_value += publisher_module.BACKOFF / 2
+        self.publisher.publish(self.destination, ['2'])
+
+        self.assertEqual(1, self.send.call_count)
+        self.assertEqual(2, self.publisher.spilled())
+
+    def test_backoff_doubles_up_to_max_and_resets_on_success(self):
+        self.send.side_effect = IOError('Connection refused')
+        backoffs = list()
+        for i in range(10):
+            self.publisher.publish(self.destination, ['1'])
+            backoffs.append(self.publisher._backoff)
+            self.time.return_value = self.publisher._retry_at
+
+        self.assertEqual([0.5, 1, 2, 4, 8, 16, 30, 30, 30, 30], backoffs)
+
+        self.send.side_effect = None
+        self.publisher.publish(self.destination, ['2'])
+        self.assertEqual(0, self.publisher._backoff)
+
+    def test_spilled_messages_are_sent_before_new_ones(self):
+        self.send.side_effect = [IOError('Connection refused'), None]
+        self.publisher.publish(self.destination, ['1', '2'])
+
+        self.time.return_value += publisher_module.BACKOFF
+        self.publisher.publish(self.destination, ['3'])
+
+        self.assertEqual(['1', '2', '3'], self.sent()[-1])
+        self.assertEqual(0, self.publisher.spilled())
+
+    def test_oldest_spilled_messages_are_dropped(self):
+        self.send.side_effect = IOError('Connection refused')
+
+        with patch.object(publisher_module, 'MAX_SPILLED', 2):
+            self.publisher.publish(self.destination, ['1', '2', '3'])
+
+        self.assertEqual(['2', '3'], [body for destination, body
+                                      in self.publisher._spilled])
+
+    def test_spill_schedules_flush_after_backoff(self):
+        self.send.side_effect = IOError('Connection refused')
+
+        self.publisher.publish(self.destination, ['1'])
+
+        self.timer.assert_called_once_with(publisher_module.BACKOFF,
+                                           self.publisher._flush_spilled)
+        self.assertTrue(self.timer.return_value.start.called)
+
+    def test_flush_is_scheduled_once(self):
+        self.send.side_effect = IOError('Connection refused')
+        self.publisher.publish(self.destination, ['1'])
+        self.timer.return_value.is_alive.return_value = True
+
+        self.publisher.publish(self.destination, ['2'])
+
+        self.assertEqual(1, self.timer.call_count)
+
+    def test_scheduled_flush_sends_spilled_messages(self):
+        self.send.side_effect = [IOError('Connection refused'), None]
+        self.publisher.publish(self.destination, ['1'])
+
+        self.time.return_value += publisher_module.BACKOFF
+        self.publisher._flush_spilled()
+
+        self.assertEqual([['1'], ['1']], self.sent())
+        self.assertEqual(0, self.publisher.spilled())
+
+    def test_flush_without_spilled_messages_does_nothing(self):
+        self.publisher.flush()
+
+        self.assertFalse(self.send.called)
+        self.assertFalse(self.publisher._get_pool.called)
+
+    def test_forced_flush_ignores_backoff(self):
+        self.send.side_effect = [IOError('Connection refused'), None]
+        self.publisher.publish(self.destination, ['1'])
+
+        self.publisher.flush(force=True)
+
+        self.assertEqual(2, self.send.call_count)
+        self.assertEqual(0, self.publisher.spilled())
+
+    def test_publishers_with_spilled_messages_are_flushed_at_exit(self):
+        self.send.side_effect = [IOError('Connection refused'), None]
+        self.publisher.publish(self.destination, ['1'])
+
+        with patch.dict(publisher_module._publishers,
+                        {'amqp://localhost': self.publisher}):
+            publisher_module._flush_publishers()
+
+        self.assertEqual(0, self.publisher.spilled())
+
+
+class ConfirmsTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.channel = FakeChannel()
+        self.confirms = Confirms(self.channel)
+        self.publisher = Publisher('amqp://localhost')
+        self.connection = Mock()
+
+    def publish(self, count):
+        for i in range(count):
+            self.confirms.published()
+
+    def test_acks_confirm_messages(self):
+        self.publish(3)
+
+        self.channel.ack(1)
+        self.assertEqual(set([2, 3]), self.confirms.pending)
+
+        self.channel.ack(3, multiple=True)
+        self.assertEqual(set(), self.confirms.pending)
+
+    def test_wait_returns_when_all_are_acked(self):
+        self.publish(2)
+        self.connection.drain_events.side_effect = \
+            lambda timeout: self.channel.ack(2, multiple=True)
+
+        self.publisher._wait_confirms(self.connection, self.confirms)
+
+        self.assertEqual(1, self.connection.drain_events.call_count)
+
+    def test_wait_fails_when_messages_are_nacked(self):
+        self.publish(2)
+        self.channel.ack(1)
+        self.channel.nack(2)
+
+        self.assertRaises(IOError, self.publisher._wait_confirms,
+                          self.connection, self.confirms)
+        self.assertEqual(0, self.confirms.nacked)
+
+    @patch('networkapi.queue_tools.rabbitmq.publisher.CONFIRM_TIMEOUT', 0)
+    def test_wait_fails_when_confirms_time_out(self):
+        self.publish(1)
+
+        self.assertRaises(socket.timeout, self.publisher._wait_confirms,
+                          self.connection, self.confirms)
@@ -100,6 +100,10 @@ CACHES = {
 }
 
 
+# Backend of distributed locks: 'memcached' or 'mysql' (named locks,
+# waiters are notified on release instead of polling)
+LOCK_BACKEND = os.getenv('NETWORKAPI_LOCK_BACKEND', 'memcached')
+
 SESSION_ENGINE = 'django.contrib.sessions.backends.cache'
 SESSION_CACHE_ALIAS = 'default'
 
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Process-local cache of system variables.
+
+All variables are loaded with one query and kept for
+VARIABLES_CACHE_TIMEOUT seconds. A version stamp in the django cache is
+bumped by the Variable signals once their transaction commits, and each
+process compares it with the version it loaded at most every
+VARIABLES_VERSION_CHECK seconds, so changes made by other processes are
+seen without a query by read.
+"""
+import logging
+import threading
+import time
+
+from django.core.cache import cache as djangocache
+from django.db.models import get_model
+
+from networkapi.util.transaction_hooks import on_commit
+
+log = logging.getLogger(__name__)
+
+VARIABLES_CACHE_TIMEOUT = 60
+VARIABLES_VERSION_CHECK = 5
+VARIABLES_VERSION_KEY = 'VARIABLES_VERSION'
+# Version must outlive the values (30 days is the memcached max)
+VARIABLES_VERSION_TIMEOUT = 60 * 60 * 24 * 30
+
+
+def _get_version():
+    try:
+        return djangocache.get(VARIABLES_VERSION_KEY)
+    except Exception as e:
+        log.error(e)
+        return None
+
+
+class VariableCache(object):
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values = None
+        self._version = None
+        self._loaded_at = 0
+        self._checked_at = 0
+
+    def _is_fresh(self, now):
+        if self._values is None:
+            return False
+        if now - self._loaded_at > VARIABLES_CACHE_TIMEOUT:
+            return False
+        if now - self._checked_at > VARIABLES_VERSION_CHECK:
+            self._checked_at = now
+            return _get_version() == self._version
+        return True
+
+    def _load(self, now):
+        # Version is read before values, so a change made while loading
+        # is found in next check
+        version = _get_version()
+        variable_model = get_model('system', 'Variable')
+        self._values = dict(
+            variable_model.objects.values_list('name', 'value'))
+        self._version = version
+        self._loaded_at = now
+        self._checked_at = now
+
+    def get(self, name):
+        """Returns value of variable or None when it does not exist."""
+
+        now = time.time()
+        with self._lock:
+            if not self._is_fresh(now):
+                self._load(now)
+            return self._values.get(name)
+
+    def clear(self):
+        """Drops values of this process."""
+
+        with self._lock:
+            self._values = None
+
+    def invalidate(self):
+        """Drops values of all processes."""
+
+        self.clear()
+        try:
+            djangocache.set(VARIABLES_VERSION_KEY, repr(time.time()),
+                            VARIABLES_VERSION_TIMEOUT)
+        except Exception as e:
+            log.error(e)
+
+
+variables = VariableCache()
+
+
+###################
+# SIGNALS         #
+###################
+
+def variable_changed(sender, instance, **kwargs):
+
+    # Bumped before commit, values could be loaded again without the change
+    on_commit(variables.invalidate)
@@ -19,6 +19,7 @@ from django.core.exceptions import ObjectDoesNotExist
 
 from networkapi.api_rest import exceptions as api_exceptions
 from networkapi.system import exceptions
+from networkapi.system.cache import variables
 from networkapi.system.models import Variable
 
 log = logging.getLogger(__name__)
@@ -69,13 +70,12 @@ def get_by_name(name):
 
 
 def get_value(name, default=None):
-    try:
-        var = Variable.objects.filter(name=name).uniqueResult()
-    except ObjectDoesNotExist:
+    value = variables.get(name)
+    if value is None:
         if default:
             return default
         raise exceptions.VariableDoesNotExistException()
-    return var.value
+    return value
 
 
 def delete_variable(user, variable_id):
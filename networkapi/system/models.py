@@ -18,8 +18,11 @@ from __future__ import with_statement
 import logging
 
 from django.db import models
+from django.db.models.signals import post_delete
+from django.db.models.signals import post_save
 
 from networkapi.models.BaseModel import BaseModel
+from networkapi.system import cache
 
 
 class Variable (BaseModel):
@@ -34,3 +37,7 @@ class Variable (BaseModel):
     class Meta(BaseModel.Meta):
         db_table = u'variables'
         managed = True
+
+
+post_save.connect(cache.variable_changed, sender=Variable)
+post_delete.connect(cache.variable_changed, sender=Variable)
@@ -6,6 +6,11 @@ when you run "manage.py test".
 Replace this with more appropriate tests for your application.
 """
 from django.test import TestCase
+from mock import patch
+
+from networkapi.system import cache
+from networkapi.system import facade
+from networkapi.test.test_case import NetworkApiTestCase
 
 
 class SimpleTest(TestCase):
@@ -15,3 +20,31 @@ class SimpleTest(TestCase):
         Tests that 1 + 1 always equals 2.
         """
         self.assertEqual(1 + 1, 2)
+
+
+class VariableCacheTest(NetworkApiTestCase):
+
+    @patch('networkapi.system.cache.on_commit',
+           side_effect=lambda callback: callback())
+    def test_get_value_without_queries(self, on_commit):
+        var = facade.save_variable('cached_var', '1', 'Cached variable')
+        self.assertEqual('1', facade.get_value('cached_var'))
+
+        queries, value = self.count_queries(facade.get_value, 'cached_var')
+        self.assertEqual(0, queries)
+        self.assertEqual('1', value)
+
+        var.value = '2'
+        var.save()
+        self.assertEqual('2', facade.get_value('cached_var'))
+
+        var.delete()
+        self.assertEqual('0', facade.get_value('cached_var', '0'))
+
+    @patch('networkapi.system.cache.on_commit')
+    def test_version_is_bumped_on_commit(self, on_commit):
+        with patch.object(cache.variables, 'invalidate') as invalidate:
+            facade.save_variable('cached_var', '1', 'Cached variable')
+
+            self.assertFalse(invalidate.called)
+            on_commit.assert_called_once_with(invalidate)
@@ -6,9 +6,11 @@ import base64
 import json
 import logging
 
+from django.db import connection
 from django.test import TestCase
 
 from networkapi.settings import local_files
+from networkapi.system.cache import variables
 from networkapi.test import load_json
 from networkapi.test.utils import load_file_as_string
 
@@ -17,6 +19,11 @@ LOG = logging.getLogger(__name__)
 
 class NetworkApiTestCase(TestCase):
 
+    def _fixture_setup(self):
+        # Variables of a test must not be seen by the next one
+        variables.clear()
+        super(NetworkApiTestCase, self)._fixture_setup()
+
     def setUp(self):
         pass
 
@@ -83,3 +90,15 @@ class NetworkApiTestCase(TestCase):
             received_data,
             msg.format(expected_data, received_data)
         )
+
+    def count_queries(self, func, *args, **kwargs):
+        """Returns number of queries executed by func and its result."""
+
+        use_debug_cursor = connection.use_debug_cursor
+        connection.use_debug_cursor = True
+        start = len(connection.queries)
+        try:
+            result = func(*args, **kwargs)
+            return len(connection.queries) - start, result
+        finally:
+            connection.use_debug_cursor = use_debug_cursor
@@ -57,6 +57,7 @@ from ..plugins.SDN.ODL.tests.test_tcp_control_bits import *
 
 # Tests for Network v4
 from ..api_network.tests.test_create_network import *
+from ..api_network.tests.test_create_network_batch import *
 from ..api_network.tests.test_facade import *
 from ..api_network.tests.v3.unit.networkipv4.async.test_delete import *
 from ..api_network.tests.v3.unit.networkipv4.async.test_post import *
@@ -133,3 +134,26 @@ from ..api_vip_request.tests.unit.async.test_delete import *
 from ..api_vip_request.tests.unit.async.test_post import *
 from ..api_vip_request.tests.unit.async.test_put import *
 
+
+# Tests for Deploy
+from ..api_deploy.tests.test_deploy_script import *
+
+
+# Tests for Event Log
+from ..eventlog.tests.test_audit import *
+
+
+# Tests for Queue Tools
+from ..queue_tools.tests.test_publisher import *
+
+
+# Tests for Util
+from ..util.tests.test_appcache import *
+from ..util.tests.test_cached_search import *
+from ..util.tests.test_freespace import *
+from ..util.tests.test_json_validate import *
+from ..util.tests.test_transaction_hooks import *
+
+
+# Tests for Auth
+from ..auth.tests.test_object_perm import *
@@ -26,13 +26,18 @@ import ldap
 from django.core.exceptions import MultipleObjectsReturned
 from django.core.exceptions import ObjectDoesNotExist
 from django.db import models
+from django.db.models.signals import post_delete
+from django.db.models.signals import post_save
 
 from networkapi.models.BaseModel import BaseModel
 from networkapi.system import exceptions
 from networkapi.system.facade import get_value
 from networkapi.util import convert_string_or_int_to_boolean
 from networkapi.util.appcache import get_cache, set_cache
+from networkapi.util.appcache import invalidate_tags
+from networkapi.util.appcache import USER_CACHE_ENTRY
 from networkapi.util.encrypt import encrypt_key, generate_key
+from networkapi.util.transaction_hooks import on_commit
 
 from base64 import b64encode
 
@@ -470,3 +475,20 @@ class UsuarioGrupo(BaseModel):
         except Exception, e:
             cls.log.error(u'Failure to search the UserGroup.')
             raise UsuarioError(e, u'Failure to search the UserGroup.')
+
+
+def _invalidate_cached_users():
+
+    invalidate_tags([USER_CACHE_ENTRY])
+
+
+def invalidate_cached_users(sender, instance, **kwargs):
+    """Drops users cached by authenticate once the change commits."""
+
+    on_commit(_invalidate_cached_users)
+
+
+post_save.connect(invalidate_cached_users, sender=Usuario)
+post_delete.connect(invalidate_cached_users, sender=Usuario)
+post_save.connect(invalidate_cached_users, sender=UsuarioGrupo)
+post_delete.connect(invalidate_cached_users, sender=UsuarioGrupo)
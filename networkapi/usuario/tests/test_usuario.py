@@ -8,6 +8,8 @@ import mock
 from django.db import IntegrityError
 from django.test import TestCase
 
+from networkapi.auth import authenticate
+from networkapi.usuario.models import Usuario
 from networkapi.usuario.tests import factory
 
 LOG = logging.getLogger(__name__)
@@ -19,9 +21,60 @@ class UsuarioTestCase(TestCase):
 
     def setUp(self):
         self.usuario = factory.UserWithGroupFactory()
+        self.cache = dict()
 
     def tearDown(self):
         self.usuario = None
 
     def test_create_user_with_success(self):
         self.assertTrue(self.usuario.id)
+
+    def authenticate_twice(self, use_cache_user='1', version=1):
+        self.versions = {'CACHE_USER': version}
+        with mock.patch('networkapi.auth.get_value',
+                        return_value=use_cache_user), \
+                mock.patch('networkapi.auth.get_tags_version',
+                           side_effect=lambda tags: dict(self.versions)), \
+                mock.patch('networkapi.auth.get_cache',
+                           side_effect=self.cache.get), \
+                mock.patch('networkapi.auth.set_cache',
+                           side_effect=self.set_cache), \
+                mock.patch.object(Usuario, 'get_enabled_user',
+                                  return_value=self.usuario) as get_user:
+            first = authenticate(self.usuario.user, 'secret')
+            second = authenticate(self.usuario.user, 'secret')
+            authenticate(self.usuario.user, 'other')
+        return first, second, get_user
+
+    def set_cache(self, key, data, timeout):
+        self.cache[key] = data
+
+    def test_authenticated_user_is_cached(self):
+        first, second, get_user = self.authenticate_twice()
+
+        self.assertEqual(first, second)
+        self.assertEqual(2, get_user.call_count)
+        self.assertFalse([key for key in self.cache if 'secret' in key])
+
+    def test_cached_user_is_not_used_without_use_cache_user(self):
+        self.authenticate_twice()
+
+        first, second, get_user = self.authenticate_twice(use_cache_user='0')
+
+        self.assertEqual(3, get_user.call_count)
+
+    def test_cached_user_is_not_used_after_users_change(self):
+        self.authenticate_twice()
+
+        first, second, get_user = self.authenticate_twice(version=2)
+
+        self.assertEqual(2, get_user.call_count)
+
+    @mock.patch('networkapi.usuario.models.invalidate_tags')
+    @mock.patch('networkapi.usuario.models.on_commit',
+                side_effect=lambda callback: callback())
+    def test_save_of_user_invalidates_cached_users(self, on_commit,
+                                                   invalidate_tags):
+        self.usuario.save()
+
+        invalidate_tags.assert_called_with(['CACHE_USER'])
@@ -1,9 +1,9 @@
 import hashlib
 import logging
+import time
 
 from django.core.cache import cache as djangocache
 
-from networkapi.distributedlock import distributedlock
 from networkapi.system.facade import get_value
 
 
@@ -12,6 +12,24 @@ log = logging.getLogger(__name__)
 
 DEFAULT_CACHE_TIMEOUT = 86400
 ENVIRONMENT_CACHE_ENTRY = "CACHE_ENV_LIST"
+VLAN_CACHE_ENTRY = "CACHE_VLAN_LIST"
+NETWORKV4_CACHE_ENTRY = "CACHE_NETWORKV4_LIST"
+NETWORKV6_CACHE_ENTRY = "CACHE_NETWORKV6_LIST"
+EQUIPMENT_CACHE_ENTRY = "CACHE_EQUIPMENT_LIST"
+VIP_REQUEST_CACHE_ENTRY = "CACHE_VIP_REQUEST_LIST"
+
+# Tag of every response cached by cached_search, invalidated by model saves
+SEARCH_CACHE_ENTRY = "CACHE_SEARCH"
+DEFAULT_SEARCH_CACHE_TIMEOUT = 300
+
+# Tag of users cached by authenticate, invalidated by saves of users
+USER_CACHE_ENTRY = "CACHE_USER"
+
+# Versions of tags must outlive the entries (30 days is the memcached max)
+TAG_TIMEOUT = 60 * 60 * 24 * 30
+
+# Hits, misses, sets and invalidations by prefix
+_cache_stats = dict()
 
 
 def cache_enabled():
@@ -32,6 +50,13 @@ def set_cache(key, data, timeout):
         log.error(ERROR)
 
 
+def get_search_cache_time():
+    try:
+        return int(get_value('SEARCH_CACHE_TIMEOUT'))
+    except Exception:
+        return DEFAULT_SEARCH_CACHE_TIMEOUT
+
+
 def get_cache(key):
     try:
         data = djangocache.get(key)
@@ -42,58 +67,134 @@ def get_cache(key):
         log.error(ERROR)
 
 
-def get_cached_search(prefix, search):
+def _tag_key(tag):
+    return 'CACHE_TAG:%s' % tag
 
-    if cache_enabled():
+
+def get_tags_version(tags):
+    """Returns current version of each tag, creating missing ones.
+
+    A missing version starts from current time, not from 0, so entries cached
+    before an eviction of the version can not be valid again.
+    """
+
+    keys = dict((_tag_key(tag), tag) for tag in tags)
+    versions = djangocache.get_many(keys.keys())
+
+    for key in keys:
+        if key not in versions:
+            djangocache.add(key, int(time.time() * 1000), TAG_TIMEOUT)
+            versions[key] = djangocache.get(key)
+
+    return dict((keys[key], version) for key, version in versions.items())
+
+
+def invalidate_tags(tags):
+    """Invalidates every entry cached with any of tags, with one increment
+    by tag."""
+
+    for tag in tags:
         try:
-            search_md5 = hashlib.md5(str(search)).hexdigest()
-            key = prefix+search_md5
-            data = get_cache(key)
-            return data
-        except Exception as e:
-            log.error(e)
-            return None
+            djangocache.incr(_tag_key(tag))
+        except ValueError:
+            # Version not cached, so there is no entry with it
+            pass
+        log.debug('Invalidated cache tag %s' % tag)
+        _stats(_tag_prefix(tag), 'invalidations')
 
 
-def set_cache_search_with_list(prefix, search, data, timeout=DEFAULT_CACHE_TIMEOUT):
+def _tag_prefix(tag):
+    # Tags of one object (e.g. environment_cache_tag) count for their prefix
+    return tag.split(':', 1)[0]
 
-    if cache_enabled():
-        with distributedlock(prefix):
-            try:
-                search_md5 = hashlib.md5(str(search)).hexdigest()
-                key = prefix+search_md5
-                djangocache.set(key, data, timeout)
 
-                cached_search_md5_list = get_cache(prefix)
-                if not cached_search_md5_list:
-                    cached_search_md5_list = []
+def environment_cache_tag(env_id):
+    """Tag of entries with data of one environment."""
+
+    return '%s:%s' % (ENVIRONMENT_CACHE_ENTRY, env_id)
+
+
+def _tagged_key(prefix, search, tags):
+    versions = get_tags_version(tags)
+    tagged = '%s|%s' % (search, sorted(versions.items()))
+    return prefix + hashlib.md5(tagged).hexdigest()
+
+
+def _stats(prefix, name, value=1):
+    stats = _cache_stats.setdefault(prefix, {
+        'hits': 0,
+        'misses': 0,
+        'sets': 0,
+        'invalidations': 0,
+    })
+    stats[name] += value
+
 
-                if search_md5 not in cached_search_md5_list:
-                    cached_search_md5_list.append(search_md5)
+def get_cache_stats():
+    """Returns hits, misses, sets and invalidations, by prefix, of this
+    process."""
 
-                log.debug("Caching key %s in list %s with timeout %s..." %
-                          (key, prefix, timeout))
-                key = prefix
-                djangocache.set(key, cached_search_md5_list, timeout)
-            except Exception as e:
-                log.error(e)
+    return dict((prefix, dict(stats))
+                for prefix, stats in _cache_stats.items())
 
 
-def delete_cached_searches_list(prefix):
+def get_tagged_search(prefix, search, tags=None):
+    """Returns data cached for search, or None.
+
+    @param tags: tags of data, prefix by default.
+    """
+
+    try:
+        key = _tagged_key(prefix, search, tags or [prefix])
+        data = get_cache(key)
+        _stats(prefix, 'hits' if data else 'misses')
+        return data
+    except Exception as e:
+        log.error(e)
+        return None
+
+
+def set_tagged_search(prefix, search, data, timeout=DEFAULT_CACHE_TIMEOUT,
+                      tags=None):
+    """Caches data of search, valid until any of tags is invalidated.
+
+    @param tags: tags of data, prefix by default.
+    """
+
+    try:
+        key = _tagged_key(prefix, search, tags or [prefix])
+        djangocache.set(key, data, timeout)
+        log.debug("Caching key %s with tags %s with timeout %s..." %
+                  (key, tags or [prefix], timeout))
+        _stats(prefix, 'sets')
+    except Exception as e:
+        log.error(e)
+
+
+def get_cached_search(prefix, search, tags=None):
+
+    if cache_enabled():
+        return get_tagged_search(prefix, search, tags)
+
+
+def set_cache_search_with_list(prefix, search, data, timeout=DEFAULT_CACHE_TIMEOUT,
+                               tags=None):
 
     if cache_enabled():
-        with distributedlock(prefix):
-            try:
-                cached_search_md5_list = get_cache(prefix)
-                if cached_search_md5_list:
-                    for cached_search_md5 in cached_search_md5_list:
-                        key = str(prefix)+str(cached_search_md5)
-                        log.debug("Deleting cache entry %s ... " % key)
-                        djangocache.delete(key)
-                    log.debug("Deleting cache list entry %s ..." % prefix)
-                    djangocache.delete(prefix)
-            except Exception as e:
-                log.error(e)
-                raise e
-
-            return True
+        set_tagged_search(prefix, search, data, timeout, tags)
+
+
+def delete_cached_searches_list(prefix, tags=()):
+    """Invalidates searches cached with prefix (and with any of tags).
+
+    Invalidates even when cache is disabled, since it costs one increment
+    by tag and cachenew caches searches regardless of 'use_cache'.
+    """
+
+    try:
+        invalidate_tags([prefix] + list(tags))
+    except Exception as e:
+        log.error(e)
+        raise e
+
+    return True
@@ -1,15 +1,22 @@
 # -*- coding: utf-8 -*-
 import ast
 import functools
+import hashlib
 import json
 import logging
 
 from jsonspec.validators.exceptions import ValidationError
 from rest_framework import exceptions as exceptions_api
+from rest_framework import status
 from rest_framework.exceptions import ParseError
+from rest_framework.response import Response
 
 from networkapi.api_rest import exceptions as rest_exceptions
 from networkapi.system.facade import get_value as get_variable
+from networkapi.util.appcache import get_cached_search
+from networkapi.util.appcache import get_search_cache_time
+from networkapi.util.appcache import SEARCH_CACHE_ENTRY
+from networkapi.util.appcache import set_cache_search_with_list
 
 log = logging.getLogger(__name__)
 
@@ -161,6 +168,73 @@ def prepare_search(func):
     return inner
 
 
+def _permission_scope(user):
+    """Returns what defines the objects user can see: its groups."""
+
+    if hasattr(user, 'grupos'):
+        return sorted(user.grupos.values_list('id', flat=True))
+    return getattr(user, 'id', None)
+
+
+def cached_search(prefix):
+    """Caches responses of a GET view decorated with prepare_search.
+
+    Responses are keyed by the normalized search, fields, include, exclude,
+    kind, other params and permission scope of user, and are invalidated by
+    any model save (see models_signal_receiver). The ETag of the data is
+    sent, and when it matches If-None-Match the response is 304.
+    """
+
+    def outer(func):
+        @functools.wraps(func)
+        def inner(self, request, *args, **kwargs):
+
+            prepared = ('search', 'fields', 'include', 'exclude', 'kind')
+            identifier = json.dumps({
+                'search': self.search,
+                'fields': self.fields,
+                'include': self.include,
+                'exclude': self.exclude,
+                'kind': self.kind,
+                'params': sorted((key, value) for key, value
+                                 in request.GET.lists()
+                                 if key not in prepared),
+                'kwargs': kwargs,
+                'scope': _permission_scope(request.user),
+                'host': request.get_host(),
+                'secure': request.is_secure(),
+            }, sort_keys=True)
+            tags = [prefix, SEARCH_CACHE_ENTRY]
+            if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+
+            cached = get_cached_search(prefix, identifier, tags)
+            if cached:
+                if cached['etag'] == if_none_match:
+                    return Response(status=status.HTTP_304_NOT_MODIFIED,
+                                    headers={'ETag': cached['etag']})
+                return Response(cached['data'], status=status.HTTP_200_OK,
+                                headers={'ETag': cached['etag']})
+
+            response = func(self, request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+
+            etag = '"%s"' % hashlib.md5(
+                json.dumps(response.data, sort_keys=True, default=unicode)
+            ).hexdigest()
+            set_cache_search_with_list(
+                prefix, identifier, {'etag': etag, 'data': response.data},
+                get_search_cache_time(), tags)
+
+            if etag == if_none_match:
+                return Response(status=status.HTTP_304_NOT_MODIFIED,
+                                headers={'ETag': etag})
+            response['ETag'] = etag
+            return response
+        return inner
+    return outer
+
+
 def mock_return(mock_value=None):
 
     def outer(func):
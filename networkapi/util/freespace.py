@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Free prefix space of an address family.
+
+Used networks are merged into sorted, disjoint intervals once. The gaps
+between them are the leaves of a segment tree that keeps, for each node,
+the size of the largest aligned block (CIDR) fitting in its gaps, so the
+first free subnet of a given prefix length is found in O(log n).
+"""
+from bisect import bisect_left
+from bisect import bisect_right
+
+from networkapi.infrastructure.ipaddr import IPAddress
+from networkapi.infrastructure.ipaddr import IPNetwork
+from networkapi.infrastructure.ipaddr import summarize_address_range
+
+
+def _largest_block(first, last, max_size):
+    """Returns the size of the largest aligned block inside [first, last]."""
+
+    largest = 0
+    while first <= last:
+        size = first & -first if first else max_size
+        while size > last - first + 1:
+            size >>= 1
+        largest = max(largest, size)
+        first += size
+    return largest
+
+
+def _fit_block(first, last, size):
+    """Returns the first aligned block of size inside [first, last]."""
+
+    start = (first + size - 1) & ~(size - 1)
+    if start + size - 1 <= last:
+        return start
+    return None
+
+
+class FreeSpace(object):
+
+    """Free address space of an IP version given a list of used networks."""
+
+    def __init__(self, used_nets, version=4):
+        self.version = version
+        self.max_prefixlen = 32 if version == 4 else 128
+        self.max_size = 1 << self.max_prefixlen
+
+        used = sorted((int(net.network), int(net.broadcast))
+                      for net in used_nets if net.version == version)
+
+        # Merges overlapping and adjacent used networks
+        merged = list()
+        for first, last in used:
+            if merged and first <= merged[-1][1] + 1:
+                if last > merged[-1][1]:
+                    merged[-1] = (merged[-1][0], last)
+            else:
+                merged.append((first, last))
+
+        # Gaps between used networks are the leaves
+        gaps = list()
+        cursor = 0
+        for first, last in merged:
+            if first > cursor:
+                gaps.append((cursor, first - 1))
+            cursor = last + 1
+        if cursor < self.max_size:
+            gaps.append((cursor, self.max_size - 1))
+
+        self._starts = [gap[0] for gap in gaps]
+        self._ends = [gap[1] for gap in gaps]
+        # Each leaf keeps the gaps still free after allocations
+        self._leaves = [[gap] for gap in gaps]
+
+        self._size = 1
+        while self._size < len(gaps):
+            self._size <<= 1
+        self._tree = [0] * (2 * self._size)
+        for leaf, (first, last) in enumerate(gaps):
+            self._tree[self._size + leaf] = _largest_block(
+                first, last, self.max_size)
+        for node in xrange(self._size - 1, 0, -1):
+            self._tree[node] = max(self._tree[2 * node],
+                                   self._tree[2 * node + 1])
+
+    def _update_leaf(self, leaf):
+        node = self._size + leaf
+        self._tree[node] = max([0] + [
+            _largest_block(first, last, self.max_size)
+            for first, last in self._leaves[leaf]])
+        node >>= 1
+        while node:
+            self._tree[node] = max(self._tree[2 * node],
+                                   self._tree[2 * node + 1])
+            node >>= 1
+
+    def _leftmost(self, lo, hi, size, node=1, node_lo=0, node_hi=None):
+        """Returns the leftmost leaf in [lo, hi] fitting a block of size."""
+
+        if node_hi is None:
+            node_hi = self._size - 1
+        if node_hi < lo or node_lo > hi or self._tree[node] < size:
+            return None
+        if node_lo == node_hi:
+            return node_lo
+        mid = (node_lo + node_hi) // 2
+        leaf = self._leftmost(lo, hi, size, 2 * node, node_lo, mid)
+        if leaf is None:
+            leaf = self._leftmost(lo, hi, size, 2 * node + 1, mid + 1,
+                                  node_hi)
+        return leaf
+
+    def _fit_leaf(self, leaf, first, last, size):
+        for gap_first, gap_last in self._leaves[leaf]:
+            start = _fit_block(max(gap_first, first),
+                               min(gap_last, last), size)
+            if start is not None:
+                return start
+        return None
+
+    def first_free_subnet(self, net, prefixlen):
+        """Returns the first free subnet of prefixlen inside net, or None."""
+
+        if prefixlen < net.prefixlen or prefixlen > self.max_prefixlen:
+            return None
+
+        size = 1 << (self.max_prefixlen - prefixlen)
+        first = int(net.network)
+        last = int(net.broadcast)
+
+        # Leaves with gaps intersecting the network
+        lo = bisect_left(self._ends, first)
+        hi = bisect_right(self._starts, last) - 1
+        if lo > hi:
+            return None
+
+        # Border leaves may be partially out of the network
+        start = self._fit_leaf(lo, first, last, size)
+        if start is None and hi - lo > 1:
+            leaf = self._leftmost(lo + 1, hi - 1, size)
+            if leaf is not None:
+                start = self._fit_leaf(leaf, first, last, size)
+        if start is None and hi > lo:
+            start = self._fit_leaf(hi, first, last, size)
+        if start is None:
+            return None
+
+        return IPNetwork('%s/%s' % (
+            IPAddress(start, version=self.version), prefixlen))
+
+    def allocate(self, subnet):
+        """Marks subnet as used."""
+
+        first = int(subnet.network)
+        last = int(subnet.broadcast)
+        lo = bisect_left(self._ends, first)
+        hi = bisect_right(self._starts, last) - 1
+
+        for leaf in xrange(lo, hi + 1):
+            gaps = list()
+            for gap_first, gap_last in self._leaves[leaf]:
+                if gap_last < first or gap_first > last:
+                    gaps.append((gap_first, gap_last))
+                    continue
+                if gap_first < first:
+                    gaps.append((gap_first, first - 1))
+                if gap_last > last:
+                    gaps.append((last + 1, gap_last))
+            self._leaves[leaf] = gaps
+            self._update_leaf(leaf)
+
+    def free_networks(self, net):
+        """Returns the free space inside net as a sorted list of networks."""
+
+        first = int(net.network)
+        last = int(net.broadcast)
+        lo = bisect_left(self._ends, first)
+        hi = bisect_right(self._starts, last) - 1
+
+        free_nets = list()
+        for leaf in xrange(lo, hi + 1):
+            for gap_first, gap_last in self._leaves[leaf]:
+                gap_first = max(gap_first, first)
+                gap_last = min(gap_last, last)
+                if gap_first <= gap_last:
+                    free_nets.extend(summarize_address_range(
+                        IPAddress(gap_first, version=self.version),
+                        IPAddress(gap_last, version=self.version)))
+        return free_nets
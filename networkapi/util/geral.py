@@ -1,17 +1,15 @@
 # -*- coding: utf-8 -*-
 import copy
 import logging
-import random
 import urllib
-from time import sleep
 
 from django.db.models.loading import AppCache
 from django.db.models.loading import import_module
 from django.db.models.loading import module_has_submodule
 from rest_framework.response import Response
 
-from networkapi.distributedlock import distributedlock
-from networkapi.distributedlock import LockNotAcquiredError
+from networkapi.distributedlock import acquire_many
+from networkapi.distributedlock import release_many
 from networkapi.extra_logging import local
 
 log = logging.getLogger(__name__)
@@ -42,56 +40,32 @@ class CustomResponse(Response):
 def create_lock(objects, lock_name):
     """Creates locks for list of objects"""
 
-    locks_list = list()
+    locks_name = list()
     for obj in objects:
         if isinstance(obj, dict):
-            lock = distributedlock(lock_name % obj['id'])
+            locks_name.append(lock_name % obj['id'])
         else:
-            lock = distributedlock(lock_name % obj)
-        lock.__enter__()
-        locks_list.append(lock)
+            locks_name.append(lock_name % obj)
 
-    return locks_list
+    return acquire_many(locks_name)
 
 
 def destroy_lock(locks_list):
     """Destroys locks by list of objects"""
 
-    for lock in locks_list:
-        lock.__exit__('', '', '')
+    release_many(locks_list)
 
 
 def create_lock_with_blocking(locks_name):
     """
     Creates locks for list of objects.
-    Tries to lock all objects, if can not, unlocks all
-    and tries again in 1 at 10 seconds.
+    Locks are acquired together; if one is busy, unlocks all, waits
+    for the busy one and tries again holding it.
     """
 
-    locks_list = list()
-    for lock_name in locks_name:
-        try:
-            lock = distributedlock(lock_name, blocking=False)
-            # TODO: This is a temporary solution for a high needed change. In the future we need to validate
-            #  why destroy_lock in models/create_v3 didn't work some times
-
-            if lock.get_cached_data():
-                log.info('Get cached lock data for {}. Disabling it and creating a new lock'.format(lock_name))
-                lock.lock.instance_id = lock.get_cached_data()
-                lock.__exit__('', '', '')
-            lock.__enter__()
-            locks_list.append(lock)
-        except LockNotAcquiredError:
-            destroy_lock(locks_list)
-            break
-
-    if locks_name and not locks_list:
-        time_sleep = random.randint(1, 10)
-        log.warning('Trying lock in %s seconds' % time_sleep)
-        sleep(time_sleep)
-        create_lock_with_blocking(locks_name)
-
-    return locks_list
+    # TODO: This is a temporary solution for a high needed change. In the future we need to validate
+    #  why destroy_lock in models/create_v3 didn't work some times
+    return acquire_many(locks_name, take_over=True)
 
 
 def url_search(obj_model, property_search, request):
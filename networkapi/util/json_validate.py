@@ -1,10 +1,15 @@
 # -*- coding: utf-8 -*-
+import copy
 import json
 import logging
+import threading
+import time
 from functools import wraps
 
 from jsonspec.reference import resolve
 from jsonspec.validators import load
+from jsonspec.validators import Draft04Validator
+from jsonspec.validators.bases import Validator
 from jsonspec.validators.exceptions import ValidationError
 from rest_framework import exceptions as exceptions_api
 
@@ -12,6 +17,12 @@ from networkapi.api_rest import exceptions as rest_exceptions
 
 log = logging.getLogger(__name__)
 
+# Compiled validators by spec file
+_validators = dict()
+# Count, total and max time of validations by spec file
+_validation_stats = dict()
+_stats_mutex = threading.Lock()
+
 
 def verify_ports(pools):
     for idx, pool in enumerate(pools['server_pools']):
@@ -48,15 +59,159 @@ def verify_ports_vip(vips):
                 ['#vips/%s/ports/*/port ' % (idx)])
 
 
+class CompiledValidator(Draft04Validator):
+
+    """Draft04Validator that is not deep copied on each validation.
+
+    Draft04Validator.validate deep copies itself (with all its subschemas)
+    only to get a new list of errors, and every subschema does it again for
+    each value validated. Attributes are never changed while validating, so
+    a shallow copy is enough.
+    """
+
+    def __deepcopy__(self, memo):
+        validator = copy.copy(self)
+        validator.errors = []
+        return validator
+
+
+def _compile(validator, seen=None):
+    """Turns Draft04Validators of a loaded schema into CompiledValidators."""
+
+    seen = seen if seen is not None else set()
+    if id(validator) in seen:
+        return
+    seen.add(id(validator))
+
+    if isinstance(validator, Validator):
+        if type(validator) is Draft04Validator:
+            validator.__class__ = CompiledValidator
+        for value in getattr(validator, 'attrs', {}).values():
+            _compile(value, seen)
+    elif isinstance(validator, dict):
+        for value in validator.values():
+            _compile(value, seen)
+    elif isinstance(validator, (list, tuple)):
+        for value in validator:
+            _compile(value, seen)
+
+
+class SpecValidator(object):
+
+    """Compiled validator of a spec.
+
+    Arrays of objects in top level properties (e.g. 'vips' of vip_post) are
+    validated item by item with the compiled validator of the items, so a
+    large payload is not validated as one tree.
+    """
+
+    def __init__(self, json_file, validator):
+        _compile(validator)
+        self.json_file = json_file
+        self.validator = validator
+        self.items = dict()
+
+        if not isinstance(validator, Draft04Validator):
+            return
+
+        properties = dict(validator.attrs['properties'])
+        for name, prop in properties.items():
+            if isinstance(prop, Draft04Validator) and \
+                    isinstance(prop.attrs.get('items'), Validator):
+                self.items[name] = prop.attrs['items']
+
+                # Validates the array itself (type, size) but not its items
+                array = copy.copy(prop)
+                array.attrs = dict(prop.attrs)
+                del array.attrs['items']
+                properties[name] = array
+
+        if self.items:
+            self.validator = copy.copy(validator)
+            self.validator.attrs = dict(validator.attrs)
+            self.validator.attrs['properties'] = properties
+
+    def validate(self, obj, pointer=None):
+        start = time.time()
+        try:
+            errors = list()
+            try:
+                obj = self.validator.validate(obj, pointer)
+            except ValidationError, error:
+                errors.append(error)
+
+            if isinstance(obj, dict):
+                for name, validator in self.items.items():
+                    elements = obj.get(name)
+                    if not isinstance(elements, list):
+                        continue
+                    for index, element in enumerate(elements):
+                        try:
+                            elements[index] = validator.validate(
+                                element, '%s/%s/%s' % (pointer or '#', name,
+                                                       index))
+                        except ValidationError, error:
+                            errors.append(error)
+
+            if errors:
+                raise ValidationError('multiple errors', obj, errors=errors)
+
+            return obj
+        finally:
+            _record_validation(self.json_file, time.time() - start)
+
+    def __call__(self, obj, pointer=None):
+        return self.validate(obj, pointer)
+
+
+def _record_validation(json_file, elapsed):
+    with _stats_mutex:
+        stats = _validation_stats.setdefault(
+            json_file, {'count': 0, 'time': 0.0, 'max_time': 0.0})
+        stats['count'] += 1
+        stats['time'] += elapsed
+        stats['max_time'] = max(stats['max_time'], elapsed)
+
+
+def get_validation_stats():
+    """Returns count, total and max time of validations, by spec name."""
+
+    from networkapi.settings import SPECS
+
+    names = dict((json_file, name) for name, json_file in SPECS.items())
+    with _stats_mutex:
+        return dict((names.get(json_file, json_file), dict(stats))
+                    for json_file, stats in _validation_stats.items())
+
+
 def json_validate(json_file):
+    """Returns the validator of a spec, compiled once per process."""
 
-    with open(json_file) as data_file:
-        data = json.load(data_file)
-        validator = load(data)
+    validator = _validators.get(json_file)
+    if validator is None:
+        with open(json_file) as data_file:
+            data = json.load(data_file)
+            validator = SpecValidator(json_file, load(data))
+        _validators[json_file] = validator
 
     return validator
 
 
+def preload_specs():
+    """Compiles validators of every spec in SPECS.
+
+    Called at startup, before gunicorn forks workers (preload_app).
+    """
+
+    from networkapi.settings import SPECS
+
+    for name, json_file in SPECS.items():
+        try:
+            json_validate(json_file)
+        except Exception, e:
+            log.error(u'Failure to compile spec %s: %s' % (name, e))
+
+
 def raise_json_validate(info=None):
     def raise_json_validate_inner(func):
         @wraps(func)
@@ -5,6 +5,7 @@ from django.db.models.query_utils import Q
 
 from networkapi.api_network.exceptions import NetworkConflictException
 from networkapi.infrastructure.ipaddr import IPNetwork
+from networkapi.util.freespace import FreeSpace
 from networkapi.util.geral import get_app
 
 log = logging.getLogger(__name__)
@@ -13,22 +14,19 @@ log = logging.getLogger(__name__)
 def get_free_space_network(free_nets, used_nets):
     """Return list of free subnets."""
 
-    for excluded_net in used_nets:
-        temp_net_list = list(free_nets)
-        free_nets = []
-        while temp_net_list:
-            temp_net = temp_net_list.pop()
-            used_nets = []
-            try:
-                used_nets = list(temp_net.address_exclude(excluded_net))
-            except ValueError:
-                used_nets = [temp_net]
-                pass
-            free_nets.extend(used_nets)
+    free_nets = list(free_nets)
+    if not free_nets:
+        return free_nets
 
-    free_nets.sort()
+    free_space = FreeSpace(used_nets, version=free_nets[0].version)
 
-    return free_nets
+    nets = list()
+    for free_net in free_nets:
+        nets.extend(free_space.free_networks(free_net))
+
+    nets.sort()
+
+    return nets
 
 
 def verify_networks(subnets, supernets):
@@ -208,17 +206,17 @@ def get_networks_related(vrfs, eqpts, has_netv4=True,
 
     vlans_env_eqpt = vlans_env_eqpt.distinct()
 
+    ip_models = get_app('ip', 'models')
+
     netv4 = list()
     if has_netv4:
-        netv4 = reduce(list.__add__, [
-            list(vlan_env.networkipv4_set.all())
-            for vlan_env in vlans_env_eqpt if vlan_env.networkipv4_set.all()], [])
+        netv4 = list(ip_models.NetworkIPv4.objects.filter(
+            vlan__in=vlans_env_eqpt))
 
     netv6 = list()
     if has_netv6:
-        netv6 = reduce(list.__add__, [
-            list(vlan_env.networkipv6_set.all())
-            for vlan_env in vlans_env_eqpt if vlan_env.networkipv6_set.all()], [])
+        netv6 = list(ip_models.NetworkIPv6.objects.filter(
+            vlan__in=vlans_env_eqpt))
 
     return netv4, netv6
 
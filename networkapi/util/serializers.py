@@ -1,12 +1,44 @@
 # -*- coding: utf-8 -*-
 import logging
 
+from django.db.models.fields import FieldDoesNotExist
 from rest_framework import serializers
 
 from networkapi.models.BaseManager import BaseQuerySet
 
 log = logging.getLogger(__name__)
 
+# Max depth of nested serializers walked by eager loading planning
+MAX_PLANNING_DEPTH = 8
+
+
+def get_relation(model, name):
+    """Returns how relation name of model is eager loaded.
+
+    @return: ('select', related model) for foreign keys and one to one,
+             ('prefetch', related model) for many to many and reverse
+             foreign keys | None when name is not a relation.
+    """
+
+    opts = model._meta
+    try:
+        field = opts.get_field(name)
+        if field.rel:
+            if field.rel.multiple and field.get_internal_type() == \
+                    'ManyToManyField':
+                return 'prefetch', field.rel.to
+            return 'select', field.rel.to
+        return None
+    except FieldDoesNotExist:
+        pass
+
+    for related in opts.get_all_related_objects() + \
+            opts.get_all_related_many_to_many_objects():
+        if related.get_accessor_name() == name:
+            return 'prefetch', related.model
+
+    return None
+
 
 class DynamicFieldsModelSerializer(serializers.ModelSerializer):
 
@@ -59,15 +91,6 @@ class DynamicFieldsModelSerializer(serializers.ModelSerializer):
                               for field in all_fields]
 
             if filtred_fields and type(queryset) == BaseQuerySet:
-                # import pdb; pdb.Pdb(skip=['django.*']).set_trace()  #
-                # breakpoint 184999ff //
-
-                # for key in all_fields:
-                # import pdb; pdb.Pdb(skip=['django.*']).set_trace()  #
-                # breakpoint 50ca06f4 //
-
-                #     queryset = self.recur(self, key, kind, queryset)
-
                 queryset = self.exec_eager_loading(filtred_fields, queryset)
 
             args = (queryset,)
@@ -77,6 +100,8 @@ class DynamicFieldsModelSerializer(serializers.ModelSerializer):
 
         # Prepare field for serializer
         self.context = {'serializers': dict()}
+        # Nested serializers by mapping key, reused for every object
+        self.nested_serializers = dict()
 
         # Use default_fields when exists
         existing = set(self.fields.keys())
@@ -138,6 +163,90 @@ class DynamicFieldsModelSerializer(serializers.ModelSerializer):
                     fd_key: field_filtered
                 })
 
+        if type(self.object) == BaseQuerySet:
+            self.object = self.exec_eager_loading_plan(self.object)
+
+    def get_eager_loading_plan(self, model, prefix='', prefetch=False,
+                               depth=0):
+        """Walks the fields of this serializer and of its nested serializers
+        (the ones that will be used to render) and returns lookups of every
+        relation they traverse.
+
+        @return: (select_related lookups, prefetch_related lookups)
+        """
+
+        selects = set()
+        prefetches = set()
+        if depth > MAX_PLANNING_DEPTH:
+            return selects, prefetches
+
+        for field_name in self.fields.keys():
+            key = self.context['serializers'].get(field_name, field_name)
+            slr_model = self.mapping.get(key, {})
+            if not slr_model.get('serializer') or slr_model.get('keys'):
+                continue
+
+            # 'related' is the relation behind an 'obj' that is a property
+            name = slr_model.get('related', slr_model.get('obj'))
+            if not name:
+                continue
+            relation = get_relation(model, name)
+            if not relation:
+                continue
+
+            kind, related_model = relation
+            lookup = prefix + name
+            # Relations after a prefetched one must be prefetched too
+            nested_prefetch = prefetch or kind == 'prefetch'
+            if nested_prefetch:
+                prefetches.add(lookup)
+            else:
+                selects.add(lookup)
+
+            try:
+                nested = self.get_nested_serializer(key, slr_model)
+                if not hasattr(nested, 'get_eager_loading_plan'):
+                    continue
+                nested_selects, nested_prefetches = \
+                    nested.get_eager_loading_plan(
+                        related_model, lookup + '__', nested_prefetch,
+                        depth + 1)
+            except Exception, e:
+                log.warning(u'Failure planning eager loading of %s: %s' %
+                            (lookup, e))
+                continue
+            selects |= nested_selects
+            prefetches |= nested_prefetches
+
+        return selects, prefetches
+
+    def exec_eager_loading_plan(self, queryset):
+        """Applies select_related/prefetch_related of all relations used to
+        render queryset, so queries do not grow with the number of rows."""
+
+        try:
+            selects, prefetches = self.get_eager_loading_plan(queryset.model)
+        except Exception, e:
+            log.warning(u'Failure planning eager loading of %s: %s' %
+                        (queryset.model.__name__, e))
+            return queryset
+
+        if selects:
+            queryset = queryset.select_related(*sorted(selects))
+        if prefetches:
+            queryset = queryset.prefetch_related(*sorted(prefetches))
+        return queryset
+
+    def get_nested_serializer(self, key, slr_model):
+        """Returns serializer of mapping key, created once for all objects."""
+
+        nested = self.nested_serializers.get(key)
+        if nested is None:
+            nested = slr_model.get('serializer')(
+                None, **slr_model.get('kwargs', dict()))
+            self.nested_serializers[key] = nested
+        return nested
+
     def extends_serializer(self, obj, default_field):
 
         key = self.context.get('serializers').get(default_field, default_field)
@@ -154,9 +263,9 @@ class DynamicFieldsModelSerializer(serializers.ModelSerializer):
 
             return render
         else:
-            return self.render_serializer(obj, slr_model)
+            return self.render_serializer(obj, slr_model, key)
 
-    def render_serializer(self, obj, slr_model):
+    def render_serializer(self, obj, slr_model, key=None):
         # obj costum
 
         if obj and slr_model.get('obj'):
@@ -174,10 +283,24 @@ class DynamicFieldsModelSerializer(serializers.ModelSerializer):
         else:
 
             try:
-                model_serializer = slr_model.get('serializer')(
-                    obj, **slr_model.get('kwargs', dict())
-                )
-                ret_srl = model_serializer.data
+                if key is None:
+                    model_serializer = slr_model.get('serializer')(
+                        obj, **slr_model.get('kwargs', dict())
+                    )
+                    ret_srl = model_serializer.data
+                else:
+                    model_serializer = self.get_nested_serializer(
+                        key, slr_model)
+                    # Queryset not prefetched by the plan of this serializer
+                    if type(obj) == BaseQuerySet and \
+                            obj._result_cache is None and \
+                            hasattr(model_serializer, 'exec_eager_loading_plan'):
+                        obj = model_serializer.exec_eager_loading_plan(obj)
+                    if model_serializer.many:
+                        ret_srl = [model_serializer.to_native(item)
+                                   for item in obj]
+                    else:
+                        ret_srl = model_serializer.to_native(obj)
             except:
                 return None
 
@@ -215,20 +338,20 @@ class DynamicFieldsModelSerializer(serializers.ModelSerializer):
         return key, fields_aux
 
     def exec_eager_loading(self, filted_fields, queryset):
-        try:
 
-            # get fields with prefetch_related
-            mapping = self.mapping
+        # get fields with prefetch_related
+        mapping = self.mapping
 
-            # For each field
-            for key in filted_fields:
-                # if has key
-                eager_loading = mapping.get(key, {}).get('eager_loading')
-                if eager_loading:
+        # For each field
+        for key in filted_fields:
+            # if has key
+            eager_loading = mapping.get(key, {}).get('eager_loading')
+            if eager_loading:
+                try:
                     queryset = eager_loading(queryset)
-        except Exception, e:
-            log.info(e)
-            pass
+                except Exception, e:
+                    log.warning(u'Failure in eager loading of %s: %s' %
+                                (key, e))
         return queryset
 
 
@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Compiled configuration templates (roteiros), kept per process.
+
+Templates are kept by file path and compiled again only when the
+modification time of the file changes, so edited templates are used
+without restarting workers. The least recently used templates are dropped
+when there are more than MAX_TEMPLATES.
+"""
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from django.template import Template
+
+log = logging.getLogger(__name__)
+
+MAX_TEMPLATES = 512
+
+
+class CachedTemplate(object):
+
+    """Compiled template that records its render times."""
+
+    def __init__(self, template, filename, stats):
+        self.template = template
+        self.filename = filename
+        self._stats = stats
+
+    def render(self, context):
+        start = time.time()
+        try:
+            return self.template.render(context)
+        finally:
+            self._stats.record_render(self.filename, time.time() - start)
+
+
+class TemplateStats(object):
+
+    def __init__(self):
+        self._mutex = threading.Lock()
+        self._stats = dict()
+
+    def _get(self, filename):
+        return self._stats.setdefault(filename, {
+            'hits': 0,
+            'misses': 0,
+            'renders': 0,
+            'render_time': 0.0,
+            'render_time_max': 0.0,
+        })
+
+    def record_load(self, filename, hit):
+        with self._mutex:
+            self._get(filename)['hits' if hit else 'misses'] += 1
+
+    def record_render(self, filename, elapsed):
+        with self._mutex:
+            stats = self._get(filename)
+            stats['renders'] += 1
+            stats['render_time'] += elapsed
+            stats['render_time_max'] = max(stats['render_time_max'], elapsed)
+
+    def get(self):
+        with self._mutex:
+            return dict((filename, dict(stats))
+                        for filename, stats in self._stats.items())
+
+    def clear(self):
+        with self._mutex:
+            self._stats.clear()
+
+
+class TemplateCache(object):
+
+    def __init__(self, max_templates=MAX_TEMPLATES):
+        self.max_templates = max_templates
+        self.stats = TemplateStats()
+        self._lock = threading.Lock()
+        # filename: (mtime, CachedTemplate), least recently used first
+        self._templates = OrderedDict()
+
+    def get(self, filename):
+        """Returns compiled template of file.
+
+        @raise IOError: file can not be read.
+        @raise TemplateSyntaxError: template is invalid.
+        """
+
+        filename = os.path.normpath(filename)
+        try:
+            mtime = os.stat(filename).st_mtime
+        except OSError, e:
+            raise IOError(e)
+
+        with self._lock:
+            entry = self._templates.pop(filename, None)
+            if entry is not None and entry[0] == mtime:
+                self._templates[filename] = entry
+                self.stats.record_load(filename, True)
+                return entry[1]
+
+        self.stats.record_load(filename, False)
+        with open(filename, 'r') as file_handle:
+            template = CachedTemplate(
+                Template(file_handle.read()), filename, self.stats)
+
+        with self._lock:
+            self._templates[filename] = (mtime, template)
+            while len(self._templates) > self.max_templates:
+                self._templates.popitem(last=False)
+
+        return template
+
+    def clear(self):
+        with self._lock:
+            self._templates.clear()
+
+
+templates = TemplateCache()
+
+
+def get_template(filename):
+    """Returns compiled template of file, compiled once per modification."""
+
+    return templates.get(filename)
+
+
+def get_template_stats():
+    """Returns hits, misses, renders and total and max render time, by
+    template file, of this process."""
+
+    return templates.stats.get()
+
+
+def preload_templates():
+    """Compiles every template of network and interface template paths.
+
+    Called at startup, before gunicorn forks workers (preload_app).
+    """
+
+    from networkapi.settings import INTERFACE_CONFIG_TEMPLATE_PATH
+    from networkapi.settings import NETWORK_CONFIG_TEMPLATE_PATH
+
+    for path in (NETWORK_CONFIG_TEMPLATE_PATH, INTERFACE_CONFIG_TEMPLATE_PATH):
+        if not os.path.isdir(path):
+            continue
+        for name in os.listdir(path):
+            filename = os.path.join(path, name)
+            if not os.path.isfile(filename):
+                continue
+            try:
+                get_template(filename)
+            except Exception, e:
+                log.error(u'Failure to compile template %s: %s' %
+                          (filename, e))
+
+    # Preloading is not a use of templates
+    templates.stats.clear()
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""Benchmark of free prefix space lookups.
+
+Usage: python -m networkapi.util.tests.benchmark_freespace
+
+Allocates a /8 with N used /29 (spread over the first half of the space) and
+measures the FreeSpace build time, the time to find the first free /24 and
+to hand out 100 consecutive /27. The address_exclude based implementation
+is also measured for the small sizes, its cost grows quadratically.
+"""
+import random
+import time
+
+from networkapi.infrastructure.ipaddr import IPNetwork
+from networkapi.util.freespace import FreeSpace
+
+SIZES = (100, 1000, 10000, 100000)
+LEGACY_MAX_SIZE = 100
+
+
+def legacy_first_free_subnet(net, used_nets, prefixlen):
+    free_nets = [net]
+    for excluded_net in used_nets:
+        temp_net_list = list(free_nets)
+        free_nets = []
+        while temp_net_list:
+            temp_net = temp_net_list.pop()
+            try:
+                free_nets.extend(temp_net.address_exclude(excluded_net))
+            except ValueError:
+                free_nets.append(temp_net)
+    free_nets.sort()
+
+    for free_net in free_nets:
+        try:
+            return free_net.iter_subnets(new_prefix=prefixlen).next()
+        except Exception:
+            pass
+
+
+def used_networks(size):
+    random.seed(size)
+    offsets = random.sample(xrange(1 << 20), size)
+    return [IPNetwork('%s/29' % IPNetwork('10.0.0.0/8')[offset << 3])
+            for offset in offsets]
+
+
+def timeit(func, *args):
+    start = time.time()
+    result = func(*args)
+    return result, (time.time() - start) * 1000
+
+
+def main():
+    net = IPNetwork('10.0.0.0/8')
+
+    print '%8s %12s %12s %14s %12s' % (
+        'used', 'build (ms)', 'first /24', '100 x /27 (ms)', 'legacy (ms)')
+
+    for size in SIZES:
+        used_nets = used_networks(size)
+
+        free_space, build = timeit(FreeSpace, used_nets)
+        subnet, first = timeit(free_space.first_free_subnet, net, 24)
+
+        def allocate_many():
+            for _ in xrange(100):
+                free_space.allocate(free_space.first_free_subnet(net, 27))
+
+        _, many = timeit(allocate_many)
+
+        legacy = '-'
+        if size <= LEGACY_MAX_SIZE:
+            legacy_subnet, legacy = timeit(
+                legacy_first_free_subnet, net, used_nets, 24)
+            assert legacy_subnet == subnet
+            legacy = '%.2f' % legacy
+
+        print '%8d %12.2f %12.3f %14.2f %12s' % (
+            size, build, first, many, legacy)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+
+import unittest
+
+from mock import patch
+
+from networkapi.util import appcache
+
+
+class FakeCache(object):
+
+    def __init__(self):
+        self.data = dict()
+
+    def add(self, key, value, timeout=0):
+        self.data.setdefault(key, value)
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def get_many(self, keys):
+        return dict((key, self.data[key]) for key in keys if key in self.data)
+
+    def set(self, key, value, timeout=0):
+        self.data[key] = value
+
+    def incr(self, key):
+        if key not in self.data:
+            raise ValueError(key)
+        self.data[key] += 1
+        return self.data[key]
+
+
+class TaggedCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        patcher = patch.object(appcache, 'djangocache', FakeCache())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_get_after_set(self):
+        appcache.set_tagged_search('ENV', 'search', [1])
+        self.assertEqual([1], appcache.get_tagged_search('ENV', 'search'))
+        self.assertIsNone(appcache.get_tagged_search('ENV', 'other'))
+
+    def test_invalidate_prefix(self):
+        appcache.set_tagged_search('ENV', 'search', [1])
+        appcache.invalidate_tags(['ENV'])
+        self.assertIsNone(appcache.get_tagged_search('ENV', 'search'))
+
+    def test_invalidate_fine_grained_tag(self):
+        appcache.set_tagged_search('ENV', 'one', [1], tags=['ENV:1'])
+        appcache.set_tagged_search('ENV', 'two', [2], tags=['ENV:2'])
+        appcache.invalidate_tags(['ENV:1'])
+        self.assertIsNone(
+            appcache.get_tagged_search('ENV', 'one', tags=['ENV:1']))
+        self.assertEqual(
+            [2], appcache.get_tagged_search('ENV', 'two', tags=['ENV:2']))
+
+    def test_stats(self):
+        appcache.set_tagged_search('STATS', 'search', [1])
+        appcache.get_tagged_search('STATS', 'search')
+        appcache.get_tagged_search('STATS', 'other')
+        stats = appcache.get_cache_stats()['STATS']
+        self.assertEqual(1, stats['sets'])
+        self.assertEqual(1, stats['hits'])
+        self.assertEqual(1, stats['misses'])
+
+    def test_invalidation_stats_by_prefix(self):
+        appcache.invalidate_tags(['INV', 'INV:1', 'INV:2'])
+        stats = appcache.get_cache_stats()
+        self.assertEqual(3, stats['INV']['invalidations'])
+        self.assertNotIn('INV:1', stats)
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+
+import unittest
+
+from mock import MagicMock
+from mock import patch
+from rest_framework.response import Response
+
+from networkapi.util.decorators import cached_search
+
+
+class FakeView(object):
+
+    search = {'extends_search': []}
+    fields = ()
+    include = ()
+    exclude = ()
+    kind = None
+
+    def __init__(self):
+        self.calls = 0
+        self.status = 200
+
+    @cached_search('CACHE_TEST')
+    def get(self, request, *args, **kwargs):
+        self.calls += 1
+        return Response({'vlans': [{'id': 1}]}, status=self.status)
+
+
+class CachedSearchTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = dict()
+        patch('networkapi.util.decorators.get_cached_search',
+              side_effect=lambda prefix, search, tags:
+              self.cache.get((prefix, search))).start()
+        patch('networkapi.util.decorators.set_cache_search_with_list',
+              side_effect=self.set_cache).start()
+        patch('networkapi.util.decorators.get_search_cache_time',
+              return_value=300).start()
+        self.view = FakeView()
+
+    def tearDown(self):
+        patch.stopall()
+
+    def set_cache(self, prefix, search, data, timeout, tags):
+        self.cache[(prefix, search)] = data
+
+    def request(self, user_id=1, if_none_match=None):
+        request = MagicMock()
+        request.GET.lists.return_value = [('page', ['1'])]
+        request.user = MagicMock(spec=['id'])
+        request.user.id = user_id
+        request.get_host.return_value = 'networkapi.local'
+        request.is_secure.return_value = False
+        request.META = dict()
+        if if_none_match is not None:
+            request.META['HTTP_IF_NONE_MATCH'] = if_none_match
+        return request
+
+    def test_second_search_is_served_from_cache(self):
+        first = self.view.get(self.request())
+        second = self.view.get(self.request())
+
+        self.assertEqual(1, self.view.calls)
+        self.assertEqual(200, second.status_code)
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(first['ETag'], second['ETag'])
+
+    def test_searches_of_other_users_are_cached_apart(self):
+        self.view.get(self.request(user_id=1))
+        self.view.get(self.request(user_id=2))
+
+        self.assertEqual(2, self.view.calls)
+
+    def test_failed_search_is_not_cached(self):
+        self.view.status = 400
+        self.view.get(self.request())
+        self.view.get(self.request())
+
+        self.assertEqual(2, self.view.calls)
+        self.assertEqual({}, self.cache)
+
+    def test_not_modified_when_etag_matches_cached_search(self):
+        etag = self.view.get(self.request())['ETag']
+
+        response = self.view.get(self.request(if_none_match=etag))
+
+        self.assertEqual(304, response.status_code)
+        self.assertEqual(etag, response['ETag'])
+        self.assertIsNone(response.data)
+        self.assertEqual(1, self.view.calls)
+
+    def test_not_modified_when_etag_matches_new_search(self):
+        etag = self.view.get(self.request())['ETag']
+        self.cache.clear()
+
+        response = self.view.get(self.request(if_none_match=etag))
+
+        self.assertEqual(304, response.status_code)
+        self.assertEqual(2, self.view.calls)
+
+    def test_data_sent_when_etag_differs(self):
+        self.view.get(self.request())
+
+        response = self.view.get(self.request(if_none_match='"other"'))
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual({'vlans': [{'id': 1}]}, response.data)
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+from networkapi.infrastructure.ipaddr import IPNetwork
+from networkapi.util.freespace import FreeSpace
+from networkapi.util.network import get_free_space_network
+
+
+class FreeSpaceTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.net = IPNetwork('10.0.0.0/16')
+        self.used = [IPNetwork('10.0.0.0/24'), IPNetwork('10.0.1.0/25'),
+                     IPNetwork('10.0.2.64/26'), IPNetwork('10.1.0.0/24')]
+
+    def test_first_free_subnet(self):
+        free_space = FreeSpace(self.used)
+
+        self.assertEqual(IPNetwork('10.0.1.128/25'),
+                         free_space.first_free_subnet(self.net, 25))
+        self.assertEqual(IPNetwork('10.0.3.0/24'),
+                         free_space.first_free_subnet(self.net, 24))
+        # Second half of 10.0.1.0/24 is free
+        self.assertEqual(IPNetwork('10.0.1.128/26'),
+                         free_space.first_free_subnet(self.net, 26))
+
+    def test_first_free_subnet_bigger_than_network(self):
+        free_space = FreeSpace(self.used)
+
+        self.assertIsNone(free_space.first_free_subnet(self.net, 15))
+
+    def test_first_free_subnet_without_space(self):
+        free_space = FreeSpace([IPNetwork('10.0.0.0/15')])
+
+        self.assertIsNone(free_space.first_free_subnet(self.net, 24))
+
+    def test_allocate(self):
+        free_space = FreeSpace(self.used)
+
+        subnets = list()
+        for _ in range(3):
+            subnet = free_space.first_free_subnet(self.net, 25)
+            free_space.allocate(subnet)
+            subnets.append(subnet)
+
+        self.assertEqual([IPNetwork('10.0.1.128/25'),
+                          IPNetwork('10.0.2.128/25'),
+                          IPNetwork('10.0.3.0/25')], subnets)
+
+    def test_ipv6(self):
+        net = IPNetwork('fdbe:bebe:bebe:1200::/56')
+        free_space = FreeSpace([IPNetwork('fdbe:bebe:bebe:1200::/64')],
+                               version=6)
+
+        self.assertEqual(IPNetwork('fdbe:bebe:bebe:1201::/64'),
+                         free_space.first_free_subnet(net, 64))
+
+    def test_get_free_space_network(self):
+        free_nets = get_free_space_network([IPNetwork('10.0.0.0/22')],
+                                           self.used)
+
+        self.assertEqual([IPNetwork('10.0.1.128/25'),
+                          IPNetwork('10.0.2.0/26'),
+                          IPNetwork('10.0.2.128/25'),
+                          IPNetwork('10.0.3.0/24')], free_nets)
@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+from jsonspec.validators.exceptions import ValidationError
+
+from networkapi.settings import SPECS
+from networkapi.util.json_validate import json_validate
+
+
+class JsonValidateTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.validator = json_validate(SPECS.get('vip_request_post'))
+
+    def test_compiled_once(self):
+        self.assertIs(self.validator,
+                      json_validate(SPECS.get('vip_request_post')))
+
+    def test_items_errors(self):
+        vips = {
+            'vips': [
+                {'id': None, 'name': 1, 'ports': [{'port': 0}]},
+                {'id': None, 'name': 'vip'},
+                {'name': 'vip', 'service': 3}
+            ],
+            'extra': 1
+        }
+
+        with self.assertRaises(ValidationError) as error:
+            self.validator.validate(vips)
+
+        self.assertEqual(
+            set(['#/extra', '#/vips/0/name', '#/vips/0/ports/0/port',
+                 '#/vips/2/service']),
+            set(error.exception.flatten().keys()))
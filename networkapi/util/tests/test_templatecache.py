@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from django.template import Context
+
+from networkapi.util.templatecache import TemplateCache
+
+
+class TemplateCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.path)
+        self.cache = TemplateCache(max_templates=2)
+
+    def write(self, name, content, mtime=None):
+        filename = os.path.join(self.path, name)
+        with open(filename, 'w') as file_handle:
+            file_handle.write(content)
+        if mtime is not None:
+            os.utime(filename, (mtime, mtime))
+        return filename
+
+    def test_template_is_compiled_once(self):
+        filename = self.write('vlan', 'vlan {{ VLAN_NUMBER }}')
+
+        template = self.cache.get(filename)
+
+        self.assertIs(self.cache.get(filename), template)
+        self.assertEqual(template.render(Context({'VLAN_NUMBER': 10})),
+                         'vlan 10')
+        stats = self.cache.stats.get()[filename]
+        self.assertEqual((stats['hits'], stats['misses'], stats['renders']),
+                         (1, 1, 1))
+
+    def test_changed_template_is_compiled_again(self):
+        filename = self.write('vlan', 'vlan {{ VLAN_NUMBER }}', 1000)
+        self.cache.get(filename)
+
+        self.write('vlan', 'no vlan {{ VLAN_NUMBER }}', 2000)
+        template = self.cache.get(filename)
+
+        self.assertEqual(template.render(Context({'VLAN_NUMBER': 10})),
+                         'no vlan 10')
+
+    def test_least_recently_used_template_is_dropped(self):
+        first = self.cache.get(self.write('first', 'first'))
+        self.cache.get(self.write('second', 'second'))
+        self.cache.get(os.path.join(self.path, 'first'))
+        self.cache.get(self.write('third', 'third'))
+
+        self.assertIs(self.cache.get(os.path.join(self.path, 'first')), first)
+        self.assertEqual(
+            self.cache.stats.get()[os.path.join(self.path, 'second')]['misses'],
+            1)
+        self.cache.get(os.path.join(self.path, 'second'))
+        self.assertEqual(
+            self.cache.stats.get()[os.path.join(self.path, 'second')]['misses'],
+            2)
+
+    def test_missing_template_raises_io_error(self):
+        self.assertRaises(IOError, self.cache.get,
+                          os.path.join(self.path, 'missing'))
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+
+import unittest
+
+from mock import patch
+
+from networkapi.util import transaction_hooks
+
+
+class FakeConnection(object):
+
+    def __init__(self):
+        self.managed = False
+        self.committed = 0
+
+    def is_managed(self):
+        return self.managed
+
+    def _commit(self):
+        self.committed += 1
+
+    def _rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class OnCommitTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.connection = FakeConnection()
+        patcher = patch.object(transaction_hooks, 'connections',
+                               {'default': self.connection})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.calls = list()
+
+    def callback(self):
+        self.calls.append(self.connection.committed)
+
+    def test_runs_at_once_without_managed_transaction(self):
+        transaction_hooks.on_commit(self.callback)
+        self.assertEqual([0], self.calls)
+
+    def test_runs_after_commit(self):
+        self.connection.managed = True
+        transaction_hooks.on_commit(self.callback)
+        self.assertEqual([], self.calls)
+
+        self.connection._commit()
+        self.assertEqual([1], self.calls)
+
+        # Only once
+        self.connection._commit()
+        self.assertEqual([1], self.calls)
+
+    def test_same_callback_runs_once_by_commit(self):
+        self.connection.managed = True
+        transaction_hooks.on_commit(self.callback)
+        transaction_hooks.on_commit(self.callback)
+
+        self.connection._commit()
+        self.assertEqual([1], self.calls)
+
+    def test_dropped_on_rollback(self):
+        self.connection.managed = True
+        transaction_hooks.on_commit(self.callback)
+        self.connection._rollback()
+
+        self.connection._commit()
+        self.assertEqual([], self.calls)
+
+    def test_dropped_on_close(self):
+        self.connection.managed = True
+        transaction_hooks.on_commit(self.callback)
+        self.connection.close()
+
+        self.connection._commit()
+        self.assertEqual([], self.calls)
+
+    def test_error_of_callback_does_not_stop_others(self):
+        def fail():
+            raise Exception('Error')
+
+        self.connection.managed = True
+        transaction_hooks.on_commit(fail)
+        transaction_hooks.on_commit(self.callback)
+
+        self.connection._commit()
+        self.assertEqual([1], self.calls)
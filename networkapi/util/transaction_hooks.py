@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Callbacks run when the transaction of the default database commits.
+
+Django 1.5 has no transaction.on_commit, and model signals sent inside a
+managed transaction (commit_on_success) run before it commits. on_commit
+runs a callback at once when no managed transaction is open, since changes
+were already committed, or keeps it in the connection of the thread until
+its next commit. Callbacks waiting are dropped when the transaction is
+rolled back or the connection is closed.
+
+Callbacks run inside the commit, so they must not write to database.
+"""
+import logging
+
+from django.db import connections
+from django.db import DEFAULT_DB_ALIAS
+
+log = logging.getLogger(__name__)
+
+
+def _run(callbacks):
+    for callback in callbacks:
+        try:
+            callback()
+        except Exception:
+            log.error(u'Error running callback %s on commit', callback,
+                      exc_info=True)
+
+
+def _install(connection):
+    """Wraps commit, rollback and close of connection, once."""
+
+    if getattr(connection, '_on_commit', None) is not None:
+        return
+
+    connection._on_commit = list()
+    commit = connection._commit
+    rollback = connection._rollback
+    close = connection.close
+
+    def _commit():
+        result = commit()
+        callbacks = list(connection._on_commit)
+        del connection._on_commit[:]
+        _run(callbacks)
+        return result
+
+    def _rollback():
+        del connection._on_commit[:]
+        return rollback()
+
+    def _close():
+        del connection._on_commit[:]
+        return close()
+
+    connection._commit = _commit
+    connection._rollback = _rollback
+    connection.close = _close
+
+
+def on_commit(callback):
+    """Runs callback once the current transaction commits.
+
+    A callback already waiting for the same commit is not added again.
+    """
+
+    connection = connections[DEFAULT_DB_ALIAS]
+    if not connection.is_managed():
+        _run([callback])
+        return
+
+    _install(connection)
+    if callback not in connection._on_commit:
+        connection._on_commit.append(callback)
@@ -9,6 +9,9 @@ from django.core.exceptions import ObjectDoesNotExist
 from django.db import models
 from django.db.models import get_model
 from django.db.models import Q
+from django.db.models.signals import post_delete
+from django.db.models.signals import post_init
+from django.db.models.signals import post_save
 
 from networkapi.admin_permission import AdminPermission
 from networkapi.distributedlock import LOCK_ENVIRONMENT_ALLOCATES
@@ -26,9 +29,11 @@ from networkapi.settings import MIN_VLAN_NUMBER_02
 from networkapi.util import clone
 from networkapi.util import network
 from networkapi.util.decorators import cached_property
+from networkapi.util.freespace import FreeSpace
 from networkapi.util.geral import create_lock_with_blocking
 from networkapi.util.geral import destroy_lock
 from networkapi.util.geral import get_app
+from networkapi.vlan import occupancy
 
 
 class VlanError(Exception):
@@ -447,43 +452,25 @@ class Vlan(BaseModel):
 
             @return: None when hasn't a number available | num_vlan when found a number available
         """
-        interval = range(min_num, max_num + 1)
-
-        # Vlan numbers in interval in the same environment
-        vlan_numbers_in_interval = self.search_vlan_numbers(
-            self.ambiente_id, min_num, max_num)
-
         # Find equipment's ids from environmnet that is 'switches',
         # 'roteadores' or 'balanceadores'
         id_equipamentos = EquipamentoAmbiente.objects.filter(
             equipamento__tipo_equipamento__id__in=[1, 3, 5],
             ambiente__id=self.ambiente_id
         ).values_list('equipamento', flat=True)
-        # Vlan numbers in others environment but in environment that has
-        # equipments found in before filter ('switches', 'roteadores' or
-        # 'balanceadores')
-        vlans_others_environments = Vlan.objects.exclude(
-            ambiente__id=self.ambiente_id
-        ).filter(
-            ambiente__equipamentoambiente__equipamento__id__in=id_equipamentos
-        ).values_list('num_vlan', flat=True)
 
-        # Clean duplicates numbers and update merge 'vlan_numbers_in_interval'
-        # with 'vlans_others_environments'
-        vlan_numbers_in_interval = set(vlan_numbers_in_interval)
-        vlan_numbers_in_interval.update(vlans_others_environments)
+        # Vlan numbers in the same environment and in others environment
+        # that has equipments found in before filter
+        if list_available:
+            # Cached bitmaps may hide numbers, list from database
+            occupied = occupancy.get_occupancy(
+                self.ambiente_id, id_equipamentos, rebuild=True)
+            return set(occupancy.list_free(occupied, min_num, max_num))
 
-        self.log.debug('Interval: %s.', interval)
-        self.log.debug('VLANs in interval: %s.', vlan_numbers_in_interval)
+        occupied = occupancy.get_occupancy(self.ambiente_id, id_equipamentos)
 
-        # if len(interval) > len(vlan_numbers_in_interval):
-        diff_set = set(interval) - set(vlan_numbers_in_interval)
-        self.log.debug('Difference in the lists: %s.', diff_set)
-        if list_available:
-            return diff_set
-        for num_vlan in diff_set:
-            return num_vlan
-        return None
+        return self.find_vlan_number(occupied, min_num, max_num,
+                                     id_equipamentos)
 
     def activate(self, authenticated_user):
         """ Set column ativada = 1"""
@@ -1036,6 +1023,37 @@ class Vlan(BaseModel):
 
         return vrfs
 
+    def get_free_space(self, ip_version):
+        """Returns free space (FreeSpace) of ip_version ('v4' or 'v6') out of
+        networks related with vlan by its vrfs and equipments."""
+
+        is_v4 = ip_version == 'v4'
+
+        netv4, netv6 = network.get_networks_related(
+            vrfs=self.get_vrf(),
+            eqpts=self.get_eqpt(),
+            has_netv4=is_v4,
+            has_netv6=not is_v4
+        )
+
+        if is_v4:
+            nets = [IPNetwork(net.networkv4) for net in netv4]
+            return FreeSpace(nets, version=4)
+
+        nets = [IPNetwork(net.networkv6) for net in netv6]
+        return FreeSpace(nets, version=6)
+
+    def get_free_space_key(self):
+        """Returns key identifying the networks related with vlan, vlans with
+        same key share the same free space."""
+
+        vrfs = sorted(self.get_vrf().values_list('id', flat=True))
+        # get_eqpt already lists ids of Equipamento, ids of
+        # EquipamentoAmbiente differ between environments
+        eqpts = sorted(set(self.get_eqpt()))
+
+        return tuple(vrfs), tuple(eqpts)
+
     def validate_v3(self):
         """Make validations in values inputted."""
 
@@ -1588,60 +1606,88 @@ class Vlan(BaseModel):
             min_num_02 = MIN_VLAN_NUMBER_02
             max_num_02 = MAX_VLAN_NUMBER_02
 
+        # Occupancy is computed once for both ranges
+        occupied = self.get_vlan_occupancy()
+
         # Calculate Number VLAN
-        self.num_vlan = self.calculate_vlan_number_v3(min_num_01, max_num_01)
+        self.num_vlan = self.calculate_vlan_number_v3(
+            min_num_01, max_num_01, occupied=occupied)
         if self.num_vlan is None:
             self.num_vlan = self.calculate_vlan_number_v3(
-                min_num_02, max_num_02)
+                min_num_02, max_num_02, occupied=occupied)
             if self.num_vlan is None:
                 raise VlanNumberNotAvailableError(
                     None, u'Number VLAN unavailable for environment %d.'
                     % self.ambiente.id)
 
-    def calculate_vlan_number_v3(self, min_num, max_num, list_available=False):
+    def get_vlan_occupancy(self, rebuild=False):
+        """Returns bitmap of vlan numbers used in environment of vlan or in
+        environments that have equipments of it."""
+
+        return occupancy.get_occupancy(self.ambiente_id, self.get_eqpt(),
+                                       rebuild=rebuild)
+
+    def calculate_vlan_number_v3(self, min_num, max_num, list_available=False,
+                                 occupied=None):
         """Caculate if has a number available in range (min_num/max_num) to
         specified environment
 
         @param min_num: Minimum number that the vlan can be created.
         @param max_num: Maximum number that the vlan can be created.
         @param list_available: If = True, return the list of numbers availables
+        @param occupied: Bitmap of vlan numbers used, computed when omitted.
 
         @return: None when hasn't a number available | num_vlan when found
                  a number available
         """
 
-        interval = range(min_num, max_num + 1)
+        if list_available:
+            # Cached bitmaps may hide numbers, list from database
+            occupied = self.get_vlan_occupancy(rebuild=True)
+            return set(occupancy.list_free(occupied, min_num, max_num))
 
-        # Vlan numbers in interval in the same environment
-        vlan_numbers_in_interval = self.search_vlan_numbers(
-            self.ambiente_id, min_num, max_num)
+        if occupied is None:
+            occupied = self.get_vlan_occupancy()
 
-        # Find equipment's ids from environmnet that is 'switches',
-        # 'roteadores' or 'balanceadores'
-        id_equipamentos = self.get_eqpt()
+        return self.find_vlan_number(occupied, min_num, max_num,
+                                     self.get_eqpt())
 
-        # Vlan numbers in others environment but in environment that has
-        # equipments found in before filter ('switches', 'roteadores' or
-        # 'balanceadores')
-        vlans_others_environments = Vlan.objects.exclude(
-            ambiente__id=self.ambiente_id
-        ).filter(
-            ambiente__equipamentoambiente__equipamento__id__in=id_equipamentos
-        ).values_list('num_vlan', flat=True)
+    def find_vlan_number(self, occupied, min_num, max_num, id_equipamentos):
+        """Returns first number in range (min_num/max_num) not set in bitmap
+        occupied, confirming in database that it is really available.
 
-        # Clean duplicates numbers and update merge 'vlan_numbers_in_interval'
-        # with 'vlans_others_environments'
-        vlan_numbers_in_interval = set(vlan_numbers_in_interval)
-        vlan_numbers_in_interval.update(vlans_others_environments)
+        Before giving up, bitmaps are rebuilt from database once, since
+        numbers of vlans rolled back may still be set in cache.
 
-        self.log.debug('Interval: %s.', interval)
-        self.log.debug('VLANs in interval: %s.', vlan_numbers_in_interval)
+        @return: None when hasn't a number available | num_vlan when found
+                 a number available
+        """
 
-        diff_set = set(interval) - set(vlan_numbers_in_interval)
-        self.log.debug('Difference in the lists: %s.', diff_set)
+        num_vlan = occupancy.first_free(occupied, min_num, max_num)
+        if num_vlan is None:
+            occupied = occupancy.get_occupancy(
+                self.ambiente_id, id_equipamentos, rebuild=True)
+            num_vlan = occupancy.first_free(occupied, min_num, max_num)
+
+        while num_vlan is not None:
+            # Bitmaps are cached, so confirms number is really available
+            used = Vlan.objects.filter(
+                Q(ambiente__id=self.ambiente_id) |
+                Q(ambiente__equipamentoambiente__equipamento__id__in=id_equipamentos),
+                num_vlan=num_vlan
+            ).exists()
+            if not used:
+                return num_vlan
+
+            self.log.warning('Vlan number %s was cached as available.',
+                             num_vlan)
+            occupancy.invalidate_environment(self.ambiente_id)
+            occupied |= 1 << num_vlan
+            num_vlan = occupancy.first_free(occupied, min_num, max_num)
 
-        if list_available:
-            return diff_set
-        for num_vlan in diff_set:
-            return num_vlan
         return None
+
+
+post_init.connect(occupancy.vlan_post_init, sender=Vlan)
+post_save.connect(occupancy.vlan_post_save, sender=Vlan)
+post_delete.connect(occupancy.vlan_post_delete, sender=Vlan)
@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Occupancy of VLAN numbers by environment and by equipment.
+
+Each environment and each equipment has a 4096-bit bitmap (a python long)
+of the VLAN numbers in use, kept in the django cache. The occupancy of an
+environment is its own bitmap OR-reduced with the bitmaps of its equipments.
+
+Bitmaps are updated by the Vlan and EquipamentoAmbiente signals. Removing a
+VLAN invalidates bitmaps instead of clearing bits, since other VLANs may use
+the same number in the same equipment.
+
+Signals run before the transaction commits, so a VLAN whose insert is
+rolled back leaves its bit set. Such stale bits only hide numbers: callers
+rebuild the bitmaps from database (rebuild=True) before reporting that
+no number is available, and when listing available numbers.
+"""
+import logging
+
+from django.core.cache import cache as djangocache
+from django.db.models import get_model
+
+log = logging.getLogger(__name__)
+
+VLAN_OCCUPANCY_CACHE_TIMEOUT = 3600
+VLAN_OCCUPANCY_CACHE_PREFIX = 'VLAN_OCCUPANCY'
+
+
+def _env_key(env_id):
+    return '%s:env:%s' % (VLAN_OCCUPANCY_CACHE_PREFIX, env_id)
+
+
+def _eqpt_key(eqpt_id):
+    return '%s:eqpt:%s' % (VLAN_OCCUPANCY_CACHE_PREFIX, eqpt_id)
+
+
+def to_bitmap(numbers):
+    bitmap = 0
+    for number in numbers:
+        bitmap |= 1 << number
+    return bitmap
+
+
+def first_free(bitmap, min_num, max_num):
+    """Returns the lowest number in [min_num, max_num] not set in bitmap."""
+
+    if min_num > max_num:
+        return None
+    free = ((1 << (max_num + 1)) - (1 << min_num)) & ~bitmap
+    if not free:
+        return None
+    return (free & -free).bit_length() - 1
+
+
+def list_free(bitmap, min_num, max_num):
+    """Returns the numbers in [min_num, max_num] not set in bitmap."""
+
+    if min_num > max_num:
+        return list()
+    free = ((1 << (max_num + 1)) - (1 << min_num)) & ~bitmap
+    numbers = list()
+    while free:
+        lowest = free & -free
+        numbers.append(lowest.bit_length() - 1)
+        free ^= lowest
+    return numbers
+
+
+def _get_many(keys):
+    try:
+        return djangocache.get_many(keys)
+    except Exception as e:
+        log.error(e)
+        return dict()
+
+
+def _set_many(data):
+    try:
+        djangocache.set_many(data, VLAN_OCCUPANCY_CACHE_TIMEOUT)
+    except Exception as e:
+        log.error(e)
+
+
+def _delete_many(keys):
+    try:
+        djangocache.delete_many(keys)
+    except Exception as e:
+        log.error(e)
+
+
+def get_occupancy(env_id, eqpt_ids, rebuild=False):
+    """Returns bitmap of VLAN numbers used by environment or by VLANs of
+    any environment sharing one of the equipments.
+
+    When rebuild is True cached bitmaps are ignored and built again from
+    database.
+    """
+
+    vlan_model = get_model('vlan', 'Vlan')
+
+    eqpt_ids = list(eqpt_ids)
+    if rebuild:
+        cached = dict()
+    else:
+        keys = [_env_key(env_id)] + \
+            [_eqpt_key(eqpt_id) for eqpt_id in eqpt_ids]
+        cached = _get_many(keys)
+
+    to_cache = dict()
+
+    env_bitmap = cached.get(_env_key(env_id))
+    if env_bitmap is None:
+        env_bitmap = to_bitmap(vlan_model.objects.filter(
+            ambiente__id=env_id
+        ).values_list('num_vlan', flat=True))
+        to_cache[_env_key(env_id)] = env_bitmap
+
+    occupancy = env_bitmap
+    missing = list()
+    for eqpt_id in eqpt_ids:
+        eqpt_bitmap = cached.get(_eqpt_key(eqpt_id))
+        if eqpt_bitmap is None:
+            missing.append(eqpt_id)
+        else:
+            occupancy |= eqpt_bitmap
+
+    if missing:
+        # Builds all missing bitmaps with one query
+        bitmaps = dict((eqpt_id, 0) for eqpt_id in missing)
+        vlans = vlan_model.objects.filter(
+            ambiente__equipamentoambiente__equipamento__id__in=missing
+        ).values_list('ambiente__equipamentoambiente__equipamento__id',
+                      'num_vlan')
+        for eqpt_id, num_vlan in vlans:
+            if eqpt_id in bitmaps:
+                bitmaps[eqpt_id] |= 1 << num_vlan
+
+        for eqpt_id, eqpt_bitmap in bitmaps.items():
+            occupancy |= eqpt_bitmap
+            to_cache[_eqpt_key(eqpt_id)] = eqpt_bitmap
+
+    if to_cache:
+        _set_many(to_cache)
+
+    return occupancy
+
+
+def _env_eqpt_ids(env_id):
+    eqpt_env_model = get_model('equipamento', 'EquipamentoAmbiente')
+    return eqpt_env_model.objects.filter(
+        ambiente__id=env_id
+    ).values_list('equipamento', flat=True)
+
+
+def mark_used(env_id, num_vlan):
+    """Sets num_vlan in cached bitmaps of environment and its equipments."""
+
+    keys = [_env_key(env_id)] + \
+        [_eqpt_key(eqpt_id) for eqpt_id in _env_eqpt_ids(env_id)]
+    cached = _get_many(keys)
+    if cached:
+        _set_many(dict((key, bitmap | 1 << num_vlan)
+                       for key, bitmap in cached.items()))
+
+
+def invalidate_environment(env_id):
+    """Drops cached bitmaps of environment and its equipments."""
+
+    _delete_many([_env_key(env_id)] +
+                 [_eqpt_key(eqpt_id) for eqpt_id in _env_eqpt_ids(env_id)])
+
+
+def invalidate_equipment(eqpt_id):
+
+    _delete_many([_eqpt_key(eqpt_id)])
+
+
+###################
+# SIGNALS         #
+###################
+
+def vlan_post_init(sender, instance, **kwargs):
+    # Original values, to find out if vlan was moved
+    instance._occupancy = (instance.ambiente_id, instance.num_vlan)
+
+
+def vlan_post_save(sender, instance, created=False, **kwargs):
+
+    old_env_id, old_num_vlan = getattr(instance, '_occupancy', (None, None))
+    moved = (old_env_id, old_num_vlan) != \
+        (instance.ambiente_id, instance.num_vlan)
+
+    if not created and moved and old_env_id is not None:
+        invalidate_environment(old_env_id)
+
+    if (created or moved) and instance.num_vlan is not None:
+        mark_used(instance.ambiente_id, int(instance.num_vlan))
+
+    instance._occupancy = (instance.ambiente_id, instance.num_vlan)
+
+
+def vlan_post_delete(sender, instance, **kwargs):
+
+    invalidate_environment(instance.ambiente_id)
+
+
+def equipment_environment_changed(sender, instance, **kwargs):
+
+    invalidate_equipment(instance.equipamento_id)
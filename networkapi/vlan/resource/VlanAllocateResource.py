@@ -23,8 +23,9 @@ from networkapi.ambiente.models import Ambiente
 from networkapi.ambiente.models import AmbienteError
 from networkapi.ambiente.models import AmbienteNotFoundError
 from networkapi.auth import has_perm
-from networkapi.distributedlock import distributedlock
+from networkapi.distributedlock import acquire_many
 from networkapi.distributedlock import LOCK_ENVIRONMENT
+from networkapi.distributedlock import release_many
 from networkapi.equipamento.models import Equipamento
 from networkapi.exception import InvalidValueError
 from networkapi.filterequiptype.models import FilterEquipType
@@ -168,13 +169,10 @@ class VlanAllocateResource(RestResource):
                 tipo_equipamento__in=filtered_equipment_type_ids)
 
             # select all environments from the equips that were not filtered
-            locks_list = list()
             environments_list = Ambiente.objects.filter(
                 equipamentoambiente__equipamento__in=filtered_environment_equips).distinct().order_by('id')
-            for environment in environments_list:
-                lock = distributedlock(LOCK_ENVIRONMENT % environment.id)
-                lock.__enter__()
-                locks_list.append(lock)
+            locks_list = acquire_many(
+                [LOCK_ENVIRONMENT % env_obj.id for env_obj in environments_list])
 
             # Persist
             try:
@@ -186,12 +184,10 @@ class VlanAllocateResource(RestResource):
                                 )
             except Exception, e:
                 # release all the locks if failed
-                for lock in locks_list:
-                    lock.__exit__('', '', '')
+                release_many(locks_list)
                 raise e
 
-            for lock in locks_list:
-                lock.__exit__('', '', '')
+            release_many(locks_list)
 
             vlan_map = dict()
             vlan_map['vlan'] = model_to_dict(vlan)
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+from __future__ import absolute_import
+from __future__ import unicode_literals
+
+import unittest
+
+from mock import MagicMock
+from mock import patch
+
+from networkapi.vlan import occupancy
+from networkapi.vlan.models import Vlan
+
+
+class OccupancyTestCase(unittest.TestCase):
+
+    bitmap = occupancy.to_bitmap([1, 2, 3, 7, 4094])
+
+    def test_first_free(self):
+        self.assertEqual(4, occupancy.first_free(self.bitmap, 1, 4094))
+        self.assertEqual(8, occupancy.first_free(self.bitmap, 7, 4094))
+        self.assertIsNone(occupancy.first_free(self.bitmap, 1, 3))
+        self.assertIsNone(occupancy.first_free(self.bitmap, 10, 9))
+
+    def test_list_free(self):
+        self.assertEqual([4, 5, 6, 8], occupancy.list_free(self.bitmap, 1, 8))
+        self.assertEqual([], occupancy.list_free(self.bitmap, 4094, 4094))
+        self.assertEqual(4089, len(occupancy.list_free(self.bitmap, 1, 4094)))
+
+
+class FakeCache(object):
+
+    def __init__(self):
+        self.data = dict()
+
+    def get_many(self, keys):
+        return dict((key, self.data[key]) for key in keys if key in self.data)
+
+    def set_many(self, data, timeout=None):
+        self.data.update(data)
+
+    def delete_many(self, keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+
+class VlanRolledBackTestCase(unittest.TestCase):
+
+    def setUp(self):
+        # Vlan numbers committed in environment 1
+        self.committed = [10, 11]
+
+        vlan_model = MagicMock()
+        vlan_model.objects.filter.return_value.values_list.side_effect = \
+            lambda *args, **kwargs: list(self.committed)
+        eqpt_env_model = MagicMock()
+        eqpt_env_model.objects.filter.return_value.values_list \
+            .return_value = []
+        models = {'Vlan': vlan_model, 'EquipamentoAmbiente': eqpt_env_model}
+
+        patch('networkapi.vlan.occupancy.djangocache', FakeCache()).start()
+        patch('networkapi.vlan.occupancy.get_model',
+              side_effect=lambda app, name: models[name]).start()
+        patch.object(Vlan, 'objects').start()
+        Vlan.objects.filter.return_value.exists.return_value = False
+
+        self.vlan = Vlan(ambiente_id=1)
+        patch.object(Vlan, 'get_eqpt', return_value=[]).start()
+
+    def tearDown(self):
+        patch.stopall()
+
+    def roll_back_insert(self, num_vlan):
+        # Signal runs before commit, insert is then rolled back
+        occupancy.vlan_post_save(
+            Vlan, Vlan(ambiente_id=1, num_vlan=num_vlan), created=True)
+
+    def test_number_rolled_back_is_still_allocatable(self):
+        occupancy.get_occupancy(1, [])
+        self.roll_back_insert(12)
+
+        self.assertEqual(12, self.vlan.calculate_vlan_number_v3(10, 12))
+
+    def test_number_rolled_back_is_listed_as_available(self):
+        occupancy.get_occupancy(1, [])
+        self.roll_back_insert(12)
+
+        self.assertEqual(set([12]), self.vlan.calculate_vlan_number_v3(
+            10, 12, list_available=True))
+
+    def test_rebuilt_occupancy_is_cached(self):
+        occupancy.get_occupancy(1, [])
+        self.roll_back_insert(12)
+
+        occupancy.get_occupancy(1, [], rebuild=True)
+
+        self.assertEqual(occupancy.to_bitmap([10, 11]),
+                         occupancy.get_occupancy(1, []))
+
+    def test_no_number_available(self):
+        self.committed = [10, 11, 12]
+
+        self.assertIsNone(self.vlan.calculate_vlan_number_v3(10, 12))
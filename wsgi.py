@@ -26,3 +26,15 @@ os.environ['DJANGO_SETTINGS_MODULE'] = os.getenv('DJANGO_SETTINGS_MODULE',
 
 import django.core.handlers.wsgi
 application = django.core.handlers.wsgi.WSGIHandler()
+
+# Compiles validators of specs once, before gunicorn forks the workers
+# (preload_app), so they are shared by all of them
+if int(os.getenv('NETWORKAPI_PRELOAD_SPECS', 1)):
+    from networkapi.util.json_validate import preload_specs
+    preload_specs()
+
+# Compiles configuration templates before fork too; they are compiled again
+# by each worker only when their files change
+if int(os.getenv('NETWORKAPI_PRELOAD_TEMPLATES', 1)):
+    from networkapi.util.templatecache import preload_templates
+    preload_templates()